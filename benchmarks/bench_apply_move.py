@@ -0,0 +1,85 @@
+"""
+apply_move() のマイクロベンチマーク（旧実装との 1 手あたりの所要時間の比較）
+
+使い方: python benchmarks/bench_apply_move.py [--puzzles N] [--colors N] [--seed N]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.generator import generate_puzzle  # noqa: E402
+from src.models import BOTTLE_CAPACITY, Move, PuzzleState, apply_move  # noqa: E402
+from src.solver import get_legal_moves  # noqa: E402
+
+
+def legacy_apply_move(
+    state: PuzzleState,
+    move: Move,
+    bottle_capacity: int = BOTTLE_CAPACITY,
+) -> PuzzleState:
+    """比較用の旧実装（状態全体とボトル 2 本をリストに変換し、1 セグメントずつ移す）"""
+    bottles = list(state)
+    from_b = list(bottles[move.from_bottle])
+    to_b = list(bottles[move.to_bottle])
+    top_color = from_b[-1]
+    block_size = 0
+    for seg in reversed(from_b):
+        if seg == top_color:
+            block_size += 1
+        else:
+            break
+    move_count = min(block_size, bottle_capacity - len(to_b))
+    for _ in range(move_count):
+        to_b.append(from_b.pop())
+    bottles[move.from_bottle] = tuple(from_b)
+    bottles[move.to_bottle] = tuple(to_b)
+    return tuple(bottles)
+
+
+def collect_cases(
+    puzzles: int, colors: int, seed: int
+) -> list[tuple[PuzzleState, Move]]:
+    """生成したパズルと、そこからランダムに数手進めた局面の合法手をすべて集める。"""
+    rng = random.Random(seed)
+    cases: list[tuple[PuzzleState, Move]] = []
+    for _ in range(puzzles):
+        state = generate_puzzle(colors, rng=rng).state
+        for _ in range(rng.randrange(12)):
+            moves = get_legal_moves(state, BOTTLE_CAPACITY)
+            if not moves:
+                break
+            state = apply_move(state, rng.choice(moves))
+        cases.extend((state, move) for move in get_legal_moves(state, BOTTLE_CAPACITY))
+    return cases
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--puzzles", type=int, default=200)
+    parser.add_argument("--colors", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    cases = collect_cases(args.puzzles, args.colors, args.seed)
+    for state, move in cases:
+        assert apply_move(state, move) == legacy_apply_move(state, move)
+
+    results: dict[str, float] = {}
+    for name, fn in (("legacy", legacy_apply_move), ("current", apply_move)):
+        seconds = min(
+            timeit.repeat(lambda: [fn(s, m) for s, m in cases], number=10, repeat=args.repeat)
+        )
+        results[name] = seconds / (10 * len(cases))
+        print(f"{name:8s}: {results[name] * 1e9:7.0f} ns/move")
+    print(f"{len(cases)} moves, speedup: {results['legacy'] / results['current']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+状態展開のマイクロベンチマーク（ボトル内容のタプルとボトル ID のタプルの 1 状態あたりの所要時間の比較）
+
+使い方: python benchmarks/bench_interning.py [--states N] [--colors N] [--seed N]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.generator import generate_puzzle  # noqa: E402
+from src.interning import BottleTable  # noqa: E402
+from src.models import BOTTLE_CAPACITY, PuzzleState, apply_move  # noqa: E402
+from src.solver import get_legal_moves  # noqa: E402
+
+
+def collect_states(states: int, colors: int, seed: int) -> list[PuzzleState]:
+    """生成したパズルから BFS で states 状態を集める（探索中に展開する状態に近い分布）。"""
+    initial = generate_puzzle(colors, rng=random.Random(seed)).state
+    seen = {initial}
+    frontier = [initial]
+    while frontier and len(seen) < states:
+        next_frontier: list[PuzzleState] = []
+        for state in frontier:
+            for move in get_legal_moves(state, BOTTLE_CAPACITY):
+                child = apply_move(state, move, BOTTLE_CAPACITY)
+                if child not in seen:
+                    seen.add(child)
+                    next_frontier.append(child)
+        frontier = next_frontier
+    return list(seen)[:states]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--states", type=int, default=20_000)
+    parser.add_argument("--colors", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    states = collect_states(args.states, args.colors, args.seed)
+    table = BottleTable(BOTTLE_CAPACITY)
+    interned = [table.encode(state) for state in states]
+    for state, ids in zip(states, interned):
+        moves = get_legal_moves(state, BOTTLE_CAPACITY)
+        assert table.legal_moves(ids) == moves
+        for move in moves:
+            assert table.decode(table.apply(ids, move)) == apply_move(state, move, BOTTLE_CAPACITY)
+
+    def expand_tuples() -> None:
+        seen = set()
+        for state in states:
+            for move in get_legal_moves(state, BOTTLE_CAPACITY):
+                seen.add(apply_move(state, move, BOTTLE_CAPACITY))
+
+    def expand_interned() -> None:
+        seen = set()
+        for ids in interned:
+            for move in table.legal_moves(ids):
+                seen.add(table.apply(ids, move))
+
+    results: dict[str, float] = {}
+    for name, fn in (("tuples", expand_tuples), ("interned", expand_interned)):
+        seconds = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+        results[name] = seconds / len(states)
+        print(f"{name:8s}: {results[name] * 1e6:7.2f} us/state")
+    print(
+        f"{len(states)} states, {len(table)} bottle ids, {table.transitions} transitions, "
+        f"speedup: {results['tuples'] / results['interned']:.2f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
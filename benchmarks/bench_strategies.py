@@ -0,0 +1,62 @@
+"""
+探索戦略ごとの所要時間・手数の記録（--strategy auto の規則表の学習データ）
+
+使い方: python benchmarks/bench_strategies.py [FILE ...] [--puzzles N] [--seed N] [--timeout SEC]
+        [--choices LABEL,...] [--output RECORDS.jsonl]
+FILE を指定した場合はそのパズルを、指定しない場合は色数・容量・空ボトル数を乱択した生成パズルを
+各戦略で解き、記録を --output に追記する。規則表の学習は
+python main.py --train-selector RECORDS.jsonl --selector-model MODEL.json で行う。
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.generator import generate_puzzle  # noqa: E402
+from src.parser import parse_file  # noqa: E402
+from src.selector import StrategyChoice, run_benchmark, write_records  # noqa: E402
+
+DEFAULT_CHOICES = "bfs+prune,dfs+prune,greedy+prune,beam:64+prune,beam:256+prune,beam:1024+prune,ida+prune"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("paths", nargs="*", metavar="FILE")
+    parser.add_argument("--puzzles", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=2.0)
+    parser.add_argument("--choices", default=DEFAULT_CHOICES)
+    parser.add_argument("--output", default=str(Path(__file__).resolve().parent / "strategy_runs.jsonl"))
+    args = parser.parse_args()
+
+    choices = [StrategyChoice.parse(label) for label in args.choices.split(",")]
+    if args.paths:
+        puzzles = [(path, *parse_file(path)) for path in args.paths]
+    else:
+        rng = random.Random(args.seed)
+        puzzles = []
+        for index in range(args.puzzles):
+            colors = rng.randint(4, 12)
+            empty_bottles = rng.choice((1, 2, 2, 3))
+            capacity = rng.choice((3, 4, 4, 5))
+            state = generate_puzzle(
+                colors, empty_bottles, capacity, rng=random.Random(args.seed * 100_003 + index)
+            ).state
+            puzzles.append((f"seed{args.seed}-{index}", state, capacity))
+
+    for puzzle, state, capacity in puzzles:
+        records = run_benchmark(puzzle, state, choices, args.timeout, capacity)
+        write_records(records, args.output)
+        summary = " ".join(
+            f"{r.choice.label}={r.elapsed:.2f}s/{r.moves if r.outcome == 'solved' else r.outcome}"
+            for r in records
+        )
+        print(f"{puzzle}: {summary}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,23 @@
 from __future__ import annotations
 
 import argparse
+import dataclasses
 import sys
 
+from src.analyzer import analyze_state_space, format_analysis
+from src.checkpoint import DEFAULT_CHECKPOINT_INTERVAL, CheckpointError, Checkpointer
+from src.enumerator import build_solution_dag
+from src.distributed import DEFAULT_WORKERS, run_worker, solve_distributed
 from src.format_help import build_format_help_text
-from src.formatter import format_output, write_output
-from src.models import CLIArgs, ParseError, PuzzleTimeoutError
+from src.formatter import write_output, write_output_stream, write_solutions_stream
+from src.hints import DEFAULT_MAX_TABLE_STATES, HintTable, build_hint_table, get_hint
+from src.memo import MemoTable
+from src.models import CLIArgs, ParseError, PuzzleState, PuzzleTimeoutError
 from src.parser import parse_file
-from src.solver import solve
+from src.portfolio import solve_portfolio
+from src.profiler import format_profile_summary, write_trace
+from src.selector import StrategySelector, read_records, select_strategy, train_selector
+from src.solver import DEFAULT_BEAM_WIDTH, solve
 from src.validator import validate
 
 __version__ = "0.1.0"
@@ -18,6 +28,25 @@ _EXIT_ERROR = 1
 _EXIT_TIMEOUT = 2
 
 
+def _positive_int(value: str) -> int:
+    """1 以上の整数を受け付ける argparse 用の型変換。"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"整数を指定してください: {value}") from None
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"1 以上の整数を指定してください: {value}")
+    return number
+
+
+def _address(value: str) -> tuple[str, int]:
+    """HOST:PORT を受け付ける argparse 用の型変換。"""
+    host, sep, port = value.rpartition(":")
+    if not sep or not host or not port.isdigit() or int(port) > 0xFFFF:
+        raise argparse.ArgumentTypeError(f"HOST:PORT の形式で指定してください: {value}")
+    return host, int(port)
+
+
 def build_parser() -> argparse.ArgumentParser:
     """引数パーサを構築して返す。"""
     parser = argparse.ArgumentParser(
@@ -34,7 +63,7 @@ def build_parser() -> argparse.ArgumentParser:
         "--input", "-i",
         required=False,
         default=None,
-        help="入力ファイルのパス（YAML / JSON / テキスト形式）",
+        help="入力ファイルのパス（YAML / JSON / JSON Lines / バイナリ / テキスト形式）",
     )
     parser.add_argument(
         "--validate",
@@ -44,9 +73,156 @@ def build_parser() -> argparse.ArgumentParser:
     )
     parser.add_argument(
         "--strategy",
-        choices=["bfs", "dfs"],
+        choices=["bfs", "dfs", "greedy", "beam", "ida", "portfolio", "distributed", "auto"],
         default="bfs",
-        help="探索アルゴリズム（デフォルト: bfs）",
+        help="探索アルゴリズム（greedy は有望な手から展開する DFS、"
+        "beam は深さごとに有望な状態だけを残す探索、ida は最短手数を求める IDA*、"
+        "portfolio は全戦略を並列に実行して最初の解を採用、"
+        "distributed は状態を複数のワーカーに分割する分散 BFS、"
+        "auto はパズルの特徴量から規則表で戦略・--prune・--beam-width を選ぶ、デフォルト: bfs）",
+    )
+    parser.add_argument(
+        "--selector-model",
+        default=None,
+        metavar="FILE",
+        help="auto で使う規則表（未指定時は組み込みの規則表）。--train-selector では書き出し先",
+    )
+    parser.add_argument(
+        "--train-selector",
+        default=None,
+        metavar="RECORDS",
+        help="benchmarks/bench_strategies.py で記録したベンチマーク結果（JSON Lines）から"
+        "auto の規則表を学習して --selector-model に書き出す（--input 不要）",
+    )
+    parser.add_argument(
+        "--beam-width",
+        type=_positive_int,
+        default=DEFAULT_BEAM_WIDTH,
+        metavar="N",
+        help=f"beam で深さごとに保持する状態数（途絶えたら倍にして再探索、デフォルト: {DEFAULT_BEAM_WIDTH}）",
+    )
+    parser.add_argument(
+        "--portfolio-deadline",
+        type=float,
+        default=0.0,
+        metavar="SEC",
+        help="portfolio で開始から SEC 秒まで待ち、それまでに得られた最短の解を採用する"
+        "（0 で最初の解を採用、デフォルト: 0）",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        metavar="N",
+        help=f"distributed で起動するローカルワーカー数（デフォルト: {DEFAULT_WORKERS}）",
+    )
+    parser.add_argument(
+        "--remote-workers",
+        type=int,
+        default=0,
+        metavar="N",
+        help="distributed で --worker による N 個のワーカーの接続も待つ（デフォルト: 0）",
+    )
+    parser.add_argument(
+        "--listen",
+        type=_address,
+        default=("127.0.0.1", 0),
+        metavar="HOST:PORT",
+        help="distributed のコーディネーターが接続を待ち受けるアドレス"
+        "（デフォルト: 127.0.0.1 の空きポート）",
+    )
+    parser.add_argument(
+        "--worker",
+        type=_address,
+        default=None,
+        metavar="HOST:PORT",
+        help="distributed のワーカーとして HOST:PORT のコーディネーターに接続し、"
+        "探索が終わるまで処理する（--input 不要）",
+    )
+    parser.add_argument(
+        "--all-solutions",
+        type=_positive_int,
+        nargs="?",
+        const=0,
+        default=None,
+        metavar="N",
+        help="最短手数の解法をすべて（N 指定時は先頭 N 個）見つかった順に出力する"
+        "（--strategy は無視、--format は text / json / yaml）",
+    )
+    parser.add_argument(
+        "--count-solutions",
+        action="store_true",
+        default=False,
+        help="最短手数の解法の数だけを出力する（解法は展開しない）",
+    )
+    parser.add_argument(
+        "--analyze",
+        action="store_true",
+        default=False,
+        help="到達可能な全状態を探索し、状態数・解決不能な状態数・残り手数の分布を出力する"
+        "（--strategy は無視、--format は text / json / yaml、--timeout 0 で無制限）",
+    )
+    parser.add_argument(
+        "--graph-output",
+        default=None,
+        metavar="FILE",
+        help="--analyze で探索した状態グラフ（状態・残り手数・遷移）をバイナリ形式で書き出す",
+    )
+    parser.add_argument(
+        "--build-hint-table",
+        default=None,
+        metavar="FILE",
+        help="入力のレベルから到達可能な全状態の最短手数を求め、ヒント表として FILE に書き出す"
+        f"（--strategy は無視、--timeout 0 で無制限、状態数の上限: {DEFAULT_MAX_TABLE_STATES}）",
+    )
+    parser.add_argument(
+        "--hint",
+        action="store_true",
+        default=False,
+        help="入力の状態からの次の最善手と残り手数を出力する"
+        "（--hint-table の表にない状態はその場で BFS を実行する）",
+    )
+    parser.add_argument(
+        "--hint-table",
+        default=None,
+        metavar="FILE",
+        help="--hint で引くヒント表（--build-hint-table で作成したファイル）",
+    )
+    parser.add_argument(
+        "--capacity",
+        type=_positive_int,
+        default=None,
+        metavar="N",
+        help="ボトルの容量を N とし、途中まで注がれたボトルを含む入力（途中局面）を受け付ける"
+        "（省略時は最も長いボトルから推定し、全ボトルが満杯か空であることを要求する）",
+    )
+    parser.add_argument(
+        "--memo",
+        default=None,
+        metavar="FILE",
+        help="探索で証明した解なし・残り手数の下界を FILE から読み込み、探索後に追記して保存する"
+        "（portfolio / distributed では無視）",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        default=None,
+        metavar="FILE",
+        help="探索の途中経過（訪問済み状態・未展開の状態）を FILE に定期的に書き出す"
+        "（--strategy は bfs / dfs / greedy のみ、タイムアウト時にも書き出す）",
+    )
+    parser.add_argument(
+        "--checkpoint-interval",
+        type=float,
+        default=DEFAULT_CHECKPOINT_INTERVAL,
+        metavar="SEC",
+        help="チェックポイントを書き出す最短の間隔（書き出しに時間がかかる場合は自動で延ばす、"
+        f"デフォルト: {DEFAULT_CHECKPOINT_INTERVAL:g}）",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        default=False,
+        help="--checkpoint のファイルがあればそこから探索を再開する（なければ最初から探索する）",
     )
     parser.add_argument(
         "--timeout",
@@ -56,9 +232,9 @@ def build_parser() -> argparse.ArgumentParser:
     )
     parser.add_argument(
         "--format",
-        choices=["text", "json", "yaml"],
+        choices=["text", "json", "yaml", "binary"],
         default="text",
-        help="出力フォーマット（デフォルト: text）",
+        help="出力フォーマット（binary はパズルと手順を格納したコンパクトなバイナリ、デフォルト: text）",
     )
     parser.add_argument(
         "--output", "-o",
@@ -77,6 +253,24 @@ def build_parser() -> argparse.ArgumentParser:
         default=False,
         help="探索進捗を stderr に出力する",
     )
+    parser.add_argument(
+        "--prune",
+        action="store_true",
+        default=False,
+        help="逆手・ボトルの並べ替えにすぎない手・入れ替え可能な手の重複生成を省く",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        default=False,
+        help="フェーズ別所要時間・重複率・深さごとの統計を計測し json / yaml 出力に含める",
+    )
+    parser.add_argument(
+        "--profile-trace",
+        default=None,
+        metavar="FILE",
+        help="計測結果を JSON トレースファイルに書き出す（--profile を含意）",
+    )
     parser.add_argument(
         "--version",
         action="version",
@@ -89,7 +283,7 @@ def run(args: CLIArgs) -> int:
     """CLIArgs を受け取り、処理を実行して終了コードを返す。"""
     # 1. 入力解析
     try:
-        state, bottle_capacity = parse_file(args.input_path)
+        state, bottle_capacity = parse_file(args.input_path, capacity=args.capacity)
     except FileNotFoundError as e:
         print(f"エラー: ファイルが見つかりません: {args.input_path}", file=sys.stderr)
         return _EXIT_ERROR
@@ -111,39 +305,317 @@ def run(args: CLIArgs) -> int:
             print("パズル状態は有効です。")
         return _EXIT_OK
 
-    # 4. 解決済み判定
+    # 4. 状態空間の解析（解決済みの初期状態からも到達可能な状態を調べる）
+    if args.analyze:
+        return _run_analysis(args, state, bottle_capacity)
+
+    if args.hint_table_build_path is not None:
+        return _run_hint_table_build(args, state, bottle_capacity)
+
+    # 5. 解決済み判定
     if validation.already_solved:
         print("パズルはすでに解決されています。")
         return _EXIT_OK
 
-    # 5. 解法探索
+    if args.hint:
+        return _run_hint(args, state, bottle_capacity)
+
+    # 6. 最短解法の列挙
+    if args.all_solutions is not None or args.count_solutions:
+        return _run_enumeration(args, state, bottle_capacity)
+
+    # 7. 解法探索（auto の場合は先に戦略を選ぶ）
+    if args.strategy == "auto":
+        selected = _select_strategy(args, state, bottle_capacity)
+        if selected is None:
+            return _EXIT_ERROR
+        args = selected
+    memo: MemoTable | None = None
+    if args.memo_path is not None:
+        try:
+            memo = MemoTable.load(args.memo_path)
+        except FileNotFoundError:
+            memo = MemoTable()
+        except (OSError, ValueError) as e:
+            print(f"エラー: メモ表ファイルの読み込みに失敗しました: {e}", file=sys.stderr)
+            return _EXIT_ERROR
+    checkpointer: Checkpointer | None = None
+    if args.checkpoint_path is not None:
+        try:
+            checkpointer = Checkpointer(args.checkpoint_path, args.checkpoint_interval)
+        except ValueError as e:
+            print(f"エラー: {e}", file=sys.stderr)
+            return _EXIT_ERROR
     try:
-        result = solve(
-            initial_state=state,
-            strategy=args.strategy,
-            timeout=args.timeout,
-            debug=args.debug,
-        )
+        profile = args.profile or args.profile_trace_path is not None
+        if args.strategy in ("portfolio", "distributed") and checkpointer is not None:
+            print(f"エラー: {args.strategy} ではチェックポイントを使えません。", file=sys.stderr)
+            return _EXIT_ERROR
+        if args.strategy == "distributed":
+            result = solve_distributed(
+                initial_state=state,
+                workers=args.workers,
+                timeout=args.timeout,
+                debug=args.debug,
+                bottle_capacity=bottle_capacity,
+                listen=args.listen,
+                remote_workers=args.remote_workers,
+            )
+        elif args.strategy == "portfolio":
+            result = solve_portfolio(
+                initial_state=state,
+                timeout=args.timeout,
+                debug=args.debug,
+                profile=profile,
+                prune=args.prune,
+                bottle_capacity=bottle_capacity,
+                beam_width=args.beam_width,
+                deadline=args.portfolio_deadline,
+            )
+        else:
+            result = solve(
+                initial_state=state,
+                strategy=args.strategy,
+                timeout=args.timeout,
+                debug=args.debug,
+                profile=profile,
+                prune=args.prune,
+                bottle_capacity=bottle_capacity,
+                beam_width=args.beam_width,
+                memo=memo,
+                checkpointer=checkpointer,
+                resume=args.resume,
+            )
     except PuzzleTimeoutError as e:
         print(f"エラー: {e}", file=sys.stderr)
+        # 打ち切るまでに証明した事実は正しいので保存しておく
+        _save_memo(memo, args.memo_path)
         return _EXIT_TIMEOUT
+    except ValueError as e:
+        print(f"エラー: {e}", file=sys.stderr)
+        return _EXIT_ERROR
+    except CheckpointError as e:
+        print(f"エラー: チェックポイントファイルの読み書きに失敗しました: {e}", file=sys.stderr)
+        return _EXIT_ERROR
+    except OSError as e:
+        if args.strategy == "distributed":
+            print(f"エラー: ワーカーとの通信に失敗しました: {e}", file=sys.stderr)
+        else:
+            print(f"エラー: 探索中に入出力エラーが発生しました: {e}", file=sys.stderr)
+        return _EXIT_ERROR
+    except RuntimeError as e:
+        if args.strategy == "distributed":
+            # ワーカーが途中で切断した・プロトコルが食い違った
+            print(f"エラー: 分散探索に失敗しました: {e}", file=sys.stderr)
+        else:
+            # ポートフォリオの全戦略が例外で終了した
+            print(f"エラー: {e}", file=sys.stderr)
+        return _EXIT_ERROR
+    if not _save_memo(memo, args.memo_path):
+        return _EXIT_ERROR
 
-    # 6. 解なし
+    if args.debug and args.prune:
+        print(f"[DEBUG] 生成を省略した子ノード数: {result.moves_pruned}", file=sys.stderr)
+    if result.profile is not None:
+        if args.debug:
+            print(format_profile_summary(result.profile), file=sys.stderr)
+        if args.profile_trace_path is not None:
+            try:
+                write_trace(
+                    result.profile,
+                    args.profile_trace_path,
+                    metadata={
+                        "input": args.input_path,
+                        "strategy": args.strategy,
+                        "solved": result.solved,
+                        "total_moves": len(result.moves),
+                        "states_visited": result.states_visited,
+                        "elapsed_time": result.elapsed_time,
+                    },
+                )
+            except OSError as e:
+                print(f"エラー: トレースファイルの書き込みに失敗しました: {e}", file=sys.stderr)
+                return _EXIT_ERROR
+
+    # 8. 解なし
     if not result.solved:
         print("このパズルは解決不可能です。", file=sys.stderr)
         return _EXIT_ERROR
 
-    # 7. 出力フォーマット
-    output = format_output(
+    # 9. 出力フォーマット（手順を 1 手ずつ逐次書き出す）
+    write_output_stream(
         result=result,
         initial_state=state,
         fmt=args.output_format,
         verbose=args.verbose,
+        output_path=args.output_path,
+        bottle_capacity=bottle_capacity,
+    )
+    return _EXIT_OK
+
+
+def _run_analysis(args: CLIArgs, state: PuzzleState, bottle_capacity: int) -> int:
+    """--analyze の処理を行い、終了コードを返す。"""
+    if args.output_format == "binary":
+        print("エラー: 状態空間の解析結果は text / json / yaml フォーマットのみ対応しています。", file=sys.stderr)
+        return _EXIT_ERROR
+    try:
+        stats = analyze_state_space(
+            state,
+            bottle_capacity,
+            timeout=args.timeout,
+            debug=args.debug,
+            graph_path=args.graph_output_path,
+        )
+    except PuzzleTimeoutError as e:
+        print(f"エラー: {e}", file=sys.stderr)
+        return _EXIT_TIMEOUT
+    except OSError as e:
+        print(f"エラー: 状態グラフファイルの書き込みに失敗しました: {e}", file=sys.stderr)
+        return _EXIT_ERROR
+    write_output(format_analysis(stats, args.output_format) + "\n", args.output_path)
+    return _EXIT_OK
+
+
+def _select_strategy(args: CLIArgs, state: PuzzleState, bottle_capacity: int) -> CLIArgs | None:
+    """
+    --strategy auto の戦略を選び、戦略とパラメータを置き換えた CLIArgs を返す。
+    規則表の読み込みに失敗した場合はエラーを表示して None を返す。
+    """
+    selector: StrategySelector | None = None
+    if args.selector_model_path is not None:
+        try:
+            selector = StrategySelector.load(args.selector_model_path)
+        except (OSError, ValueError) as e:
+            print(f"エラー: 規則表ファイルの読み込みに失敗しました: {e}", file=sys.stderr)
+            return None
+    choice, features = select_strategy(state, bottle_capacity, selector)
+    if args.debug:
+        values = ", ".join(f"{name}={value}" for name, value in features._asdict().items())
+        print(f"[DEBUG] AUTO: {values} -> {choice.label}", file=sys.stderr)
+    return dataclasses.replace(
+        args,
+        strategy=choice.strategy,
+        prune=args.prune or choice.prune,
+        beam_width=choice.beam_width,
+    )
+
+
+def _train_selector(records_path: str, model_path: str) -> int:
+    """--train-selector の処理を行い、終了コードを返す。"""
+    try:
+        records = read_records(records_path)
+        selector = train_selector(records)
+        selector.save(model_path)
+    except FileNotFoundError:
+        print(f"エラー: ファイルが見つかりません: {records_path}", file=sys.stderr)
+        return _EXIT_ERROR
+    except ValueError as e:
+        print(f"エラー: {e}", file=sys.stderr)
+        return _EXIT_ERROR
+    except OSError as e:
+        print(f"エラー: 規則表ファイルの書き込みに失敗しました: {e}", file=sys.stderr)
+        return _EXIT_ERROR
+    puzzles = len({record.puzzle for record in records})
+    print(f"{puzzles} パズル・{len(records)} 件の記録から学習した規則表を書き出しました: {model_path}")
+    print(selector.format())
+    return _EXIT_OK
+
+
+def _run_hint_table_build(args: CLIArgs, state: PuzzleState, bottle_capacity: int) -> int:
+    """--build-hint-table の処理を行い、終了コードを返す。"""
+    try:
+        table = build_hint_table(
+            state, args.hint_table_build_path, bottle_capacity, args.timeout, args.debug
+        )
+    except PuzzleTimeoutError as e:
+        print(f"エラー: {e}", file=sys.stderr)
+        return _EXIT_TIMEOUT
+    except ValueError as e:
+        print(f"エラー: {e}", file=sys.stderr)
+        return _EXIT_ERROR
+    except OSError as e:
+        print(f"エラー: ヒント表ファイルの書き込みに失敗しました: {e}", file=sys.stderr)
+        return _EXIT_ERROR
+    with table:
+        distance = table.distance(state)
+    print(f"ヒント表を書き出しました: {table.path}")
+    print(f"状態数: {table.states}")
+    print(f"ファイルサイズ: {table.nbytes} バイト")
+    print(f"初期状態からの最短手数: {'解なし' if distance == -1 else distance}")
+    return _EXIT_OK
+
+
+def _run_hint(args: CLIArgs, state: PuzzleState, bottle_capacity: int) -> int:
+    """--hint の処理を行い、終了コードを返す。"""
+    table: HintTable | None = None
+    if args.hint_table_path is not None:
+        try:
+            table = HintTable(args.hint_table_path)
+        except (OSError, ParseError) as e:
+            print(f"エラー: ヒント表ファイルの読み込みに失敗しました: {e}", file=sys.stderr)
+            return _EXIT_ERROR
+    try:
+        hint = get_hint(state, table, bottle_capacity, args.timeout)
+    except PuzzleTimeoutError as e:
+        print(f"エラー: {e}", file=sys.stderr)
+        return _EXIT_TIMEOUT
+    except ParseError as e:
+        print(f"エラー: ヒント表ファイルの読み込みに失敗しました: {e}", file=sys.stderr)
+        return _EXIT_ERROR
+    except ValueError as e:
+        print(f"エラー: {e}（途中局面は --capacity で容量を指定してください）", file=sys.stderr)
+        return _EXIT_ERROR
+    finally:
+        if table is not None:
+            table.close()
+    if hint.move is None:
+        print("このパズルは解決不可能です。", file=sys.stderr)
+        return _EXIT_ERROR
+    source = "ヒント表" if hint.source == "table" else "探索"
+    print(
+        f"次の一手: ボトル {hint.move.from_bottle + 1} → ボトル {hint.move.to_bottle + 1}"
+        f"（残り {hint.distance} 手、{source}）"
     )
-    write_output(output, output_path=args.output_path)
     return _EXIT_OK
 
 
+def _run_enumeration(args: CLIArgs, state: PuzzleState, bottle_capacity: int) -> int:
+    """--all-solutions / --count-solutions の処理を行い、終了コードを返す。"""
+    if args.all_solutions is not None and args.output_format == "binary":
+        print("エラー: 解法の列挙は text / json / yaml フォーマットのみ対応しています。", file=sys.stderr)
+        return _EXIT_ERROR
+    try:
+        dag = build_solution_dag(state, args.timeout, args.debug, bottle_capacity)
+    except PuzzleTimeoutError as e:
+        print(f"エラー: {e}", file=sys.stderr)
+        return _EXIT_TIMEOUT
+    if not dag.solvable:
+        print("このパズルは解決不可能です。", file=sys.stderr)
+        return _EXIT_ERROR
+    if args.count_solutions:
+        print(f"最短 {dag.depth} 手の解法: {dag.count()} 通り")
+    if args.all_solutions is not None:
+        write_solutions_stream(
+            dag.iter_solutions(args.all_solutions or None),
+            fmt=args.output_format,
+            output_path=args.output_path,
+        )
+    return _EXIT_OK
+
+
+def _save_memo(memo: MemoTable | None, path: str | None) -> bool:
+    """memo を path に保存する。書き込みに失敗した場合はエラーを表示して False を返す。"""
+    if memo is None or path is None:
+        return True
+    try:
+        memo.save(path)
+    except OSError as e:
+        print(f"エラー: メモ表ファイルの書き込みに失敗しました: {e}", file=sys.stderr)
+        return False
+    return True
+
+
 def main() -> None:
     """CLI エントリポイント。引数を解析して run() を呼び出す。"""
     parser = build_parser()
@@ -162,9 +634,26 @@ def main() -> None:
         print(build_format_help_text())
         sys.exit(_EXIT_OK)
 
+    # 分散探索のワーカーとして動作する場合は入力ファイル不要
+    if namespace.worker is not None:
+        try:
+            run_worker(*namespace.worker)
+        except OSError as e:
+            print(f"エラー: コーディネーターに接続できません: {e}", file=sys.stderr)
+            sys.exit(_EXIT_ERROR)
+        sys.exit(_EXIT_OK)
+
+    # 規則表の学習も入力ファイル不要
+    if namespace.train_selector is not None:
+        if namespace.selector_model is None:
+            parser.error("--train-selector には --selector-model が必要です")
+        sys.exit(_train_selector(namespace.train_selector, namespace.selector_model))
+
     # --input-format-help なしで --input 未指定の場合はエラー
     if namespace.input is None:
         parser.error("--input は必須です（--input-format-help なし時）")
+    if namespace.resume and namespace.checkpoint is None:
+        parser.error("--resume には --checkpoint が必要です")
 
     args = CLIArgs(
         input_path=namespace.input,
@@ -175,6 +664,27 @@ def main() -> None:
         output_path=namespace.output,
         verbose=namespace.verbose,
         debug=namespace.debug,
+        prune=namespace.prune,
+        beam_width=namespace.beam_width,
+        portfolio_deadline=namespace.portfolio_deadline,
+        workers=namespace.workers,
+        remote_workers=namespace.remote_workers,
+        listen=namespace.listen,
+        selector_model_path=namespace.selector_model,
+        memo_path=namespace.memo,
+        checkpoint_path=namespace.checkpoint,
+        checkpoint_interval=namespace.checkpoint_interval,
+        resume=namespace.resume,
+        all_solutions=namespace.all_solutions,
+        count_solutions=namespace.count_solutions,
+        analyze=namespace.analyze,
+        graph_output_path=namespace.graph_output,
+        hint_table_build_path=namespace.build_hint_table,
+        hint=namespace.hint,
+        hint_table_path=namespace.hint_table,
+        capacity=namespace.capacity,
+        profile=namespace.profile,
+        profile_trace_path=namespace.profile_trace,
     )
     sys.exit(run(args))
 
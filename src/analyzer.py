@@ -0,0 +1,494 @@
+"""到達可能な状態空間の全探索と到達性統計"""
+from __future__ import annotations
+
+import json
+import struct
+import sys
+import tempfile
+import time
+from array import array
+from collections.abc import Iterator
+from typing import BinaryIO, NamedTuple
+
+import yaml
+
+from src.binary_format import decode_puzzle, encode_puzzle
+from src.models import OutputFormat, ParseError, PuzzleState, PuzzleTimeoutError, infer_capacity
+
+# 遷移（辺）の書き出し先をメモリからディスクに切り替える辺数の既定値（u32 で 16 MiB）
+DEFAULT_SPILL_EDGES = 4_000_000
+
+# 状態グラフファイル（.wsg）のレイアウト（数値はすべてリトルエンディアン）:
+#   ヘッダ: magic "WSPG" | version u8 | 予約 3 バイト | 状態数 u32 | 辺数 u64
+#           | 初期状態の長さ u32 | 初期状態（binary_format.encode_puzzle()）
+#   状態  : 状態数 × (ボトル数 × 容量) バイト（binary_format と同じボトル本体。色番号は
+#           初期状態での初出順 + 1、0 は空き）。状態番号 0 が初期状態
+#   距離  : 状態数 × i16（解決状態までの最短手数、到達不能は -1）
+#   辺    : 状態数 + 1 個の u64 オフセット（CSR 形式）| 辺数 × u32 の遷移先の状態番号
+GRAPH_MAGIC = b"WSPG"
+GRAPH_VERSION = 1
+
+_GRAPH_HEADER = struct.Struct("<4sB3xIQI")
+# 距離を i16 で書き出すための上限
+_MAX_DISTANCE = 2**15 - 1
+
+
+class StateSpaceStats(NamedTuple):
+    """analyze_state_space() の結果"""
+    states: int                       # 到達可能な状態数（初期状態を含む）
+    edges: int                        # 状態間の遷移（合法手）の数
+    solved_states: int                # 解決状態の数
+    dead_states: int                  # 解決状態に到達できない状態の数
+    stuck_states: int                 # 合法手がなく解決もしていない状態の数
+    initial_distance: int | None      # 初期状態の最短手数（解なしの場合は None）
+    max_distance: int | None          # 解決可能な状態の最短手数の最大値
+    distance_histogram: dict[int, int]  # 解決状態までの最短手数 → 状態数（到達不能は含まない）
+    depth_histogram: dict[int, int]   # 初期状態からの最短手数 → 状態数
+    elapsed_time: float               # seconds
+
+
+class StateGraph(NamedTuple):
+    """read_state_graph() で読み込んだ状態グラフ"""
+    initial_state: PuzzleState
+    capacity: int
+    states: list[PuzzleState]  # 状態番号順（0 が初期状態）
+    distances: array           # 状態番号 → 最短手数（到達不能は -1）
+    offsets: array             # 状態 i の遷移先は targets[offsets[i]:offsets[i + 1]]
+    targets: array
+
+    def successors(self, index: int) -> array:
+        return self.targets[self.offsets[index]:self.offsets[index + 1]]
+
+
+class StateCodec:
+    """
+    状態を固定長バイト列（ボトルごとに色番号 + 1、0 は空き）と相互変換する。
+    色番号は initial_state での初出順なので、同じ初期状態から作った符号は互いに比較できる。
+    """
+
+    def __init__(self, initial_state: PuzzleState, capacity: int) -> None:
+        palette: dict[str, int] = {}
+        for bottle in initial_state:
+            for color in bottle:
+                palette.setdefault(color, len(palette) + 1)
+        if len(palette) > 255:
+            raise ValueError(f"色数が多すぎます: {len(palette)} 色（最大 255 色）")
+        self.capacity = capacity
+        self._palette = palette
+        self._colors = ["", *palette]
+        self._padding = [bytes(capacity - n) for n in range(capacity + 1)]
+
+    def encode(self, state: PuzzleState) -> bytes:
+        palette = self._palette
+        padding = self._padding
+        return b"".join(
+            bytes(palette[color] for color in bottle) + padding[len(bottle)] for bottle in state
+        )
+
+    def encode_known(self, state: PuzzleState) -> bytes | None:
+        """encode() と同じだが、初期状態にない色や容量を超えるボトルがあれば None を返す。"""
+        palette = self._palette
+        if any(len(bottle) > self.capacity for bottle in state) or any(
+            color not in palette for bottle in state for color in bottle
+        ):
+            return None
+        return self.encode(state)
+
+    def canonical(self, data: bytes) -> bytes:
+        """ボトルの並び順によらない正規形（ボトルの符号を昇順に並べたもの）"""
+        capacity = self.capacity
+        return b"".join(sorted(data[i:i + capacity] for i in range(0, len(data), capacity)))
+
+    def decode(self, data: bytes) -> PuzzleState:
+        colors = self._colors
+        capacity = self.capacity
+        return tuple(
+            tuple(colors[code] for code in data[i:i + capacity] if code)
+            for i in range(0, len(data), capacity)
+        )
+
+    def expand(self, data: bytes) -> tuple[bool, list[bytes]]:
+        """
+        符号化した状態について (解決状態か, 各合法手を適用した状態の符号) を返す。
+        get_legal_moves() と同じ順に、apply_move() と同じ結果をタプルに戻さずに求める。
+        """
+        capacity = self.capacity
+        lengths: list[int] = []
+        tops: list[int] = []
+        runs: list[int] = []
+        solved = True
+        for start in range(0, len(data), capacity):
+            bottle = data[start:start + capacity]
+            length = bottle.find(0)
+            if length < 0:
+                length = capacity
+            top = bottle[length - 1] if length else 0
+            run = 0
+            while run < length and bottle[length - 1 - run] == top:
+                run += 1
+            if length and (length != capacity or run != capacity):
+                solved = False
+            lengths.append(length)
+            tops.append(top)
+            runs.append(run)
+
+        children: list[bytes] = []
+        n = len(lengths)
+        for frm in range(n):
+            length = lengths[frm]
+            if not length:
+                continue
+            top = tops[frm]
+            end = frm * capacity + length
+            for to in range(n):
+                to_length = lengths[to]
+                if to == frm or to_length >= capacity or (to_length and tops[to] != top):
+                    continue
+                moved = min(runs[frm], capacity - to_length)
+                child = bytearray(data)
+                child[end - moved:end] = bytes(moved)
+                start = to * capacity + to_length
+                child[start:start + moved] = bytes((top,)) * moved
+                children.append(bytes(child))
+        return solved, children
+
+
+class StateDistances(NamedTuple):
+    """compute_distances() の結果"""
+    codec: StateCodec
+    states: list[bytes]  # 状態番号順の符号（canonical=True の場合は正規形、0 が初期状態）
+    distances: array     # 状態番号 → 解決状態までの最短手数（到達不能は -1）
+
+
+class _EdgeSpool:
+    """
+    遷移先の状態番号（u32）を展開順に溜める。spill_edges 個を超えた分は一時ファイルに書き出し、
+    読み出し時はメモリ上の分と合わせて順に返す。
+    """
+
+    def __init__(self, spill_edges: int, spill_dir: str | None) -> None:
+        self._spill_edges = spill_edges
+        self._spill_dir = spill_dir
+        self._buffer = array("I")
+        self._file: BinaryIO | None = None
+        self.spilled = 0
+        self.count = 0
+
+    def extend(self, targets: list[int]) -> None:
+        self._buffer.extend(targets)
+        self.count += len(targets)
+        if len(self._buffer) >= self._spill_edges:
+            if self._file is None:
+                self._file = tempfile.TemporaryFile(dir=self._spill_dir)
+            self._buffer.tofile(self._file)
+            self.spilled += len(self._buffer)
+            self._buffer = array("I")
+
+    def chunks(self) -> Iterator[array]:
+        """書き込み順に辺のまとまりを返す。"""
+        if self._file is not None:
+            self._file.seek(0)
+            remaining = self.spilled
+            while remaining:
+                chunk = array("I")
+                chunk.fromfile(self._file, min(remaining, self._spill_edges))
+                remaining -= len(chunk)
+                yield chunk
+        yield self._buffer
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def analyze_state_space(
+    initial_state: PuzzleState,
+    bottle_capacity: int | None = None,
+    timeout: float = 0.0,
+    debug: bool = False,
+    graph_path: str | None = None,
+    spill_edges: int = DEFAULT_SPILL_EDGES,
+    spill_dir: str | None = None,
+) -> StateSpaceStats:
+    """
+    初期状態から到達可能なすべての状態を BFS で列挙し、解決状態からの逆向き BFS で
+    各状態の最短手数を求めて統計を返す。
+    状態は固定長バイト列で保持し、遷移は状態番号（u32）の配列として spill_edges 個を超えた分を
+    spill_dir の一時ファイルに書き出すため、1 状態あたり百数十バイト程度で探索できる。
+    graph_path を指定すると、状態・最短手数・遷移を状態グラフファイル（.wsg）に書き出す。
+    Raises: PuzzleTimeoutError（timeout > 0 かつ制限時間超過時）, ValueError, OSError
+    """
+    start_time = time.perf_counter()
+    capacity = bottle_capacity if bottle_capacity is not None else infer_capacity(initial_state)
+    codec = StateCodec(initial_state, capacity)
+    spool = _EdgeSpool(spill_edges, spill_dir)
+    try:
+        states, out_degrees, solved, depth_histogram = _explore(
+            initial_state, codec, spool, timeout, debug, start_time
+        )
+        distances = _distances_to_goal(out_degrees, solved, spool)
+        if graph_path is not None:
+            _write_graph(graph_path, initial_state, capacity, states, distances, out_degrees, spool)
+    finally:
+        spool.close()
+
+    distance_histogram: dict[int, int] = {}
+    for distance in distances:
+        if distance >= 0:
+            distance_histogram[distance] = distance_histogram.get(distance, 0) + 1
+    return StateSpaceStats(
+        states=len(states),
+        edges=spool.count,
+        solved_states=sum(solved),
+        dead_states=len(states) - sum(distance_histogram.values()),
+        stuck_states=sum(
+            1 for degree, goal in zip(out_degrees, solved) if degree == 0 and not goal
+        ),
+        initial_distance=distances[0] if distances[0] >= 0 else None,
+        max_distance=max(distance_histogram, default=None),
+        distance_histogram=dict(sorted(distance_histogram.items())),
+        depth_histogram=depth_histogram,
+        elapsed_time=time.perf_counter() - start_time,
+    )
+
+
+def compute_distances(
+    initial_state: PuzzleState,
+    bottle_capacity: int | None = None,
+    timeout: float = 0.0,
+    debug: bool = False,
+    canonical: bool = False,
+    max_states: int | None = None,
+    spill_edges: int = DEFAULT_SPILL_EDGES,
+    spill_dir: str | None = None,
+) -> StateDistances:
+    """
+    analyze_state_space() と同じ探索で、到達可能な各状態の符号と解決状態までの最短手数を返す。
+    canonical=True の場合はボトルの並び順だけが異なる状態を 1 つの正規形（StateCodec.canonical()）
+    にまとめて列挙するため、状態数がおよそボトルの並べ方の数だけ少なくなる（最短手数は変わらない）。
+    Raises: PuzzleTimeoutError（timeout > 0 かつ制限時間超過時）、
+            ValueError（状態数が max_states を超えた場合）、OSError
+    """
+    start_time = time.perf_counter()
+    capacity = bottle_capacity if bottle_capacity is not None else infer_capacity(initial_state)
+    codec = StateCodec(initial_state, capacity)
+    spool = _EdgeSpool(spill_edges, spill_dir)
+    try:
+        states, out_degrees, solved, _ = _explore(
+            initial_state, codec, spool, timeout, debug, start_time, canonical, max_states
+        )
+        distances = _distances_to_goal(out_degrees, solved, spool)
+    finally:
+        spool.close()
+    return StateDistances(codec, states, distances)
+
+
+def _explore(
+    initial_state: PuzzleState,
+    codec: StateCodec,
+    spool: _EdgeSpool,
+    timeout: float,
+    debug: bool,
+    start_time: float,
+    canonical: bool = False,
+    max_states: int | None = None,
+) -> tuple[list[bytes], array, bytearray, dict[int, int]]:
+    """
+    到達可能な状態を BFS で列挙し (状態番号順のバイト列, 出次数, 解決状態フラグ,
+    初期状態からの深さ → 状態数) を返す。状態番号は BFS の発見順なので、
+    番号順に展開すればそのまま BFS になり、遷移も遷移元の番号順に spool に並ぶ。
+    canonical=True の場合は状態を正規形にまとめる（同じ正規形への遷移は重複して数える）。
+    """
+    initial = codec.encode(initial_state)
+    if canonical:
+        initial = codec.canonical(initial)
+    index: dict[bytes, int] = {initial: 0}
+    states = [initial]
+    out_degrees = array("I")
+    solved = bytearray()
+    depth_histogram: dict[int, int] = {0: 1}
+    layer_end = 1  # 現在の深さの最後の状態番号 + 1
+    depth = 0
+
+    current_id = 0
+    while current_id < len(states):
+        if current_id == layer_end:
+            depth += 1
+            depth_histogram[depth] = len(states) - layer_end
+            layer_end = len(states)
+            if debug:
+                print(
+                    f"[DEBUG] ANALYZE: depth {depth}, {len(states)} states, {spool.count} edges, "
+                    f"{time.perf_counter() - start_time:.2f}s",
+                    file=sys.stderr,
+                )
+        if timeout > 0 and current_id % 1000 == 0:
+            elapsed = time.perf_counter() - start_time
+            if elapsed >= timeout:
+                raise PuzzleTimeoutError(
+                    f"状態空間の探索がタイムアウトしました（{elapsed:.1f}秒）"
+                    f"、列挙済み状態数: {len(states)}"
+                )
+
+        goal, children = codec.expand(states[current_id])
+        solved.append(goal)
+        if canonical:
+            children = [codec.canonical(child) for child in children]
+        targets: list[int] = []
+        for key in children:
+            target = index.get(key)
+            if target is None:
+                target = len(states)
+                index[key] = target
+                states.append(key)
+            targets.append(target)
+        if max_states is not None and len(states) > max_states:
+            raise ValueError(f"到達可能な状態数が上限 {max_states} を超えました")
+        out_degrees.append(len(targets))
+        spool.extend(targets)
+        current_id += 1
+    return states, out_degrees, solved, depth_histogram
+
+
+def _distances_to_goal(out_degrees: array, solved: bytearray, spool: _EdgeSpool) -> array:
+    """遷移を逆向きにした CSR 表を作り、解決状態からの BFS で各状態の最短手数を求める。"""
+    n = len(out_degrees)
+    # 逆向きの辺の CSR: 状態 t に入る辺の遷移元は sources[starts[t]:starts[t + 1]]
+    starts = array("Q", bytes(8 * (n + 1)))
+    for chunk in spool.chunks():
+        for target in chunk:
+            starts[target + 1] += 1
+    for i in range(n):
+        starts[i + 1] += starts[i]
+    fill = array("Q", starts)
+    sources = array("I", bytes(4 * spool.count))
+    for source, target in _iter_edges(out_degrees, spool):
+        sources[fill[target]] = source
+        fill[target] += 1
+    del fill
+
+    distances = array("i", [-1]) * n
+    frontier = [i for i in range(n) if solved[i]]
+    for state in frontier:
+        distances[state] = 0
+    distance = 0
+    while frontier:
+        distance += 1
+        next_frontier: list[int] = []
+        for state in frontier:
+            for source in sources[starts[state]:starts[state + 1]]:
+                if distances[source] < 0:
+                    distances[source] = distance
+                    next_frontier.append(source)
+        frontier = next_frontier
+    return distances
+
+
+def _iter_edges(out_degrees: array, spool: _EdgeSpool) -> Iterator[tuple[int, int]]:
+    """(遷移元, 遷移先) を遷移元の番号順に返す。"""
+    sources = (source for source, degree in enumerate(out_degrees) for _ in range(degree))
+    for chunk in spool.chunks():
+        for target in chunk:
+            yield next(sources), target
+
+
+def _write_graph(
+    path: str,
+    initial_state: PuzzleState,
+    capacity: int,
+    states: list[bytes],
+    distances: array,
+    out_degrees: array,
+    spool: _EdgeSpool,
+) -> None:
+    """状態グラフファイル（.wsg）を書き出す。"""
+    puzzle = encode_puzzle(initial_state, capacity)
+    with open(path, "wb") as f:
+        f.write(_GRAPH_HEADER.pack(GRAPH_MAGIC, GRAPH_VERSION, len(states), spool.count, len(puzzle)))
+        f.write(puzzle)
+        for state in states:
+            f.write(state)
+        array("h", (min(d, _MAX_DISTANCE) for d in distances)).tofile(f)
+        offsets = array("Q", [0])
+        for degree in out_degrees:
+            offsets.append(offsets[-1] + degree)
+        offsets.tofile(f)
+        for chunk in spool.chunks():
+            chunk.tofile(f)
+
+
+def read_state_graph(path: str) -> StateGraph:
+    """
+    analyze_state_space(graph_path=...) で書き出した状態グラフファイルを読み込む。
+    Raises: FileNotFoundError, ParseError（形式・バージョンが不正な場合）
+    """
+    with open(path, "rb") as f:
+        header = f.read(_GRAPH_HEADER.size)
+        if len(header) != _GRAPH_HEADER.size:
+            raise ParseError(f"状態グラフファイルのヘッダが不完全です: {path}")
+        magic, version, n_states, n_edges, puzzle_size = _GRAPH_HEADER.unpack(header)
+        if magic != GRAPH_MAGIC:
+            raise ParseError(f"状態グラフファイルではありません: {path}")
+        if version != GRAPH_VERSION:
+            raise ParseError(f"未対応の状態グラフバージョンです: {version}: {path}")
+        initial_state, capacity = decode_puzzle(f.read(puzzle_size))
+        codec = StateCodec(initial_state, capacity)
+        width = len(initial_state) * capacity
+        try:
+            body = f.read(n_states * width)
+            if len(body) != n_states * width:
+                raise EOFError
+            states = [codec.decode(body[i:i + width]) for i in range(0, len(body), width)]
+            distances = array("h")
+            distances.fromfile(f, n_states)
+            offsets = array("Q")
+            offsets.fromfile(f, n_states + 1)
+            targets = array("I")
+            targets.fromfile(f, n_edges)
+        except EOFError:
+            raise ParseError(f"状態グラフファイルが途中で切れています: {path}") from None
+    return StateGraph(initial_state, capacity, states, distances, offsets, targets)
+
+
+def stats_to_dict(stats: StateSpaceStats) -> dict:
+    """StateSpaceStats を JSON / YAML 出力用の dict に変換する。"""
+    return stats._asdict()
+
+
+def format_analysis(stats: StateSpaceStats, fmt: OutputFormat = "text") -> str:
+    """
+    統計を text / json / yaml の文字列にする。
+    Raises: ValueError（fmt が text|json|yaml 以外の場合）
+    """
+    match fmt:
+        case "text":
+            return _format_analysis_text(stats)
+        case "json":
+            return json.dumps(stats_to_dict(stats), ensure_ascii=False, indent=2)
+        case "yaml":
+            return yaml.dump(
+                stats_to_dict(stats), allow_unicode=True, default_flow_style=False, sort_keys=False
+            )
+        case _:
+            raise ValueError(f"未対応の出力フォーマット: {fmt!r}。text / json / yaml のいずれかを指定してください。")
+
+
+def _format_analysis_text(stats: StateSpaceStats) -> str:
+    initial = (
+        f"{stats.initial_distance} 手" if stats.initial_distance is not None else "解決不可能"
+    )
+    lines = [
+        f"到達可能な状態数: {stats.states}",
+        f"遷移数: {stats.edges}",
+        f"解決状態: {stats.solved_states}",
+        f"解決状態に到達できない状態: {stats.dead_states}",
+        f"合法手のない未解決状態: {stats.stuck_states}",
+        f"初期状態の最短手数: {initial}",
+        "解決状態までの最短手数の分布:",
+        *(f"  {d} 手: {count}" for d, count in stats.distance_histogram.items()),
+        "初期状態からの手数の分布:",
+        *(f"  {d} 手: {count}" for d, count in stats.depth_histogram.items()),
+        f"所要時間: {stats.elapsed_time:.2f}秒",
+    ]
+    return "\n".join(lines)
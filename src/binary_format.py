@@ -0,0 +1,282 @@
+"""パズル・解法のコンパクトなバイナリ形式と mmap 対応のマルチレコードコンテナ"""
+from __future__ import annotations
+
+import mmap
+import struct
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from types import TracebackType
+from typing import BinaryIO, NamedTuple
+
+from src.models import Move, ParseError, PuzzleState
+
+# コンテナ全体のレイアウト（数値はすべてリトルエンディアン）:
+#   ヘッダ  : magic "WSPB" | version u8 | 予約 3 バイト | レコード数 u32
+#   レコード: flags u8 | パズル | （flags & _FLAG_HAS_MOVES の場合）手順
+#   索引    : 各レコード先頭のオフセット u64 × レコード数
+#   フッタ  : 索引先頭のオフセット u64
+#
+# パズル: ボトル数 u8 | 容量 u8 | パレット色数 u8 | パレット（長さ u8 + UTF-8）
+#         | ボトル本体（ボトル数 × 容量 バイト、下から順にパレット番号 + 1、0 は空き）
+# 手順  : 手数 u32 | 各手（ボトル数 16 以下は from/to を 4bit ずつ 1 バイト、超過時は 2 バイト）
+MAGIC = b"WSPB"
+VERSION = 1
+
+_HEADER = struct.Struct("<4sB3xI")
+_OFFSET = struct.Struct("<Q")
+_COUNT = struct.Struct("<I")
+_FLAG_HAS_MOVES = 0x01
+_NIBBLE_MAX_BOTTLES = 16
+_MAX_BYTE = 255
+
+
+class BinaryRecord(NamedTuple):
+    state: PuzzleState
+    capacity: int
+    moves: list[Move] | None  # 解法を含まないレコードは None
+
+
+def encode_puzzle(state: PuzzleState, capacity: int) -> bytes:
+    """
+    PuzzleState をパレット表 + 固定長ボトルバイト列にエンコードする。
+    Raises: ValueError（ボトル数・容量・色数・色名長が 1 バイトに収まらない場合）
+    """
+    if len(state) > _MAX_BYTE or capacity > _MAX_BYTE:
+        raise ValueError(f"ボトル数または容量が大きすぎます: {len(state)} 本 / 容量 {capacity}")
+
+    palette: dict[str, int] = {}
+    for bottle in state:
+        if len(bottle) > capacity:
+            raise ValueError(f"ボトルのセグメント数が容量 {capacity} を超えています: {bottle}")
+        for color in bottle:
+            palette.setdefault(color, len(palette) + 1)
+    if len(palette) >= _MAX_BYTE:
+        raise ValueError(f"色数が多すぎます: {len(palette)} 色（最大 {_MAX_BYTE - 1} 色）")
+
+    out = bytearray((len(state), capacity, len(palette)))
+    for color in palette:
+        name = color.encode("utf-8")
+        if len(name) > _MAX_BYTE:
+            raise ValueError(f"色名が長すぎます（最大 {_MAX_BYTE} バイト）: {color!r}")
+        out.append(len(name))
+        out += name
+    for bottle in state:
+        out += bytes(palette[color] for color in bottle)
+        out += bytes(capacity - len(bottle))
+    return bytes(out)
+
+
+def decode_puzzle(data: bytes) -> tuple[PuzzleState, int]:
+    """encode_puzzle() の逆変換。Raises: ParseError"""
+    state, capacity, _ = _decode_puzzle_at(memoryview(data), 0)
+    return state, capacity
+
+
+def encode_moves(moves: Iterable[Move], n_bottles: int) -> bytes:
+    """Move 列を手数 + from/to のパック表現にエンコードする。"""
+    moves = list(moves)
+    out = bytearray(_COUNT.pack(len(moves)))
+    if n_bottles <= _NIBBLE_MAX_BOTTLES:
+        out += bytes((m.from_bottle << 4) | m.to_bottle for m in moves)
+    else:
+        for m in moves:
+            out.append(m.from_bottle)
+            out.append(m.to_bottle)
+    return bytes(out)
+
+
+def decode_moves(data: bytes, n_bottles: int) -> list[Move]:
+    """encode_moves() の逆変換。Raises: ParseError"""
+    moves, _ = _decode_moves_at(memoryview(data), 0, n_bottles)
+    return moves
+
+
+def encode_record(state: PuzzleState, capacity: int, moves: Iterable[Move] | None = None) -> bytes:
+    """コンテナ内の 1 レコード（パズル + 任意で手順）をエンコードする。"""
+    flags = 0 if moves is None else _FLAG_HAS_MOVES
+    out = bytes((flags,)) + encode_puzzle(state, capacity)
+    if moves is not None:
+        out += encode_moves(moves, len(state))
+    return out
+
+
+def decode_record(data: bytes | memoryview) -> BinaryRecord:
+    """encode_record() の逆変換。Raises: ParseError"""
+    view = memoryview(data)
+    if len(view) == 0:
+        raise ParseError("空のレコードです")
+    flags = view[0]
+    state, capacity, offset = _decode_puzzle_at(view, 1)
+    moves = None
+    if flags & _FLAG_HAS_MOVES:
+        moves, offset = _decode_moves_at(view, offset, len(state))
+    return BinaryRecord(state=state, capacity=capacity, moves=moves)
+
+
+def write_records(path: str, records: Iterable[BinaryRecord | tuple[PuzzleState, int]]) -> int:
+    """レコード列をコンテナファイルに書き出し、書き込んだ件数を返す。"""
+    with BinaryRecordWriter(path) as writer:
+        for record in records:
+            if isinstance(record, BinaryRecord):
+                writer.append(record.state, record.capacity, record.moves)
+            else:
+                state, capacity = record
+                writer.append(state, capacity)
+        return len(writer)
+
+
+def build_container(records: Iterable[bytes]) -> bytes:
+    """エンコード済みレコード列からコンテナ全体のバイト列を構築する（単発出力用）。"""
+    body = bytearray()
+    offsets: list[int] = []
+    for record in records:
+        offsets.append(_HEADER.size + len(body))
+        body += record
+    index_offset = _HEADER.size + len(body)
+    return (
+        _HEADER.pack(MAGIC, VERSION, len(offsets))
+        + bytes(body)
+        + b"".join(_OFFSET.pack(o) for o in offsets)
+        + _OFFSET.pack(index_offset)
+    )
+
+
+class BinaryRecordWriter:
+    """
+    コンテナファイルへレコードを逐次追記するライタ。
+    レコード本体は append() のたびに書き込み、close() 時に索引とレコード数を確定する。
+    """
+
+    def __init__(self, path: str) -> None:
+        self._file: BinaryIO = open(path, "wb")
+        self._offsets: list[int] = []
+        self._file.write(_HEADER.pack(MAGIC, VERSION, 0))
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def append(self, state: PuzzleState, capacity: int, moves: Iterable[Move] | None = None) -> None:
+        self._offsets.append(self._file.tell())
+        self._file.write(encode_record(state, capacity, moves))
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        index_offset = self._file.tell()
+        for offset in self._offsets:
+            self._file.write(_OFFSET.pack(offset))
+        self._file.write(_OFFSET.pack(index_offset))
+        self._file.seek(0)
+        self._file.write(_HEADER.pack(MAGIC, VERSION, len(self._offsets)))
+        self._file.close()
+
+    def __enter__(self) -> BinaryRecordWriter:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+
+class BinaryRecordReader:
+    """
+    コンテナファイルを mmap してレコードをランダムアクセスするリーダ。
+    テキスト解析を行わず、reader[i] で i 番目のレコードだけをデコードする。
+    Raises: ParseError（ヘッダ・索引が不正な場合）
+    """
+
+    def __init__(self, path: str) -> None:
+        size = Path(path).stat().st_size
+        if size < _HEADER.size + _OFFSET.size:
+            raise ParseError(f"バイナリファイルが短すぎます: {path}")
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        magic, version, count = _HEADER.unpack_from(self._view, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ParseError(f"バイナリ形式のマジックナンバーが一致しません: {path}")
+        if version != VERSION:
+            self.close()
+            raise ParseError(f"未対応のバイナリ形式バージョンです: {version}: {path}")
+        (self._index_offset,) = _OFFSET.unpack_from(self._view, size - _OFFSET.size)
+        if self._index_offset + count * _OFFSET.size != size - _OFFSET.size:
+            self.close()
+            raise ParseError(f"バイナリ形式の索引が壊れています: {path}")
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> BinaryRecord:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(f"レコード番号が範囲外です: {index}")
+        start = self._record_offset(index)
+        end = self._record_offset(index + 1) if index + 1 < self._count else self._index_offset
+        return decode_record(self._view[start:end])
+
+    def __iter__(self) -> Iterator[BinaryRecord]:
+        for index in range(self._count):
+            yield self[index]
+
+    def _record_offset(self, index: int) -> int:
+        (offset,) = _OFFSET.unpack_from(self._view, self._index_offset + index * _OFFSET.size)
+        return offset
+
+    def close(self) -> None:
+        self._view.release()
+        self._mmap.close()
+
+    def __enter__(self) -> BinaryRecordReader:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+
+def _decode_puzzle_at(view: memoryview, offset: int) -> tuple[PuzzleState, int, int]:
+    try:
+        n_bottles, capacity, n_colors = view[offset], view[offset + 1], view[offset + 2]
+        offset += 3
+        palette: list[str] = []
+        for _ in range(n_colors):
+            length = view[offset]
+            palette.append(bytes(view[offset + 1:offset + 1 + length]).decode("utf-8"))
+            offset += 1 + length
+        body = view[offset:offset + n_bottles * capacity]
+        if len(body) != n_bottles * capacity:
+            raise ParseError("ボトル本体のデータが不足しています")
+        state = tuple(
+            tuple(palette[code - 1] for code in body[i * capacity:(i + 1) * capacity] if code)
+            for i in range(n_bottles)
+        )
+    except (IndexError, UnicodeDecodeError) as e:
+        raise ParseError(f"パズルのバイナリデータが不正です: {e}") from e
+    return state, capacity, offset + n_bottles * capacity
+
+
+def _decode_moves_at(view: memoryview, offset: int, n_bottles: int) -> tuple[list[Move], int]:
+    if len(view) < offset + _COUNT.size:
+        raise ParseError("手順のデータが不足しています")
+    (count,) = _COUNT.unpack_from(view, offset)
+    offset += _COUNT.size
+    width = 1 if n_bottles <= _NIBBLE_MAX_BOTTLES else 2
+    packed = view[offset:offset + count * width]
+    if len(packed) != count * width:
+        raise ParseError("手順のデータが不足しています")
+    if width == 1:
+        moves = [Move(b >> 4, b & 0x0F) for b in packed]
+    else:
+        moves = [Move(packed[i], packed[i + 1]) for i in range(0, len(packed), 2)]
+    return moves, offset + count * width
@@ -0,0 +1,106 @@
+"""ボトルの並び順（と色名）に依存しない正規形"""
+from __future__ import annotations
+
+import math
+from itertools import permutations, product
+from typing import NamedTuple
+
+from src.models import BottleState, Move, PuzzleState
+
+# 色名の割り当てを総当たりする組み合わせ数の上限（超えた分は入力の出現順で決める）
+_MAX_COLOR_ASSIGNMENTS = 720
+
+
+class ColorCanonicalForm(NamedTuple):
+    state: PuzzleState          # 色名を color0, color1, ... に置き換えてボトルを並べ替えた正規形
+    order: tuple[int, ...]      # state[i] は元の状態のボトル order[i] に対応する
+    colors: dict[str, str]      # 正規形の色名 → 元の色名
+
+
+def canonicalize(state: PuzzleState) -> tuple[PuzzleState, tuple[int, ...]]:
+    """
+    ボトルを辞書順に並べ替えた正規形と、並べ替えの対応を返す。
+    戻り値 (canonical, order) は canonical[i] == state[order[i]] を満たす。
+    ボトルの並び順だけが異なる状態は同じ正規形になり、解法も手の番号の付け替えで共有できる。
+    """
+    order = tuple(sorted(range(len(state)), key=state.__getitem__))
+    return tuple(state[i] for i in order), order
+
+
+def canonical_key(state: PuzzleState) -> PuzzleState:
+    """canonicalize() の正規形のみを返す（対応が不要な場合の高速版）。"""
+    return tuple(sorted(state))
+
+
+def to_canonical_move(move: Move, order: tuple[int, ...]) -> Move:
+    """元の状態での手を正規形での手に変換する。"""
+    return Move(order.index(move.from_bottle), order.index(move.to_bottle))
+
+
+def from_canonical_move(move: Move, order: tuple[int, ...]) -> Move:
+    """正規形での手を元の状態での手に変換する。"""
+    return Move(order[move.from_bottle], order[move.to_bottle])
+
+
+def canonicalize_colors(state: PuzzleState) -> ColorCanonicalForm:
+    """
+    ボトルの並び順に加えて色名も無視した正規形を返す。色名だけが異なるパズル（赤 ↔ 青）は
+    同じ正規形になり、手は色に依存しないので解法も from_canonical_move() でそのまま共有できる。
+    各色をボトル内の位置など色名によらない特徴で順位付けし、特徴が同じ色どうしの割り当ては
+    総当たりして canonicalize() の結果が最小になるものを選ぶ。最後に正規形の出現順
+    （先頭のボトルの底から）に color0, color1, ... と名付ける。
+    特徴が同じ色が多すぎる場合（_MAX_COLOR_ASSIGNMENTS 超）だけは入力の出現順で割り当てるため、
+    同じパズルでも異なる正規形になることがある（正規形が一致すれば同じパズルであることは常に成り立つ）。
+    """
+    signatures: dict[str, list[tuple[int, tuple[int, ...], int]]] = {}
+    for bottle in state:
+        pattern = _color_pattern(bottle)
+        for position, color in enumerate(bottle):
+            signatures.setdefault(color, []).append((len(bottle), pattern, position))
+    # 特徴の順に色をまとめる（同じ組の中は入力での出現順）
+    classes: dict[tuple, list[str]] = {}
+    for color in signatures:
+        classes.setdefault(tuple(sorted(signatures[color])), []).append(color)
+    groups = [classes[signature] for signature in sorted(classes)]
+
+    if math.prod(math.factorial(len(group)) for group in groups) <= _MAX_COLOR_ASSIGNMENTS:
+        candidates = product(*(permutations(group) for group in groups))
+    else:
+        candidates = iter([tuple(tuple(group) for group in groups)])
+    best: tuple[PuzzleState, tuple[int, ...], dict[str, str]] | None = None
+    for assignment in candidates:
+        labels = {
+            color: index
+            for index, color in enumerate(color for group in assignment for color in group)
+        }
+        key, order = canonicalize(tuple(tuple(labels[c] for c in bottle) for bottle in state))
+        if best is None or key < best[0]:
+            best = (key, order, labels)
+    assert best is not None
+    key, order, labels = best
+
+    # 正規形での出現順に名前を付け直す（ボトルの並びは変えない）
+    names: dict[int, str] = {}
+    for bottle in key:
+        for label in bottle:
+            if label not in names:
+                names[label] = f"color{len(names)}"
+    canonical = tuple(tuple(names[label] for label in bottle) for bottle in key)
+    colors = {names[label]: color for color, label in labels.items()}
+    return ColorCanonicalForm(canonical, order, colors)
+
+
+def color_canonical_key(state: PuzzleState) -> PuzzleState:
+    """canonicalize_colors() の正規形のみを返す。"""
+    return canonicalize_colors(state).state
+
+
+def from_canonical_colors(state: PuzzleState, colors: dict[str, str]) -> PuzzleState:
+    """正規形の色名で書かれた状態を元の色名に戻す（ボトルの並びは変えない）。"""
+    return tuple(tuple(colors[color] for color in bottle) for bottle in state)
+
+
+def _color_pattern(bottle: BottleState) -> tuple[int, ...]:
+    """ボトル内の色を底からの出現順の番号に置き換えた並び（色名によらない形）"""
+    seen: dict[str, int] = {}
+    return tuple(seen.setdefault(color, len(seen)) for color in bottle)
@@ -0,0 +1,131 @@
+"""長時間の探索の途中経過（訪問済み状態・フロンティア・カウンタ）の保存と再開"""
+from __future__ import annotations
+
+import io
+import os
+import pickle
+import time
+import zlib
+from typing import NamedTuple
+
+from src.interning import InternedState
+from src.models import BottleState, Move, PuzzleState
+
+CHECKPOINT_FORMAT_VERSION = 1
+
+# チェックポイントを書き出す既定の間隔（秒）
+DEFAULT_CHECKPOINT_INTERVAL = 60.0
+
+# 次の書き出しまでの間隔を、直前の書き出しにかかった時間の何倍以上空けるか
+# （書き出しが探索時間に占める割合を 1/20 以下に抑える）
+_COST_RATIO = 19
+
+_MAGIC = b"WSCK"
+
+
+class CheckpointError(OSError):
+    """チェックポイントファイルの読み書きエラー（探索中のそれ以外の入出力エラーと区別する）"""
+
+
+class Checkpoint(NamedTuple):
+    """探索を再開するのに必要な途中経過（状態は bottles の添字をボトル ID とする InternedState）"""
+    strategy: str                               # "bfs" / "dfs" / "greedy"
+    capacity: int
+    prune: bool
+    initial_state: PuzzleState
+    bottles: tuple[BottleState, ...]            # ボトル ID の順のボトル内容（BottleTable）
+    parent: dict[InternedState, int | None]     # 訪問済み状態 → 手コード（_MoveCodec）
+    frontier: list[InternedState]               # 未展開の状態（BFS は現在の深さ、DFS はスタック）
+    next_frontier: list[InternedState]          # BFS で生成済みの次の深さの状態（DFS は空）
+    depth: int                                  # BFS の現在の深さ
+    best: list[Move] | None                     # BFS で見つけた終盤経由の解法の候補
+    iterations: int
+    moves_pruned: int
+    elapsed: float                              # 保存時点までの累計の探索時間（秒）
+
+    def matches(self, strategy: str, capacity: int, prune: bool, state: PuzzleState) -> bool:
+        """同じパズル・同じ設定の探索のチェックポイントなら True を返す。"""
+        return (self.strategy, self.capacity, self.prune, self.initial_state) == (
+            strategy, capacity, prune, state
+        )
+
+
+class Checkpointer:
+    """
+    チェックポイントを path に定期的に書き出す。due() が True になったら save() を呼ぶ。
+    書き出しは一時ファイルに書いてから置き換えるため、途中で中断しても直前のファイルは壊れない。
+    次の書き出しは interval 秒後か、直前の書き出しにかかった時間の _COST_RATIO 倍後の遅い方に
+    なるので、訪問済み状態が増えて書き出しが重くなっても探索はほとんど止まらない。
+    ファイルは pickle を zlib で圧縮した形式で、組み込み型以外は読み込まない。
+    """
+
+    def __init__(self, path: str, interval: float = DEFAULT_CHECKPOINT_INTERVAL) -> None:
+        if interval < 0:
+            raise ValueError(f"チェックポイントの間隔は 0 以上である必要があります: {interval}")
+        self.path = path
+        self.interval = interval
+        self.saves = 0
+        self.last_cost = 0.0  # 直前の書き出しにかかった秒数
+        self._next = time.perf_counter() + interval
+
+    def due(self) -> bool:
+        return time.perf_counter() >= self._next
+
+    def save(self, checkpoint: Checkpoint) -> None:
+        """
+        checkpoint を書き出し、次の書き出し時刻を決める。
+        Raises: CheckpointError（ファイル書き込み失敗時）
+        """
+        started = time.perf_counter()
+        data = checkpoint._replace(
+            best=None if checkpoint.best is None else [tuple(move) for move in checkpoint.best]
+        )
+        payload = zlib.compress(
+            pickle.dumps((CHECKPOINT_FORMAT_VERSION, tuple(data)), pickle.HIGHEST_PROTOCOL), 1
+        )
+        temp_path = f"{self.path}.tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(_MAGIC)
+                f.write(payload)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            raise CheckpointError(e.errno, e.strerror, e.filename) from e
+        finished = time.perf_counter()
+        self.saves += 1
+        self.last_cost = finished - started
+        self._next = finished + max(self.interval, self.last_cost * _COST_RATIO)
+
+    def load(self) -> Checkpoint | None:
+        """
+        path のチェックポイントを読み込む（ファイルがなければ None）。
+        Raises: ValueError（形式・バージョンが不正な場合）、CheckpointError（読み込み失敗時）
+        """
+        try:
+            with open(self.path, "rb") as f:
+                raw = f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            raise CheckpointError(e.errno, e.strerror, e.filename) from e
+        if raw[:len(_MAGIC)] != _MAGIC:
+            raise ValueError(f"チェックポイントファイルではありません: {self.path}")
+        try:
+            version, fields = _BuiltinUnpickler(
+                io.BytesIO(zlib.decompress(raw[len(_MAGIC):]))
+            ).load()
+            if version != CHECKPOINT_FORMAT_VERSION:
+                raise ValueError(f"未対応のチェックポイントバージョンです: {version}: {self.path}")
+            checkpoint = Checkpoint(*fields)
+        except (zlib.error, pickle.UnpicklingError, EOFError, TypeError) as e:
+            raise ValueError(f"チェックポイントファイルの形式が不正です: {e}: {self.path}") from e
+        if checkpoint.best is not None:
+            checkpoint = checkpoint._replace(best=[Move(*move) for move in checkpoint.best])
+        return checkpoint
+
+
+class _BuiltinUnpickler(pickle.Unpickler):
+    """組み込み型（タプル・リスト・辞書・数値・文字列）だけを復元する"""
+
+    def find_class(self, module: str, name: str) -> object:
+        raise pickle.UnpicklingError(f"許可されていない型です: {module}.{name}")
@@ -0,0 +1,428 @@
+"""複数のワーカープロセス（別マシン可）に状態を分割して行う分散幅優先探索"""
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+import socket
+import struct
+import sys
+import time
+import zlib
+from collections.abc import Callable, Iterator
+
+from src.models import Move, PuzzleState, PuzzleTimeoutError, SolverResult, infer_capacity
+from src.solver import get_legal_moves
+from src.validator import is_solved
+
+# 既定で起動するローカルワーカー数
+DEFAULT_WORKERS = max(2, min(os.cpu_count() or 1, 8))
+
+# メッセージ種別（コーディネーター → ワーカー）
+_INIT = 1      # 設定（JSON）
+_ACCEPT = 2    # 担当する子状態のバッチ
+_EXPAND = 3    # フロンティアを展開して子状態を担当ワーカーごとに返す
+_PARENT = 4    # 状態の直前の手コードを返す
+_STOP = 5
+# メッセージ種別（ワーカー → コーディネーター）
+_ACCEPTED = 11  # 新しく訪問した状態数
+_OUTBOX = 12    # 見つけた解決状態と、宛先ワーカーごとの子状態のバッチ
+_PARENT_CODE = 13
+
+_HEADER = struct.Struct("!BI")  # (種別, ペイロード長)
+_LENGTH = struct.Struct("!I")   # バッチの長さ
+_CODE = struct.Struct("!H")     # 手コード
+_COUNT = struct.Struct("!Q")
+
+# 初期状態の手コード
+_ROOT = 0xFFFF
+
+
+class _WireCodec:
+    """
+    状態をワイヤ上・訪問済み表の固定長のバイト列（ボトルごとに容量分、色は 1〜255、空きは 0）と
+    相互変換する。直前の手は (注ぎ元, 注ぎ先, 移動したセグメント数) を 2 バイトの手コードにし、
+    経路の復元は注ぎを巻き戻して直前の状態を求める。
+    """
+
+    def __init__(self, n_bottles: int, capacity: int) -> None:
+        self.n_bottles = n_bottles
+        self.capacity = capacity
+        self.state_size = n_bottles * capacity
+        self.record_size = self.state_size + _CODE.size
+        self._span = capacity + 1
+        if n_bottles * n_bottles * self._span >= _ROOT:
+            raise ValueError(f"ボトル数が多すぎて手コードに収まりません: {n_bottles}")
+
+    def encode(self, state: tuple[tuple[int, ...], ...]) -> bytes:
+        capacity = self.capacity
+        return b"".join(bytes(bottle).ljust(capacity, b"\0") for bottle in state)
+
+    def decode(self, data: bytes) -> tuple[tuple[int, ...], ...]:
+        capacity = self.capacity
+        return tuple(
+            tuple(data[start:start + capacity].rstrip(b"\0"))
+            for start in range(0, self.state_size, capacity)
+        )
+
+    def is_solved(self, data: bytes) -> bool:
+        """validator.is_solved() と同じ判定（各ボトルが空、または満杯かつ単色）をバイト列のまま行う。"""
+        capacity = self.capacity
+        for start in range(0, self.state_size, capacity):
+            if data.count(data[start], start, start + capacity) != capacity:
+                return False
+        return True
+
+    def pour(
+        self, data: bytes, state: tuple[tuple[int, ...], ...], move: Move
+    ) -> tuple[bytes, int]:
+        """
+        data（state をエンコードしたもの）に合法手 move を適用したバイト列と、移動したセグメント数を
+        返す。状態全体をエンコードし直さず、注ぎ元の上端と注ぎ先の空きだけを書き換える。
+        """
+        src = state[move.from_bottle]
+        dst = state[move.to_bottle]
+        color = src[-1]
+        run = 1
+        while run < len(src) and src[-run - 1] == color:
+            run += 1
+        moved = min(run, self.capacity - len(dst))
+        child = bytearray(data)
+        top = move.from_bottle * self.capacity + len(src)
+        child[top - moved:top] = bytes(moved)
+        bottom = move.to_bottle * self.capacity + len(dst)
+        child[bottom:bottom + moved] = bytes((color,)) * moved
+        return bytes(child), moved
+
+    def move_code(self, move: Move, moved: int) -> int:
+        return (move.from_bottle * self.n_bottles + move.to_bottle) * self._span + moved
+
+    def undo(self, data: bytes, code: int) -> tuple[bytes, Move]:
+        """手コード code の手で data に至る直前の状態と、その手を返す。"""
+        pair, moved = divmod(code, self._span)
+        move = Move(*divmod(pair, self.n_bottles))
+        bottles = list(self.decode(data))
+        dst = bottles[move.to_bottle]
+        bottles[move.from_bottle] += dst[len(dst) - moved:]
+        bottles[move.to_bottle] = dst[:len(dst) - moved]
+        return self.encode(tuple(bottles)), move
+
+    def records(self, chunk: bytes) -> Iterator[tuple[bytes, int]]:
+        """圧縮したバッチから (状態, 手コード) を順に取り出す。"""
+        data = zlib.decompress(chunk)
+        size = self.state_size
+        for start in range(0, len(data), self.record_size):
+            yield data[start:start + size], _CODE.unpack_from(data, start + size)[0]
+
+
+def owner_of(data: bytes, workers: int) -> int:
+    """状態を担当するワーカーの番号（バイト列の CRC32 で分割する）"""
+    return zlib.crc32(data) % workers
+
+
+def solve_distributed(
+    initial_state: PuzzleState,
+    workers: int = DEFAULT_WORKERS,
+    timeout: float = 30.0,
+    debug: bool = False,
+    bottle_capacity: int | None = None,
+    listen: tuple[str, int] = ("127.0.0.1", 0),
+    remote_workers: int = 0,
+) -> SolverResult:
+    """
+    訪問済み状態をワーカーに分割して持つ幅優先探索（最短手数保証）で解法を探索する。
+    コーディネーター（この関数）は listen で TCP 接続を待ち受け、workers 個のローカルワーカー
+    プロセスを起動し、さらに remote_workers 個のワーカーの接続を待つ。
+    各状態は担当ワーカー（owner_of()）だけが訪問済み表に記録する。深さごとに
+    1. 各ワーカーが自分のフロンティアを展開し、子状態を担当ワーカーごとのバッチにまとめて返す
+       （解決状態を生成したワーカーはそこで展開をやめてその子を返す）
+    2. コーディネーターはバッチを展開せずに担当ワーカーへ転送し、各ワーカーが重複を除いて
+       次のフロンティアにする
+    を繰り返す。状態は固定長のバイト列、バッチは zlib で圧縮して送る。
+    解決状態が見つかったら、注ぎを巻き戻して直前の状態を求め、その担当ワーカーに手コードを
+    問い合わせる処理を初期状態まで繰り返して手順を復元する。
+    run_worker() を listen に接続させれば別マシンのワーカーも参加できる（通信は認証しないため、
+    信頼できるネットワーク内でのみ使うこと）。
+    Raises: PuzzleTimeoutError（timeout > 0 かつ制限時間超過時）、
+            ValueError（ワーカー数・色数・ボトル数が扱えない場合）、
+            RuntimeError（ワーカーとの接続が切れた場合）
+    """
+    if workers < 0 or remote_workers < 0 or workers + remote_workers < 1:
+        raise ValueError(f"ワーカー数が不正です: {workers} + {remote_workers}")
+    start_time = time.perf_counter()
+    capacity = bottle_capacity if bottle_capacity is not None else infer_capacity(initial_state)
+    if is_solved(initial_state, capacity):
+        return SolverResult(
+            solved=True, moves=[], states_visited=0, elapsed_time=time.perf_counter() - start_time
+        )
+    palette = {color: i for i, color in enumerate(sorted({c for b in initial_state for c in b}), 1)}
+    if len(palette) > 0xFF:
+        raise ValueError(f"色数が多すぎます: {len(palette)}")
+    codec = _WireCodec(len(initial_state), capacity)
+    start = codec.encode(tuple(tuple(palette[c] for c in bottle) for bottle in initial_state))
+
+    visited = 0
+
+    def remaining() -> float | None:
+        """ソケット操作の待ち時間の上限（制限時間を超えていれば PuzzleTimeoutError）"""
+        if timeout <= 0:
+            return None
+        elapsed = time.perf_counter() - start_time
+        if elapsed >= timeout:
+            raise PuzzleTimeoutError(
+                f"探索がタイムアウトしました（{elapsed:.1f}秒）、訪問済み状態数: {visited}"
+            )
+        return timeout - elapsed
+
+    ctx = multiprocessing.get_context()
+    processes: list[multiprocessing.process.BaseProcess] = []
+    connections: list[socket.socket] = []
+    with socket.create_server(listen) as server:
+        host, port = server.getsockname()[:2]
+        try:
+            for _ in range(workers):
+                process = ctx.Process(target=run_worker, args=(host, port), daemon=True)
+                process.start()
+                processes.append(process)
+            if debug:
+                print(
+                    f"[DEBUG] DISTRIBUTED: listening on {host}:{port}, "
+                    f"waiting for {workers + remote_workers} workers",
+                    file=sys.stderr,
+                )
+            while len(connections) < workers + remote_workers:
+                server.settimeout(remaining())
+                try:
+                    connection, _ = server.accept()
+                except socket.timeout:
+                    remaining()
+                    continue
+                connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                connections.append(connection)
+            n = len(connections)
+            for index, connection in enumerate(connections):
+                config = {"index": index, "workers": n, "bottles": len(initial_state),
+                          "capacity": capacity}
+                _send(connection, _INIT, json.dumps(config).encode())
+
+            # 初期状態を担当ワーカーに渡す
+            inboxes: list[list[bytes]] = [[] for _ in range(n)]
+            inboxes[owner_of(start, n)].append(
+                zlib.compress(start + _CODE.pack(_ROOT), 1)
+            )
+            depth = 0
+            while True:
+                new_states = 0
+                for connection, inbox in zip(connections, inboxes):
+                    connection.settimeout(remaining())
+                    _send(connection, _ACCEPT, _join_chunks(inbox))
+                for connection in connections:
+                    connection.settimeout(remaining())
+                    new_states += _COUNT.unpack(_expect(connection, _ACCEPTED))[0]
+                visited += new_states
+                if debug:
+                    sent = sum(len(chunk) for inbox in inboxes for chunk in inbox)
+                    print(
+                        f"[DEBUG] DISTRIBUTED: depth {depth}, {new_states} new states, "
+                        f"{visited} visited, {sent} bytes routed, "
+                        f"{time.perf_counter() - start_time:.2f}s",
+                        file=sys.stderr,
+                    )
+                if not new_states:
+                    return SolverResult(
+                        solved=False,
+                        moves=[],
+                        states_visited=visited,
+                        elapsed_time=time.perf_counter() - start_time,
+                    )
+
+                for connection in connections:
+                    connection.settimeout(remaining())
+                    _send(connection, _EXPAND, b"")
+                inboxes = [[] for _ in range(n)]
+                goal: bytes | None = None
+                for connection in connections:
+                    connection.settimeout(remaining())
+                    found, *chunks = _split_chunks(_expect(connection, _OUTBOX))
+                    if goal is None and found:
+                        goal = found
+                    for destination, chunk in enumerate(chunks):
+                        inboxes[destination].append(chunk)
+                if goal is not None:
+                    moves = _reconstruct(connections, codec, goal, remaining)
+                    return SolverResult(
+                        solved=True,
+                        moves=moves,
+                        states_visited=visited + 1,
+                        elapsed_time=time.perf_counter() - start_time,
+                    )
+                depth += 1
+        except socket.timeout:
+            # 制限時間の残りを待ち時間にしているので、ここでは制限時間を超えている
+            elapsed = time.perf_counter() - start_time
+            raise PuzzleTimeoutError(
+                f"探索がタイムアウトしました（{elapsed:.1f}秒）、訪問済み状態数: {visited}"
+            ) from None
+        finally:
+            for connection in connections:
+                try:
+                    connection.settimeout(1.0)
+                    _send(connection, _STOP, b"")
+                except OSError:
+                    pass
+                connection.close()
+            for process in processes:
+                process.join(1.0)
+                if process.is_alive():
+                    process.terminate()
+                    process.join()
+
+
+def run_worker(host: str, port: int) -> None:
+    """
+    host:port のコーディネーター（solve_distributed()）に接続し、停止を指示されるか
+    接続が切れるまで担当する状態の訪問済み表とフロンティアを管理する。
+    """
+    with socket.create_connection((host, port)) as connection:
+        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            config = json.loads(_expect(connection, _INIT))
+        except RuntimeError:
+            return
+        worker = _Worker(config["index"], config["workers"], config["bottles"], config["capacity"])
+        while True:
+            try:
+                kind, payload = _recv(connection)
+            except RuntimeError:
+                return
+            if kind == _STOP:
+                return
+            if kind == _ACCEPT:
+                _send(connection, _ACCEPTED, worker.accept(payload))
+            elif kind == _EXPAND:
+                _send(connection, _OUTBOX, worker.expand())
+            elif kind == _PARENT:
+                _send(connection, _PARENT_CODE, _CODE.pack(worker.visited[payload]))
+            else:
+                raise RuntimeError(f"不明なメッセージ種別です: {kind}")
+
+
+class _Worker:
+    """担当する状態（owner_of() が index になる状態）の訪問済み表とフロンティア"""
+
+    def __init__(self, index: int, workers: int, n_bottles: int, capacity: int) -> None:
+        self.index = index
+        self.workers = workers
+        self.capacity = capacity
+        self.codec = _WireCodec(n_bottles, capacity)
+        # 状態 → 直前の手コード（初期状態は _ROOT）
+        self.visited: dict[bytes, int] = {}
+        self.frontier: list[bytes] = []
+
+    def accept(self, payload: bytes) -> bytes:
+        """子状態のバッチから未訪問の状態を記録し、新しく訪問した状態数を返す。"""
+        visited = self.visited
+        before = len(visited)
+        for chunk in _split_chunks(payload):
+            for data, code in self.codec.records(chunk):
+                if data in visited:
+                    continue
+                visited[data] = code
+                self.frontier.append(data)
+        return _COUNT.pack(len(visited) - before)
+
+    def expand(self) -> bytes:
+        """
+        フロンティアを展開し、子状態を担当ワーカーごとの圧縮したバッチにまとめて返す。
+        解決状態の子を生成した場合は展開をやめ、その子（状態と手コード）だけを返す。
+        先頭のチャンクは解決状態の子（なければ空）。
+        """
+        codec = self.codec
+        capacity = self.capacity
+        workers = self.workers
+        visited = self.visited
+        outboxes = [bytearray() for _ in range(workers)]
+        sent: set[bytes] = set()
+        for data in self.frontier:
+            state = codec.decode(data)
+            for move in get_legal_moves(state, capacity):
+                child_data, moved = codec.pour(data, state, move)
+                # 同じ子を何度も送らない（自分が担当する状態は訪問済みなら送らない）
+                if child_data in sent or child_data in visited:
+                    continue
+                sent.add(child_data)
+                code = _CODE.pack(codec.move_code(move, moved))
+                if codec.is_solved(child_data):
+                    self.frontier = []
+                    return _join_chunks([child_data + code])
+                outbox = outboxes[owner_of(child_data, workers)]
+                outbox += child_data
+                outbox += code
+        self.frontier = []
+        return _join_chunks([b""] + [zlib.compress(outbox, 1) for outbox in outboxes])
+
+
+def _reconstruct(
+    connections: list[socket.socket],
+    codec: _WireCodec,
+    goal: bytes,
+    remaining: Callable[[], float | None],
+) -> list[Move]:
+    """
+    解決状態の子（状態と手コード）から注ぎを巻き戻し、直前の状態の手コードを担当ワーカーに
+    問い合わせる処理を初期状態まで繰り返して手順を復元する。
+    """
+    moves: list[Move] = []
+    current = goal[:codec.state_size]
+    code = _CODE.unpack_from(goal, codec.state_size)[0]
+    while code != _ROOT:
+        current, move = codec.undo(current, code)
+        moves.append(move)
+        connection = connections[owner_of(current, len(connections))]
+        connection.settimeout(remaining())
+        _send(connection, _PARENT, current)
+        code = _CODE.unpack(_expect(connection, _PARENT_CODE))[0]
+    moves.reverse()
+    return moves
+
+
+def _join_chunks(chunks: list[bytes]) -> bytes:
+    return b"".join(_LENGTH.pack(len(chunk)) + chunk for chunk in chunks)
+
+
+def _split_chunks(payload: bytes) -> list[bytes]:
+    chunks: list[bytes] = []
+    offset = 0
+    while offset < len(payload):
+        (length,) = _LENGTH.unpack_from(payload, offset)
+        offset += _LENGTH.size
+        chunks.append(payload[offset:offset + length])
+        offset += length
+    return chunks
+
+
+def _send(connection: socket.socket, kind: int, payload: bytes) -> None:
+    connection.sendall(_HEADER.pack(kind, len(payload)))
+    connection.sendall(payload)
+
+
+def _recv(connection: socket.socket) -> tuple[int, bytes]:
+    kind, length = _HEADER.unpack(_recv_exact(connection, _HEADER.size))
+    return kind, _recv_exact(connection, length)
+
+
+def _expect(connection: socket.socket, expected: int) -> bytes:
+    kind, payload = _recv(connection)
+    if kind != expected:
+        raise RuntimeError(f"予期しないメッセージ種別です: {kind}（期待: {expected}）")
+    return payload
+
+
+def _recv_exact(connection: socket.socket, size: int) -> bytes:
+    buffer = bytearray()
+    while len(buffer) < size:
+        data = connection.recv(min(size - len(buffer), 1 << 20))
+        if not data:
+            raise RuntimeError("接続が切れました")
+        buffer += data
+    return bytes(buffer)
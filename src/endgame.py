@@ -0,0 +1,37 @@
+"""終盤（全ボトルが単色または空）の最短の仕上げ手順"""
+from __future__ import annotations
+
+from src.models import Move, PuzzleState
+
+
+def endgame_moves(state: PuzzleState, capacity: int) -> list[Move] | None:
+    """
+    全ボトルが単色または空で、まとめる必要のある色のセグメント数がちょうど容量に等しい場合に、
+    解決状態までの最短手順を返す（該当しない場合は None、解決済みなら空リスト）。
+    色ごとに最も多く入っているボトルへ、同じ色の他のボトルを順に注ぐ。合計が容量なので
+    1 回の注ぎで注ぎ元は必ず空になり、色 c が m_c 本に分かれていれば m_c - 1 手でまとまる。
+    最短であることの証明:
+    - 単色・空のボトルだけの状態からの合法手は、同じ色の上か空ボトルへの注ぎだけなので、
+      以降の状態もすべて単色・空のボトルだけになる
+    - 1 手で動くのは 1 色だけで、その色が入っているボトルの本数は高々 1 本しか減らない
+    - 解決状態ではどの色も 1 本にまとまっているので、Σ(m_c - 1) 手未満では解決しない
+    容量の 2 倍以上ある色は、すでに満杯のボトルだけに入っている場合に限り扱う
+    （そうでなければ最短手数が箱詰め問題になるため None を返す）。
+    """
+    bottles_of: dict[str, list[int]] = {}
+    for index, bottle in enumerate(state):
+        if not bottle:
+            continue
+        if bottle.count(bottle[0]) != len(bottle):
+            return None
+        bottles_of.setdefault(bottle[0], []).append(index)
+
+    moves: list[Move] = []
+    for bottles in bottles_of.values():
+        total = sum(len(state[index]) for index in bottles)
+        if total == capacity:
+            target = max(bottles, key=lambda index: len(state[index]))
+            moves.extend(Move(index, target) for index in bottles if index != target)
+        elif any(len(state[index]) != capacity for index in bottles):
+            return None
+    return moves
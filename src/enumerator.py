@@ -0,0 +1,186 @@
+"""最短手数のすべての解法の列挙と数え上げ"""
+from __future__ import annotations
+
+import sys
+import time
+from collections.abc import Iterator
+
+from src.models import Move, PuzzleState, PuzzleTimeoutError, apply_move, infer_capacity
+from src.solver import get_legal_moves
+from src.validator import is_solved
+
+
+class SolutionDag:
+    """
+    最短手数の解法だけを辺に持つ有向非巡回グラフ。
+    状態 → [(手, 次の状態)] の後続表に、初期状態から最短手数で解決状態に至る経路上の
+    状態と辺だけを保持する。解法は iter_solutions() で 1 つずつ生成し、
+    count() は経路を展開せずに動的計画法で数える。
+    """
+
+    def __init__(
+        self,
+        initial_state: PuzzleState,
+        capacity: int,
+        depth: int | None,
+        successors: dict[PuzzleState, list[tuple[Move, PuzzleState]]],
+        goals: frozenset[PuzzleState],
+        states_visited: int,
+    ) -> None:
+        self.initial_state = initial_state
+        self.capacity = capacity
+        self.depth = depth  # 最短手数（解なしの場合は None）
+        self.states_visited = states_visited  # BFS で訪問した状態数
+        self._successors = successors
+        self._goals = goals
+
+    @property
+    def solvable(self) -> bool:
+        return self.depth is not None
+
+    def __len__(self) -> int:
+        """グラフに残した状態数（解決状態を含む）"""
+        return len(self._successors) + len(self._goals)
+
+    def iter_solutions(self, limit: int | None = None) -> Iterator[list[Move]]:
+        """
+        最短手数の解法を手の辞書順に 1 つずつ生成する（limit 指定時は先頭 limit 個まで）。
+        深さ優先で辿るため、メモリは最短手数に比例する分しか使わない。
+        """
+        if self.depth is None or limit == 0:
+            return
+        if self.depth == 0:
+            yield []
+            return
+        yielded = 0
+        moves: list[Move] = []
+        stack = [iter(self._successors[self.initial_state])]
+        while stack:
+            edge = next(stack[-1], None)
+            if edge is None:
+                stack.pop()
+                if moves:
+                    moves.pop()
+                continue
+            move, next_state = edge
+            if next_state in self._goals:
+                yield moves + [move]
+                yielded += 1
+                if limit is not None and yielded >= limit:
+                    return
+                continue
+            moves.append(move)
+            stack.append(iter(self._successors[next_state]))
+
+    def count(self) -> int:
+        """最短手数の解法の数を返す。各状態から解決状態までの経路数を深い方から数える。"""
+        if self.depth is None:
+            return 0
+        paths: dict[PuzzleState, int] = dict.fromkeys(self._goals, 1)
+        # 後続表は深さの浅い順に作られているので、逆順に辿れば後続の経路数が先に確定する
+        for state in reversed(self._successors):
+            paths[state] = sum(paths[next_state] for _, next_state in self._successors[state])
+        return paths[self.initial_state]
+
+
+def build_solution_dag(
+    initial_state: PuzzleState,
+    timeout: float = 30.0,
+    debug: bool = False,
+    bottle_capacity: int | None = None,
+) -> SolutionDag:
+    """
+    最短手数の深さまで BFS を行い、1 つ浅い層から到達する辺（先行状態）をすべて記録して
+    最短解法の DAG を構築する。解決状態が現れた層を展開し終えた時点で探索を止め、
+    解決状態から逆に辿れる状態と辺だけを残す。
+    Raises: PuzzleTimeoutError（timeout > 0 かつ制限時間超過時）
+    """
+    start_time = time.perf_counter()
+    capacity = bottle_capacity if bottle_capacity is not None else infer_capacity(initial_state)
+    if is_solved(initial_state, capacity):
+        return SolutionDag(initial_state, capacity, 0, {}, frozenset([initial_state]), 0)
+
+    # state → 深さ、state → 1 つ浅い層の (先行状態, 手) の一覧
+    depth_of: dict[PuzzleState, int] = {initial_state: 0}
+    predecessors: dict[PuzzleState, list[tuple[PuzzleState, Move]]] = {}
+    frontier = [initial_state]
+    depth = 0
+    goals: list[PuzzleState] = []
+    while frontier and not goals:
+        next_frontier: list[PuzzleState] = []
+        for current in frontier:
+            if timeout > 0:
+                elapsed = time.perf_counter() - start_time
+                if elapsed >= timeout:
+                    raise PuzzleTimeoutError(
+                        f"探索がタイムアウトしました（{elapsed:.1f}秒）"
+                        f"、訪問済み状態数: {len(depth_of)}"
+                    )
+            for move in get_legal_moves(current, capacity):
+                next_state = apply_move(current, move, capacity)
+                known = depth_of.get(next_state)
+                if known is None:
+                    depth_of[next_state] = depth + 1
+                    predecessors[next_state] = [(current, move)]
+                    if is_solved(next_state, capacity):
+                        goals.append(next_state)
+                    else:
+                        next_frontier.append(next_state)
+                elif known == depth + 1:
+                    predecessors[next_state].append((current, move))
+        frontier = next_frontier
+        depth += 1
+        if debug:
+            print(
+                f"[DEBUG] ENUMERATE: depth {depth}, {len(depth_of)} states visited, "
+                f"{time.perf_counter() - start_time:.2f}s",
+                file=sys.stderr,
+            )
+
+    states_visited = len(depth_of)
+    if not goals:
+        return SolutionDag(initial_state, capacity, None, {}, frozenset(), states_visited)
+
+    # 解決状態から逆に辿り、最短解法の経路上にある辺だけを後続表に移す
+    successors: dict[PuzzleState, list[tuple[Move, PuzzleState]]] = {}
+    layer = set(goals)
+    for _ in range(depth):
+        previous_layer: set[PuzzleState] = set()
+        for state in layer:
+            for previous, move in predecessors.pop(state):
+                successors.setdefault(previous, []).append((move, state))
+                previous_layer.add(previous)
+        layer = previous_layer
+    # 手の辞書順に列挙できるよう並べ、浅い層から順に並ぶよう挿入し直す
+    ordered = sorted(successors, key=depth_of.__getitem__)
+    successors = {state: sorted(successors[state]) for state in ordered}
+    return SolutionDag(
+        initial_state, capacity, depth, successors, frozenset(goals), states_visited
+    )
+
+
+def iter_optimal_solutions(
+    initial_state: PuzzleState,
+    limit: int | None = None,
+    timeout: float = 30.0,
+    bottle_capacity: int | None = None,
+) -> Iterator[list[Move]]:
+    """
+    最短手数の解法を 1 つずつ生成するジェネレータ（解なしの場合は何も生成しない）。
+    DAG の構築は最初の要素を取り出す時点で行う。
+    Raises: PuzzleTimeoutError（DAG の構築が制限時間を超えた場合）
+    """
+    dag = build_solution_dag(initial_state, timeout, bottle_capacity=bottle_capacity)
+    yield from dag.iter_solutions(limit)
+
+
+def count_optimal_solutions(
+    initial_state: PuzzleState,
+    timeout: float = 30.0,
+    bottle_capacity: int | None = None,
+) -> int:
+    """
+    最短手数の解法の数を返す（解なしの場合は 0）。経路は展開しない。
+    Raises: PuzzleTimeoutError（DAG の構築が制限時間を超えた場合）
+    """
+    return build_solution_dag(initial_state, timeout, bottle_capacity=bottle_capacity).count()
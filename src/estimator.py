@@ -0,0 +1,194 @@
+"""完全な解探索を行わずにパズルの難易度を見積もる"""
+from __future__ import annotations
+
+import math
+import random
+from typing import NamedTuple
+
+from src.heuristics import boundaries_and_spread, score_move
+from src.models import Move, PuzzleState, apply_move, infer_capacity
+from src.solver import get_legal_moves
+from src.validator import is_solved, validate
+
+# 既定のランダムプレイアウト回数・有界探索で訪問する状態数の上限
+DEFAULT_PLAYOUTS = 32
+DEFAULT_SEARCH_BUDGET = 2000
+# プレイアウトで最有望手ではなく一様ランダムな手を選ぶ確率
+_EXPLORATION_RATE = 0.25
+# プレイアウトが全滅した場合に下界から最短手数を見積もる倍率（ランダムな 4〜6 色のパズルで実測した平均）
+_LOWER_BOUND_SCALE = 1.15
+
+
+class PuzzleFeatures(NamedTuple):
+    """難易度に関係する構造的特徴量"""
+    bottles: int           # ボトル数
+    colors: int            # 色数
+    capacity: int          # ボトル容量
+    empty_bottles: int     # 空ボトル数
+    color_boundaries: int  # ボトル内で隣り合うセグメントの色が異なる箇所の数（色の混ざり具合）
+    spread: int            # 各色が必要本数を超えて散らばっているボトル数の合計
+    mobility: int          # 初期状態の合法手数
+
+
+class DifficultyEstimate(NamedTuple):
+    """estimate_difficulty() の結果"""
+    solvable: bool | None       # 解あり / なしを証明できた場合のみ True / False
+    likely_solvable: bool       # 解ありと予測されるか（solvable が None の場合の推定を含む）
+    estimated_moves: int | None  # 最短手数の推定値（解なしと予測される場合は None）
+    exact: bool                 # estimated_moves が最短手数であることが保証されるか
+    lower_bound: int            # 最短手数の下界
+    upper_bound: int | None     # 見つかった解の手数（最短手数の上界）
+    playout_success_rate: float  # 解決状態に到達したプレイアウトの割合
+    features: PuzzleFeatures
+
+
+def extract_features(state: PuzzleState, bottle_capacity: int) -> PuzzleFeatures:
+    """PuzzleState から構造的特徴量を計算する。"""
+    boundaries, spread = boundaries_and_spread(state, bottle_capacity)
+    return PuzzleFeatures(
+        bottles=len(state),
+        colors=len({color for bottle in state for color in bottle}),
+        capacity=bottle_capacity,
+        empty_bottles=sum(1 for bottle in state if not bottle),
+        color_boundaries=boundaries,
+        spread=spread,
+        mobility=len(get_legal_moves(state, bottle_capacity)),
+    )
+
+
+def estimate_difficulty(
+    state: PuzzleState,
+    bottle_capacity: int | None = None,
+    playouts: int = DEFAULT_PLAYOUTS,
+    search_budget: int = DEFAULT_SEARCH_BUDGET,
+    seed: int | None = None,
+) -> DifficultyEstimate:
+    """
+    解法探索を最後まで行わずに、解の有無と最短手数を見積もる。
+    1. 訪問状態数 search_budget までの BFS を行う。解が見つかれば最短手数が確定し、
+       予算内で到達可能な状態を探索し尽くせば解なしが確定する。
+    2. 確定しなかった場合は、有望な手を優先するランダムプレイアウトを playouts 回行い、
+       最短の成功手数を上界とする。
+    最短手数の推定値は下界（色の境目の数と散らばりの大きい方）と上界の間に置く。
+    Raises: ValueError（validate() で不正と判定される状態の場合）
+    """
+    capacity = bottle_capacity if bottle_capacity is not None else infer_capacity(state)
+    validation = validate(state, capacity)
+    if not validation.valid:
+        raise ValueError(validation.error_message)
+    features = extract_features(state, capacity)
+    lower_bound = max(features.color_boundaries, features.spread)
+
+    if validation.already_solved:
+        return DifficultyEstimate(
+            solvable=True,
+            likely_solvable=True,
+            estimated_moves=0,
+            exact=True,
+            lower_bound=0,
+            upper_bound=0,
+            playout_success_rate=1.0,
+            features=features,
+        )
+
+    optimal, exhausted, searched_depth = _bounded_bfs(state, capacity, search_budget)
+    if optimal is not None or exhausted:
+        return DifficultyEstimate(
+            solvable=optimal is not None,
+            likely_solvable=optimal is not None,
+            estimated_moves=optimal,
+            exact=True,
+            lower_bound=optimal if optimal is not None else lower_bound,
+            upper_bound=optimal,
+            playout_success_rate=0.0,
+            features=features,
+        )
+
+    # 探索した深さまでには解がない
+    lower_bound = max(lower_bound, searched_depth)
+    rng = random.Random(seed)
+    # 1 回のプレイアウトで同じ状態を再訪しないため、手数は到達可能状態数で抑えられる
+    max_moves = 4 * features.bottles * capacity
+    lengths = [
+        length
+        for length in (_playout(state, capacity, rng, max_moves) for _ in range(playouts))
+        if length is not None
+    ]
+    success_rate = len(lengths) / playouts if playouts else 0.0
+    upper_bound = min(lengths, default=None)
+    if upper_bound is not None:
+        # 最良のプレイアウトは遠回りを含むため、下界との間を見積もりとする
+        estimated: int | None = max(lower_bound, (lower_bound + upper_bound + 1) // 2)
+        likely = True
+    else:
+        # プレイアウトが全滅した場合は空ボトルの有無で判断し、手数は下界から見積もる
+        likely = features.empty_bottles > 0 and features.mobility > 0
+        estimated = math.ceil(lower_bound * _LOWER_BOUND_SCALE) if likely else None
+    return DifficultyEstimate(
+        solvable=True if upper_bound is not None else None,
+        likely_solvable=likely,
+        estimated_moves=estimated,
+        exact=False,
+        lower_bound=lower_bound,
+        upper_bound=upper_bound,
+        playout_success_rate=success_rate,
+        features=features,
+    )
+
+
+def _bounded_bfs(
+    initial_state: PuzzleState, capacity: int, budget: int
+) -> tuple[int | None, bool, int]:
+    """
+    訪問状態数 budget までの BFS を行い (最短手数 または None, 探索し尽くしたか,
+    解がないと確認できた深さ + 1) を返す。
+    """
+    seen = {initial_state}
+    frontier = [initial_state]
+    depth = 0
+    while frontier:
+        depth += 1
+        next_frontier: list[PuzzleState] = []
+        for current in frontier:
+            for move in get_legal_moves(current, capacity):
+                next_state = apply_move(current, move, capacity)
+                if next_state in seen:
+                    continue
+                if is_solved(next_state, capacity):
+                    return depth, False, depth
+                if len(seen) >= budget:
+                    return None, False, depth
+                seen.add(next_state)
+                next_frontier.append(next_state)
+        frontier = next_frontier
+    return None, True, depth
+
+
+def _playout(
+    initial_state: PuzzleState, capacity: int, rng: random.Random, max_moves: int
+) -> int | None:
+    """
+    有望な手を優先するランダムプレイアウトを 1 回行い、解決状態に到達した手数を返す。
+    行き詰まった場合・max_moves 手を超えた場合は None を返す。
+    """
+    current = initial_state
+    visited = {current}
+    for length in range(1, max_moves + 1):
+        candidates: list[tuple[Move, PuzzleState]] = []
+        for move in get_legal_moves(current, capacity):
+            next_state = apply_move(current, move, capacity)
+            if next_state not in visited:
+                candidates.append((move, next_state))
+        if not candidates:
+            return None
+        if rng.random() < _EXPLORATION_RATE:
+            _, current = rng.choice(candidates)
+        else:
+            best = max(score_move(current, move, capacity) for move, _ in candidates)
+            _, current = rng.choice(
+                [c for c in candidates if score_move(current, c[0], capacity) == best]
+            )
+        if is_solved(current, capacity):
+            return length
+        visited.add(current)
+    return None
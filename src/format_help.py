@@ -83,4 +83,9 @@ def _common_constraints_section() -> str:
 フォーマット自動検出: 拡張子に基づいて自動的に判定する
   .yaml / .yml → YAML フォーマット
   .json        → JSON フォーマット
-  その他        → テキストフォーマット"""
+  .jsonl / .ndjson → JSON Lines フォーマット（1 行 1 パズル）
+  .wsb         → バイナリコンテナ（--format binary の出力。パレット表 + パックしたボトル列）
+  その他        → テキストフォーマット
+複数パズルの一括読み込み（iter_puzzles）:
+  YAML は `---` 区切りの複数ドキュメント、JSON は {"bottles": ...} の配列、
+  JSON Lines は 1 行に 1 つの {"bottles": ...} オブジェクトを記述する"""
@@ -1,12 +1,16 @@
-"""解法の text / json / yaml フォーマット出力"""
+"""解法の text / json / yaml / binary フォーマット出力"""
 from __future__ import annotations
 
 import json
 import sys
+from collections.abc import Iterable, Iterator
+from typing import TextIO
 
 import yaml
 
-from src.models import OutputFormat, PuzzleState, SolverResult, apply_move
+from src.binary_format import build_container, encode_record
+from src.models import Move, OutputFormat, PuzzleState, SolverResult, apply_move, infer_capacity
+from src.profiler import profile_to_dict
 
 
 def format_output(
@@ -14,42 +18,158 @@ def format_output(
     initial_state: PuzzleState,
     fmt: OutputFormat = "text",
     verbose: bool = False,
-) -> str:
+    bottle_capacity: int | None = None,
+) -> str | bytes:
     """
     SolverResult を指定フォーマットの文字列に変換して返す。
-    Raises: ValueError（fmt が text|json|yaml 以外の場合）
+    fmt="binary" の場合は初期状態と手順を 1 レコードに格納したコンテナの bytes を返す。
+    bottle_capacity 未指定時は初期状態から infer_capacity() で推定する。
+    Raises: ValueError（fmt が text|json|yaml|binary 以外の場合）
     """
     match fmt:
         case "text":
-            return _format_text(result, initial_state, verbose)
+            return _format_text(result, initial_state, verbose, _capacity(initial_state, bottle_capacity))
         case "json":
             return _format_json(result)
         case "yaml":
             return _format_yaml(result)
+        case "binary":
+            return _format_binary(result, initial_state, _capacity(initial_state, bottle_capacity))
         case _:
-            raise ValueError(f"未対応の出力フォーマット: {fmt!r}。text / json / yaml のいずれかを指定してください。")
+            raise ValueError(f"未対応の出力フォーマット: {fmt!r}。text / json / yaml / binary のいずれかを指定してください。")
 
 
-def write_output(content: str, output_path: str | None = None) -> None:
+def write_output(content: str | bytes, output_path: str | None = None) -> None:
     """
     content を output_path（指定時）または stdout に書き出す。
+    bytes の場合はバイナリモードで書き出す。
     Raises: OSError（ファイル書き込み失敗時）
     """
     if output_path is None:
-        sys.stdout.write(content)
+        if isinstance(content, bytes):
+            sys.stdout.flush()
+            sys.stdout.buffer.write(content)
+        else:
+            sys.stdout.write(content)
     else:
         try:
-            with open(output_path, "w", encoding="utf-8") as f:
-                f.write(content)
+            if isinstance(content, bytes):
+                with open(output_path, "wb") as f:
+                    f.write(content)
+            else:
+                with open(output_path, "w", encoding="utf-8") as f:
+                    f.write(content)
         except OSError as e:
             print(f"ファイル書き込みエラー: {e}", file=sys.stderr)
             raise
 
 
+def write_output_stream(
+    result: SolverResult,
+    initial_state: PuzzleState,
+    fmt: OutputFormat = "text",
+    verbose: bool = False,
+    output_path: str | None = None,
+    bottle_capacity: int | None = None,
+) -> None:
+    """
+    SolverResult を output_path（指定時）または stdout へ逐次書き出す。
+    出力内容は format_output() + write_output() と同一だが、手順や verbose の
+    中間状態を 1 手ずつ生成して書き込むため、出力全体をメモリ上に構築しない。
+    binary は 1 手 1 バイト程度と小さいため format_output() の結果をそのまま書き出す。
+    Raises: ValueError（fmt 不正時）, OSError（ファイル書き込み失敗時）
+    """
+    capacity = _capacity(initial_state, bottle_capacity)
+    if fmt == "binary":
+        write_output(_format_binary(result, initial_state, capacity), output_path)
+        return
+    if fmt not in ("text", "json", "yaml"):
+        raise ValueError(f"未対応の出力フォーマット: {fmt!r}。text / json / yaml / binary のいずれかを指定してください。")
+    if output_path is None:
+        stream_output(result, initial_state, sys.stdout, fmt, verbose, capacity)
+        return
+    try:
+        with open(output_path, "w", encoding="utf-8") as f:
+            stream_output(result, initial_state, f, fmt, verbose, capacity)
+    except OSError as e:
+        print(f"ファイル書き込みエラー: {e}", file=sys.stderr)
+        raise
+
+
+def stream_output(
+    result: SolverResult,
+    initial_state: PuzzleState,
+    out: TextIO,
+    fmt: OutputFormat = "text",
+    verbose: bool = False,
+    bottle_capacity: int | None = None,
+) -> None:
+    """
+    SolverResult を指定フォーマットで out に逐次書き込む。
+    bottle_capacity 未指定時は初期状態から infer_capacity() で推定する。
+    Raises: ValueError（fmt が text|json|yaml 以外の場合。binary はテキストストリームに書けない）
+    """
+    match fmt:
+        case "text":
+            _stream_text(result, initial_state, verbose, _capacity(initial_state, bottle_capacity), out)
+        case "json":
+            _stream_json(result, out)
+        case "yaml":
+            _stream_yaml(result, out)
+        case _:
+            raise ValueError(f"未対応の出力フォーマット: {fmt!r}。text / json / yaml のいずれかを指定してください。")
+
+
+def write_solutions_stream(
+    solutions: Iterable[list[Move]],
+    fmt: OutputFormat = "text",
+    output_path: str | None = None,
+) -> int:
+    """
+    複数の解法を生成される順に 1 件ずつ output_path（指定時）または stdout へ書き出し、件数を返す。
+    - text: 1 行 1 解法（`解法 1（3 手）: 1→2, 3→1, 2→3`）
+    - json: 1 行 1 解法の JSON Lines（{"solution": 番号, "total_moves": 手数, "moves": [...]}）
+    - yaml: 1 解法 1 ドキュメントの `---` 区切り
+    Raises: ValueError（fmt が text|json|yaml 以外の場合）, OSError（ファイル書き込み失敗時）
+    """
+    if fmt not in ("text", "json", "yaml"):
+        raise ValueError(f"未対応の出力フォーマット: {fmt!r}。text / json / yaml のいずれかを指定してください。")
+    if output_path is None:
+        return _stream_solutions(solutions, fmt, sys.stdout)
+    try:
+        with open(output_path, "w", encoding="utf-8") as f:
+            return _stream_solutions(solutions, fmt, f)
+    except OSError as e:
+        print(f"ファイル書き込みエラー: {e}", file=sys.stderr)
+        raise
+
+
+def _stream_solutions(solutions: Iterable[list[Move]], fmt: OutputFormat, out: TextIO) -> int:
+    count = 0
+    for count, moves in enumerate(solutions, start=1):
+        if fmt == "text":
+            steps = ", ".join(f"{m.from_bottle + 1}→{m.to_bottle + 1}" for m in moves)
+            out.write(f"解法 {count}（{len(moves)} 手）: {steps}\n")
+        else:
+            data = {
+                "solution": count,
+                "total_moves": len(moves),
+                "moves": [{"from": m.from_bottle + 1, "to": m.to_bottle + 1} for m in moves],
+            }
+            if fmt == "json":
+                out.write(json.dumps(data, ensure_ascii=False) + "\n")
+            else:
+                out.write("---\n" + _format_yaml_value(data))
+        # 列挙には時間がかかるため、見つかった解法から順に読めるようにする
+        out.flush()
+    return count
+
+
 def _format_text(
     result: SolverResult,
     initial_state: PuzzleState,
     verbose: bool,
+    capacity: int,
 ) -> str:
     lines: list[str] = []
     current_state = initial_state
@@ -58,7 +178,7 @@ def _format_text(
         lines.append(
             f"ステップ {i}: ボトル {move.from_bottle + 1} → ボトル {move.to_bottle + 1}"
         )
-        current_state = apply_move(current_state, move)
+        current_state = apply_move(current_state, move, capacity)
         if verbose:
             lines.append(_render_state(current_state))
 
@@ -67,6 +187,26 @@ def _format_text(
     return "\n".join(lines)
 
 
+def _stream_text(
+    result: SolverResult,
+    initial_state: PuzzleState,
+    verbose: bool,
+    capacity: int,
+    out: TextIO,
+) -> None:
+    # _format_text と同じ行を "\n" 区切りで（末尾改行なしで）書き出す
+    current_state = initial_state
+    for i, move in enumerate(result.moves, start=1):
+        out.write(
+            f"ステップ {i}: ボトル {move.from_bottle + 1} → ボトル {move.to_bottle + 1}\n"
+        )
+        current_state = apply_move(current_state, move, capacity)
+        if verbose:
+            out.write(_render_state(current_state))
+            out.write("\n")
+    out.write(f"合計 {len(result.moves)} 手で解決しました。")
+
+
 def _render_state(state: PuzzleState) -> str:
     """ボトル状態をテキストアートで表示"""
     parts = []
@@ -76,28 +216,95 @@ def _render_state(state: PuzzleState) -> str:
     return "\n".join(parts)
 
 
-def _build_dict(result: SolverResult) -> dict:
+def _build_dict(result: SolverResult, lazy_moves: bool = False) -> dict:
+    """
+    json / yaml 出力用の dict を構築する。
+    lazy_moves=True の場合 "moves" は逐次出力用のジェネレータになる。
+    """
+    moves = _iter_move_dicts(result)
+    stats: dict = {
+        "states_visited": result.states_visited,
+        "elapsed_time": result.elapsed_time,
+        "moves_pruned": result.moves_pruned,
+    }
+    if result.profile is not None:
+        stats["profile"] = profile_to_dict(result.profile)
     return {
         "solved": result.solved,
         "total_moves": len(result.moves),
-        "moves": [
-            {"from": m.from_bottle + 1, "to": m.to_bottle + 1}
-            for m in result.moves
-        ],
-        "stats": {
-            "states_visited": result.states_visited,
-            "elapsed_time": result.elapsed_time,
-        },
+        "moves": moves if lazy_moves else list(moves),
+        "stats": stats,
     }
 
 
+def _iter_move_dicts(result: SolverResult) -> Iterator[dict[str, int]]:
+    for m in result.moves:
+        yield {"from": m.from_bottle + 1, "to": m.to_bottle + 1}
+
+
 def _format_json(result: SolverResult) -> str:
     return json.dumps(_build_dict(result), ensure_ascii=False, indent=2)
 
 
 def _format_yaml(result: SolverResult) -> str:
+    return _format_yaml_value(_build_dict(result))
+
+
+def _format_binary(result: SolverResult, initial_state: PuzzleState, capacity: int) -> bytes:
+    return build_container([encode_record(initial_state, capacity, result.moves)])
+
+
+def _capacity(initial_state: PuzzleState, bottle_capacity: int | None) -> int:
+    return bottle_capacity if bottle_capacity is not None else infer_capacity(initial_state)
+
+
+def _stream_json(result: SolverResult, out: TextIO) -> None:
+    # json.dumps(indent=2) と同一のレイアウトを、moves は 1 要素ずつ書き出す
+    items = list(_build_dict(result, lazy_moves=True).items())
+    out.write("{")
+    for index, (key, value) in enumerate(items):
+        out.write(f"\n  {json.dumps(key, ensure_ascii=False)}: ")
+        if key == "moves":
+            _stream_json_list(value, out)
+        else:
+            out.write(_indent_json(value, "  "))
+        if index < len(items) - 1:
+            out.write(",")
+    out.write("\n}")
+
+
+def _stream_json_list(values: Iterator[dict], out: TextIO) -> None:
+    first = True
+    for value in values:
+        out.write("[" if first else ",")
+        out.write(f"\n    {_indent_json(value, '    ')}")
+        first = False
+    out.write("[]" if first else "\n  ]")
+
+
+def _indent_json(value: object, indent: str) -> str:
+    return json.dumps(value, ensure_ascii=False, indent=2).replace("\n", "\n" + indent)
+
+
+def _stream_yaml(result: SolverResult, out: TextIO) -> None:
+    # yaml.dump と同一のブロックスタイルを、moves は 1 要素ずつ書き出す
+    for key, value in _build_dict(result, lazy_moves=True).items():
+        if key != "moves":
+            out.write(_format_yaml_value({key: value}))
+            continue
+        first = True
+        for move in value:
+            if first:
+                out.write("moves:\n")
+                first = False
+            out.write(f"- from: {move['from']}\n  to: {move['to']}\n")
+        if first:
+            out.write("moves: []\n")
+
+
+def _format_yaml_value(data: dict) -> str:
     return yaml.dump(
-        _build_dict(result),
+        data,
         allow_unicode=True,
         default_flow_style=False,
         sort_keys=False,
@@ -0,0 +1,309 @@
+"""逆向きの注ぎ操作による解ありパズルの生成"""
+from __future__ import annotations
+
+import heapq
+import json
+import random
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Literal, NamedTuple
+
+from src.binary_format import BinaryRecordWriter
+from src.canonical import color_canonical_key
+from src.models import BOTTLE_CAPACITY, Move, PuzzleState
+
+GeneratorOutputFormat = Literal["yaml", "json", "jsonl", "binary", "auto"]
+
+# 色名の既定パレット（足りない分は color<番号> で補う）
+DEFAULT_COLOR_NAMES = (
+    "red", "blue", "green", "yellow", "purple", "orange", "pink", "cyan", "brown",
+    "gray", "lime", "navy", "teal", "maroon", "olive", "white", "black", "gold", "silver",
+)
+
+# 入力ファイルとして読み込めるボトル本数（parser の制約と同じ）
+_MIN_BOTTLES = 4
+_MAX_BOTTLES = 20
+# 仕上げ探索で展開する状態数の上限（超えたら最初から作り直す）
+_FINISH_BUDGET = 50
+# unique=True で重複が続いた場合に諦めるまでの生成回数
+_MAX_DUPLICATE_RETRIES = 1000
+
+# 逆操作: (注ぎ元, 注ぎ先, セグメント数)。順方向では注ぎ元 → 注ぎ先に k セグメント注ぐ手に対応する
+_ReversePour = tuple[int, int, int]
+
+
+class GeneratedPuzzle(NamedTuple):
+    state: PuzzleState
+    capacity: int
+    solution: list[Move]  # 構築に用いた逆操作を反転した解法（最短とは限らない）
+
+
+def generate_puzzle(
+    colors: int,
+    empty_bottles: int = 2,
+    capacity: int = BOTTLE_CAPACITY,
+    rng: random.Random | None = None,
+    min_boundaries: int | None = None,
+    color_names: Iterable[str] | None = None,
+) -> GeneratedPuzzle:
+    """
+    解決状態から逆向きの注ぎ操作を重ねてパズルを 1 つ生成する。
+    逆操作は apply_move() で順方向に再生できるものだけを選ぶため、生成したパズルは
+    必ず解を持つ（GeneratedPuzzle.solution がその解）。
+    入力ファイルとして読み込めるよう、全ボトルが満杯または空の状態で止める。
+    min_boundaries はボトル内の色の境目の最小数（混ざり具合）で、既定は
+    色数 × (容量 - 1) × 2/3。
+    Raises: ValueError（本数・容量・境目数の指定が不正な場合）
+    """
+    names = _color_names(colors, color_names)
+    n_bottles = colors + empty_bottles
+    if not _MIN_BOTTLES <= n_bottles <= _MAX_BOTTLES:
+        raise ValueError(
+            f"ボトル数は {_MIN_BOTTLES}〜{_MAX_BOTTLES} 本である必要があります: {n_bottles} 本"
+        )
+    if empty_bottles < 1:
+        raise ValueError("空ボトルが 1 本以上必要です")
+    if capacity < 2:
+        raise ValueError(f"容量は 2 以上である必要があります: {capacity}")
+    max_boundaries = colors * (capacity - 1)
+    if min_boundaries is None:
+        min_boundaries = max_boundaries * 2 // 3
+    if min_boundaries > max_boundaries:
+        raise ValueError(f"境目の数は最大 {max_boundaries} です: {min_boundaries}")
+    rng = rng if rng is not None else random.Random()
+
+    solved: PuzzleState = tuple((name,) * capacity for name in names) + ((),) * empty_bottles
+    scramble = 2 * colors
+    while True:
+        # 1. ランダムな逆操作で崩す（途中で逆操作がなくなったら作り直す）
+        state = solved
+        pours: list[_ReversePour] = []
+        for _ in range(scramble):
+            candidates = _reverse_pours(state, capacity)
+            if not candidates:
+                break
+            pour = rng.choice(candidates)
+            state = _unpour(state, pour)
+            pours.append(pour)
+        else:
+            # 2. 全ボトルが満杯または空で、十分に混ざった状態まで逆操作を続ける
+            finish = _finish(state, capacity, min_boundaries, rng)
+            if finish is not None:
+                state, tail = finish
+                pours += tail
+                solution = [Move(src, dst) for src, dst, _ in reversed(pours)]
+                return GeneratedPuzzle(state=state, capacity=capacity, solution=solution)
+
+
+def generate_puzzles(
+    count: int,
+    colors: int,
+    empty_bottles: int = 2,
+    capacity: int = BOTTLE_CAPACITY,
+    seed: int | None = None,
+    min_boundaries: int | None = None,
+    color_names: Iterable[str] | None = None,
+    unique: bool = False,
+) -> Iterator[GeneratedPuzzle]:
+    """
+    generate_puzzle() で count 個のパズルを生成するジェネレータ。同じ seed からは同じ列を生成する。
+    unique=True の場合は、色名とボトルの並び順だけが異なるパズル（canonicalize_colors() の
+    正規形が同じもの）を 2 度生成しない。
+    Raises: ValueError（unique=True で重複しないパズルを作れなくなった場合）
+    """
+    rng = random.Random(seed)
+    names = list(color_names) if color_names is not None else None
+    seen: set[PuzzleState] = set()
+    for _ in range(count):
+        for _ in range(_MAX_DUPLICATE_RETRIES):
+            puzzle = generate_puzzle(colors, empty_bottles, capacity, rng, min_boundaries, names)
+            if not unique:
+                break
+            key = color_canonical_key(puzzle.state)
+            if key not in seen:
+                seen.add(key)
+                break
+        else:
+            raise ValueError(
+                f"重複しないパズルを生成できませんでした（{len(seen)} 個生成済み）"
+            )
+        yield puzzle
+
+
+def write_puzzles(
+    puzzles: Iterable[GeneratedPuzzle],
+    path: str,
+    fmt: GeneratorOutputFormat = "auto",
+) -> int:
+    """
+    パズル列を iter_puzzles() で読み込める形式でファイルに書き出し、件数を返す。
+    - yaml : `---` 区切りの複数ドキュメント
+    - json : {"bottles": ...} オブジェクトの配列
+    - jsonl: 1 行 1 パズル
+    - binary: .wsb コンテナ（構築に用いた解法も格納する）
+    fmt が auto の場合は拡張子（.yaml/.yml, .json, .jsonl/.ndjson, .wsb）から判定する。
+    Raises: ValueError（形式を判定できない場合）, OSError
+    """
+    resolved = _resolve_output_format(path, fmt)
+    if resolved == "binary":
+        with BinaryRecordWriter(path) as writer:
+            for puzzle in puzzles:
+                writer.append(puzzle.state, puzzle.capacity, puzzle.solution)
+            return len(writer)
+
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        if resolved == "json":
+            f.write("[")
+        for puzzle in puzzles:
+            bottles = [list(bottle) for bottle in puzzle.state]
+            if resolved == "yaml":
+                # JSON の配列は YAML のフロー形式シーケンスとしても有効
+                lines = "".join(f"  - {json.dumps(b, ensure_ascii=False)}\n" for b in bottles)
+                f.write(f"---\nbottles:\n{lines}")
+            elif resolved == "jsonl":
+                f.write(json.dumps({"bottles": bottles}, ensure_ascii=False) + "\n")
+            else:
+                separator = "," if count else ""
+                f.write(f"{separator}\n  " + json.dumps({"bottles": bottles}, ensure_ascii=False))
+            count += 1
+        if resolved == "json":
+            f.write("\n]\n")
+    return count
+
+
+def _color_names(colors: int, color_names: Iterable[str] | None) -> list[str]:
+    if colors < 1:
+        raise ValueError(f"色数は 1 以上である必要があります: {colors}")
+    names = list(color_names) if color_names is not None else list(DEFAULT_COLOR_NAMES)
+    names += [f"color{i}" for i in range(len(names), colors)]
+    if len(set(names[:colors])) != colors:
+        raise ValueError("色名が重複しています")
+    return names[:colors]
+
+
+def _resolve_output_format(path: str, fmt: GeneratorOutputFormat) -> str:
+    if fmt != "auto":
+        return fmt
+    suffix = Path(path).suffix.lower()
+    if suffix in (".yaml", ".yml"):
+        return "yaml"
+    if suffix == ".json":
+        return "json"
+    if suffix in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if suffix == ".wsb":
+        return "binary"
+    raise ValueError(f"出力形式を拡張子から判定できません: {path}")
+
+
+def _reverse_pours(state: PuzzleState, capacity: int) -> list[_ReversePour]:
+    """
+    state に至る直前の状態へ戻す逆操作を列挙する。
+    順方向の注ぎ（src → dst に k セグメント）で state になるための条件:
+    - dst の最上層ランから k セグメントを取り除いた残りが空か、同じ色で終わる
+      （k はラン長未満、または dst が単色ならラン全体）
+    - src の最上層が同色の場合、順方向では k を超えて注げてしまうため dst は満杯であること
+    """
+    pours: list[_ReversePour] = []
+    rooms = [capacity - len(bottle) for bottle in state]
+    # 注ぎ元になれるのは空きのあるボトルだけなので先に絞っておく
+    sources = [
+        (src, room, bottle[-1] if bottle else None)
+        for src, (bottle, room) in enumerate(zip(state, rooms))
+        if room
+    ]
+    for dst, to in enumerate(state):
+        if not to:
+            continue
+        color = to[-1]
+        run = 1
+        while run < len(to) and to[-run - 1] == color:
+            run += 1
+        max_k = run if run == len(to) else run - 1
+        if max_k == 0:
+            continue
+        dst_full = rooms[dst] == 0
+        for src, room, top in sources:
+            if src == dst or (top == color and not dst_full):
+                continue
+            if max_k == 1 or room == 1:
+                pours.append((src, dst, 1))
+            else:
+                pours.extend([(src, dst, k) for k in range(1, min(max_k, room) + 1)])
+    return pours
+
+
+def _unpour(state: PuzzleState, pour: _ReversePour) -> PuzzleState:
+    """逆操作を適用する（dst の最上層 k セグメントを src に戻す）。"""
+    src, dst, k = pour
+    to = state[dst]
+    bottles = list(state)
+    bottles[src] = state[src] + to[-k:]
+    bottles[dst] = to[:-k]
+    return tuple(bottles)
+
+
+def _deficit(state: PuzzleState, capacity: int) -> int:
+    """満杯でも空でもないボトルを満杯または空にするのに動かす必要のあるセグメント数の下界"""
+    return sum(min(len(bottle), capacity - len(bottle)) for bottle in state)
+
+
+def _boundaries(state: PuzzleState) -> int:
+    """ボトル内で隣り合うセグメントの色が異なる箇所の数"""
+    return sum(
+        1 for bottle in state for i in range(1, len(bottle)) if bottle[i] != bottle[i - 1]
+    )
+
+
+def _finish(
+    state: PuzzleState, capacity: int, min_boundaries: int, rng: random.Random
+) -> tuple[PuzzleState, list[_ReversePour]] | None:
+    """
+    全ボトルが満杯または空かつ境目が min_boundaries 以上の状態を最良優先探索で探し、
+    (状態, 追加の逆操作列) を返す。評価値は満杯でも空でもないボトルの不足量と境目の
+    不足数の和（境目は逆操作で減らない）。_FINISH_BUDGET 状態を展開しても見つからなければ
+    None を返す。
+    """
+    parent: dict[PuzzleState, tuple[PuzzleState, _ReversePour] | None] = {}
+    # partial[n]: n セグメント入ったボトルを満杯または空にするのに動かす必要のあるセグメント数
+    partial = [min(n, capacity - n) for n in range(capacity + 1)]
+    deficit = _deficit(state, capacity)
+    boundaries = _boundaries(state)
+    # 子の状態は取り出すときに作る（大半は展開されないまま終わる）。同点はランダムな順で展開する
+    priority = deficit + max(min_boundaries - boundaries, 0)
+    heap: list[tuple[int, float, int, int, PuzzleState | None, _ReversePour | None]] = [
+        (priority, rng.random(), deficit, boundaries, None, None)
+    ]
+    expanded = 0
+    while heap and expanded < _FINISH_BUDGET:
+        _, _, deficit, boundaries, previous, last = heapq.heappop(heap)
+        entry = None if previous is None or last is None else (previous, last)
+        current = state if entry is None else _unpour(*entry)
+        if current in parent:
+            continue
+        parent[current] = entry
+        if deficit == 0 and boundaries >= min_boundaries:
+            tail: list[_ReversePour] = []
+            while entry is not None:
+                previous, pour = entry
+                tail.append(pour)
+                entry = parent[previous]
+            tail.reverse()
+            return current, tail
+        expanded += 1
+        for pour in _reverse_pours(current, capacity):
+            # 長さが変わるのは src と dst だけで、境目は src の最上層と色が違う場合だけ増える
+            src, dst, k = pour
+            n_src, n_dst = len(current[src]), len(current[dst])
+            next_deficit = (
+                deficit
+                + partial[n_src + k] - partial[n_src]
+                + partial[n_dst - k] - partial[n_dst]
+            )
+            next_boundaries = boundaries + (n_src > 0 and current[src][-1] != current[dst][-1])
+            priority = next_deficit + max(min_boundaries - next_boundaries, 0)
+            heapq.heappush(
+                heap, (priority, rng.random(), next_deficit, next_boundaries, current, pour)
+            )
+    return None
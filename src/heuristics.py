@@ -0,0 +1,100 @@
+"""探索順序付け・状態評価のためのヒューリスティック"""
+from __future__ import annotations
+
+from collections import Counter
+
+from src.models import Move, PuzzleState
+
+# score_move の重み（大きいほど優先して展開する）
+COMPLETE_BOTTLE_SCORE = 100  # 移動先が満杯・単色になる
+FREE_BOTTLE_SCORE = 40       # 移動元が空になる（空ボトルを作る）
+EXPOSE_SINGLE_COLOR_SCORE = 20  # 移動元が単色になる
+EXTEND_RUN_SCORE = 10        # 移動先の同色ランを伸ばす（移動セグメント数あたり）
+USE_EMPTY_PENALTY = -30      # 空ボトルを消費する（最後の手段として後回しにする）
+
+
+def top_run_length(bottle: tuple[str, ...]) -> int:
+    """ボトル最上層から連続する同色セグメント数を返す（空ボトルは 0）。"""
+    if not bottle:
+        return 0
+    top = bottle[-1]
+    run = 1
+    for i in range(len(bottle) - 2, -1, -1):
+        if bottle[i] != top:
+            break
+        run += 1
+    return run
+
+
+def score_move(state: PuzzleState, move: Move, bottle_capacity: int) -> int:
+    """
+    注ぐ手の有望度を返す（大きいほど有望）。move は合法手であること。
+    ボトルを完成させる手・ランを伸ばす手・ボトルを空ける手を優先し、
+    空ボトルへ注ぐ手は後回しにする。
+    """
+    src = state[move.from_bottle]
+    dst = state[move.to_bottle]
+    run = top_run_length(src)
+    moved = min(run, bottle_capacity - len(dst))
+
+    score = 0
+    if not dst:
+        score += USE_EMPTY_PENALTY
+    else:
+        score += EXTEND_RUN_SCORE * moved
+        if len(dst) + moved == bottle_capacity and top_run_length(dst) == len(dst):
+            score += COMPLETE_BOTTLE_SCORE
+    remaining = len(src) - moved
+    if remaining == 0:
+        # 単色ボトルを空ボトルへ移すだけの手はボトルを空けたことにならない
+        if dst:
+            score += FREE_BOTTLE_SCORE
+    elif moved == run and top_run_length(src[:remaining]) == remaining:
+        score += EXPOSE_SINGLE_COLOR_SCORE
+    return score
+
+
+def order_moves(state: PuzzleState, moves: list[Move], bottle_capacity: int) -> list[Move]:
+    """moves を score_move() の降順（同点は元の順序）に並べ替えて返す。"""
+    return sorted(moves, key=lambda m: -score_move(state, m, bottle_capacity))
+
+
+def state_cost(state: PuzzleState, bottle_capacity: int) -> int:
+    """
+    解決状態までの遠さの目安を返す（解決状態で 0、小さいほど有望）。
+    = ボトル内の色の境目の数 + 各色が必要本数を超えて散らばっているボトル数
+    どちらの項も 1 手で高々 1 ずつしか減らないため、おおよその残り手数の目安になる。
+    """
+    boundaries, spread = boundaries_and_spread(state, bottle_capacity)
+    return boundaries + spread
+
+
+def distance_lower_bound(state: PuzzleState, bottle_capacity: int) -> int:
+    """
+    解決状態までの最短手数の下界を返す（IDA* の許容的ヒューリスティック）。
+    = max(色の境目の数, 散らばり)。どちらも 1 手で高々 1 しか減らず、解決状態で 0。
+    """
+    return max(boundaries_and_spread(state, bottle_capacity))
+
+
+def boundaries_and_spread(state: PuzzleState, bottle_capacity: int) -> tuple[int, int]:
+    """(ボトル内の色の境目の数, 各色が必要本数を超えて散らばっているボトル数の合計) を返す。"""
+    boundaries = 0
+    bottles_with: Counter[str] = Counter()
+    totals: Counter[str] = Counter()
+    for bottle in state:
+        if not bottle:
+            continue
+        previous = bottle[0]
+        seen = {previous}
+        for color in bottle[1:]:
+            if color != previous:
+                boundaries += 1
+                seen.add(color)
+                previous = color
+        bottles_with.update(seen)
+        totals.update(bottle)
+    spread = sum(
+        bottles_with[color] - -(-totals[color] // bottle_capacity) for color in bottles_with
+    )
+    return boundaries, spread
@@ -0,0 +1,274 @@
+"""レベルごとに事前計算した距離表による次の一手のヒント"""
+from __future__ import annotations
+
+import hashlib
+import math
+import mmap
+import struct
+import sys
+import time
+from typing import Literal, NamedTuple
+
+from src.analyzer import StateCodec, compute_distances
+from src.binary_format import decode_puzzle, encode_puzzle
+from src.models import Move, ParseError, PuzzleState, PuzzleTimeoutError, apply_move, infer_capacity
+from src.ranking import StateRanker
+from src.solver import get_legal_moves, solve
+
+# 表に載せる状態数の既定の上限（超えるレベルはヒントのたびに探索する）
+DEFAULT_MAX_TABLE_STATES = 20_000_000
+
+# ヒント表ファイル（.wht）のレイアウト（数値はすべてリトルエンディアン）:
+#   ヘッダ: magic "WSHT" | version u8 | 予約 3 バイト | スロット数 u64 | 状態数 u64
+#           | 指紋長 u32 | 初期状態の長さ u32 | 初期状態（binary_format.encode_puzzle()）
+#   スロット: スロット数 × 9 バイト。先頭 8 バイトは状態の正規形の符号（analyzer.StateCodec）の
+#           指紋（BLAKE2b の先頭 8 バイト）、続く 1 バイトは 0 = 空きスロット、
+#           1〜254 = 最短手数 + 1、255 = 解決状態に到達できない
+#   指紋の下位ビットをスロット数（2 の累乗）で割った余りから線形探査するハッシュ表。
+#   使用率は 0.35〜0.7 なので、1 状態あたり 13〜26 バイト（上限の 2000 万状態で最大約 500 MB）。
+#   表の状態どうしの指紋の衝突は作成時に検出して拒否する。表にない状態がいずれかの指紋と
+#   一致して誤った手数を返す確率は 1 回の参照あたり 2^-64 程度で、実用上は無視できる。
+HINT_TABLE_MAGIC = b"WSHT"
+HINT_TABLE_VERSION = 2
+
+_HEADER = struct.Struct("<4sB3xQQII")
+_EMPTY = 0
+_DEAD = 0xFF
+_MAX_DISTANCE = 0xFD
+# スロットの使用率の上限（探査の長さを短く保つ）
+_MAX_LOAD = 0.7
+_FINGERPRINT_SIZE = 8
+
+
+class Hint(NamedTuple):
+    """get_hint() の結果"""
+    move: Move | None      # 次の最善手（解決済み・解なしの場合は None）
+    distance: int | None   # 解決状態までの最短手数（解なしの場合は None）
+    source: Literal["table", "search"]  # 距離表を引いたか、その場で探索したか
+
+
+class TableSizeEstimate(NamedTuple):
+    """estimate_table_size() の結果"""
+    upper_bound: int     # 状態数の上界（StateRanker.upper_bound、到達可能かどうかを問わない）
+    states: int | None   # 表に載る状態数（到達可能な正規形の数。max_states を超えた場合は None）
+    nbytes: int | None   # 表ファイルの大きさ（1 状態あたり 13〜26 バイト、states が None の場合は None）
+
+
+def estimate_table_size(
+    initial_state: PuzzleState,
+    bottle_capacity: int | None = None,
+    max_states: int = DEFAULT_MAX_TABLE_STATES,
+    timeout: float = 0.0,
+) -> TableSizeEstimate:
+    """
+    ヒント表を作る前に大きさを見積もる。到達可能な状態（正規形）を最短手数は求めずに数え、
+    max_states を超えた時点で打ち切る。上界は列挙せずに求まるが、到達可能な状態は通常
+    上界よりはるかに少ない（生成したレベルでは数千状態程度）。
+    表ファイルは 1 状態あたり 13〜26 バイト（スロットあたり 9 バイト、使用率 0.35〜0.7）と
+    ヘッダの大きさになる。
+    Raises: PuzzleTimeoutError（timeout > 0 かつ制限時間超過時）
+    """
+    start_time = time.perf_counter()
+    capacity = bottle_capacity if bottle_capacity is not None else infer_capacity(initial_state)
+    upper_bound = StateRanker.for_state(initial_state, capacity).upper_bound
+    codec = StateCodec(initial_state, capacity)
+    initial = codec.canonical(codec.encode(initial_state))
+    seen = {initial}
+    frontier = [initial]
+    while frontier and len(seen) <= max_states:
+        if timeout > 0 and time.perf_counter() - start_time >= timeout:
+            raise PuzzleTimeoutError(
+                f"状態数の見積もりがタイムアウトしました（{time.perf_counter() - start_time:.1f}秒）"
+                f"、列挙済み状態数: {len(seen)}"
+            )
+        next_frontier: list[bytes] = []
+        for data in frontier:
+            for child in codec.expand(data)[1]:
+                key = codec.canonical(child)
+                if key not in seen:
+                    seen.add(key)
+                    next_frontier.append(key)
+        frontier = next_frontier
+    if len(seen) > max_states:
+        return TableSizeEstimate(upper_bound, None, None)
+    header = _HEADER.size + len(encode_puzzle(initial_state, capacity))
+    return TableSizeEstimate(
+        upper_bound, len(seen), header + _slot_count(len(seen)) * (_FINGERPRINT_SIZE + 1)
+    )
+
+
+class HintTable:
+    """
+    build_hint_table() で書き出したヒント表を mmap で読み込み、状態から最短手数を引く。
+    1 回の参照は状態の符号化とハッシュ表の探査だけで済み、表全体をメモリに読み込まない。
+    """
+
+    def __init__(self, path: str) -> None:
+        """Raises: FileNotFoundError, ParseError（形式・バージョンが不正な場合）"""
+        with open(path, "rb") as f:
+            header = f.read(_HEADER.size)
+            if len(header) != _HEADER.size:
+                raise ParseError(f"ヒント表ファイルのヘッダが不完全です: {path}")
+            magic, version, slots, states, width, puzzle_size = _HEADER.unpack(header)
+            if magic != HINT_TABLE_MAGIC:
+                raise ParseError(f"ヒント表ファイルではありません: {path}")
+            if version != HINT_TABLE_VERSION or width != _FINGERPRINT_SIZE:
+                raise ParseError(f"未対応のヒント表バージョンです: {version}: {path}")
+            self.initial_state, self.capacity = decode_puzzle(f.read(puzzle_size))
+            self._base = _HEADER.size + puzzle_size
+            if f.seek(0, 2) != self._base + slots * (width + 1) or slots & (slots - 1):
+                raise ParseError(f"ヒント表ファイルの大きさが不正です: {path}")
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.path = path
+        self.slots = slots
+        self.states = states
+        self.nbytes = self._base + slots * (width + 1)
+        self._width = width
+        self._codec = StateCodec(self.initial_state, self.capacity)
+
+    def distance(self, state: PuzzleState) -> int | None:
+        """
+        state の解決状態までの最短手数を返す（解決状態に到達できない場合は -1）。
+        表にない状態（このレベルの初期状態から到達できない状態）の場合は None を返す。
+        """
+        if len(state) != len(self.initial_state):
+            return None
+        data = self._codec.encode_known(state)
+        if data is None:
+            return None
+        value = self._lookup(_fingerprint(self._codec.canonical(data)))
+        if value is None:
+            return None
+        return -1 if value == _DEAD else value - 1
+
+    def best_move(self, state: PuzzleState) -> Hint | None:
+        """
+        表を引いて次の最善手を返す（表にない状態の場合は None）。
+        最短手数が 1 だけ小さい子の状態に進む手のうち、get_legal_moves() の順で最初の手を選ぶ。
+        """
+        distance = self.distance(state)
+        if distance is None:
+            return None
+        if distance <= 0:
+            return Hint(None, distance if distance == 0 else None, "table")
+        for move in get_legal_moves(state, self.capacity):
+            if self.distance(apply_move(state, move, self.capacity)) == distance - 1:
+                return Hint(move, distance, "table")
+        raise ParseError(f"ヒント表の最短手数が矛盾しています: {self.path}")
+
+    def close(self) -> None:
+        self._buffer.close()
+
+    def __enter__(self) -> HintTable:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _lookup(self, key: bytes) -> int | None:
+        buffer = self._buffer
+        width = self._width
+        record = width + 1
+        mask = self.slots - 1
+        slot = int.from_bytes(key, "little") & mask
+        while True:
+            offset = self._base + slot * record
+            value = buffer[offset + width]
+            if value == _EMPTY:
+                return None
+            if buffer[offset:offset + width] == key:
+                return value
+            slot = (slot + 1) & mask
+
+
+def build_hint_table(
+    initial_state: PuzzleState,
+    path: str,
+    bottle_capacity: int | None = None,
+    timeout: float = 0.0,
+    debug: bool = False,
+    max_states: int = DEFAULT_MAX_TABLE_STATES,
+) -> HintTable:
+    """
+    レベルの初期状態から到達可能なすべての状態（ボトルの並び順を無視した正規形）の
+    解決状態までの最短手数を analyzer.compute_distances() で求め、ヒント表ファイルに書き出して開く。
+    Raises: PuzzleTimeoutError（timeout > 0 かつ制限時間超過時）、
+            ValueError（状態数が max_states を超える、最短手数が表に収まらない、または
+            状態の指紋が衝突した場合）、OSError
+    """
+    start_time = time.perf_counter()
+    capacity = bottle_capacity if bottle_capacity is not None else infer_capacity(initial_state)
+    result = compute_distances(
+        initial_state, capacity, timeout, debug, canonical=True, max_states=max_states
+    )
+    if max(result.distances, default=0) > _MAX_DISTANCE:
+        raise ValueError(f"最短手数が表に記録できる上限 {_MAX_DISTANCE} を超えました")
+
+    puzzle = encode_puzzle(initial_state, capacity)
+    width = _FINGERPRINT_SIZE
+    record = width + 1
+    slots = _slot_count(len(result.states))
+    base = _HEADER.size + len(puzzle)
+    with open(path, "w+b") as f:
+        f.truncate(base + slots * record)
+        with mmap.mmap(f.fileno(), 0) as buffer:
+            buffer[:base] = _HEADER.pack(
+                HINT_TABLE_MAGIC, HINT_TABLE_VERSION, slots, len(result.states), width, len(puzzle)
+            ) + puzzle
+            mask = slots - 1
+            for key, distance in zip(result.states, result.distances):
+                fingerprint = _fingerprint(key)
+                slot = int.from_bytes(fingerprint, "little") & mask
+                while buffer[base + slot * record + width] != _EMPTY:
+                    offset = base + slot * record
+                    if buffer[offset:offset + width] == fingerprint:
+                        raise ValueError(f"状態の指紋が衝突しました（表を作れません）: {path}")
+                    slot = (slot + 1) & mask
+                offset = base + slot * record
+                buffer[offset:offset + width] = fingerprint
+                buffer[offset + width] = _DEAD if distance < 0 else distance + 1
+    if debug:
+        print(
+            f"[DEBUG] HINTS: {len(result.states)} states, {slots} slots, "
+            f"{base + slots * record} bytes, {time.perf_counter() - start_time:.2f}s",
+            file=sys.stderr,
+        )
+    return HintTable(path)
+
+
+def get_hint(
+    state: PuzzleState,
+    table: HintTable | None = None,
+    bottle_capacity: int | None = None,
+    timeout: float = 30.0,
+) -> Hint:
+    """
+    state からの次の最善手を返す。table にある状態なら表を引き、表がない（状態数が多すぎて
+    作れなかったレベルなど）か表にない状態なら、その場で BFS を実行して最短手順の最初の手を返す。
+    Raises: PuzzleTimeoutError（探索にフォールバックして timeout > 0 かつ制限時間超過時）、
+            ValueError（bottle_capacity が table の容量と異なる場合）
+    """
+    if table is not None and bottle_capacity is not None and bottle_capacity != table.capacity:
+        raise ValueError(
+            f"ヒント表の容量 {table.capacity} と状態の容量 {bottle_capacity} が一致しません: "
+            f"{table.path}"
+        )
+    if table is not None:
+        hint = table.best_move(state)
+        if hint is not None:
+            return hint
+    if bottle_capacity is None:
+        bottle_capacity = table.capacity if table is not None else infer_capacity(state)
+    result = solve(state, strategy="bfs", timeout=timeout, bottle_capacity=bottle_capacity)
+    if not result.solved:
+        return Hint(None, None, "search")
+    return Hint(result.moves[0] if result.moves else None, len(result.moves), "search")
+
+
+def _fingerprint(key: bytes) -> bytes:
+    return hashlib.blake2b(key, digest_size=_FINGERPRINT_SIZE).digest()
+
+
+def _slot_count(states: int) -> int:
+    """使用率が _MAX_LOAD 以下になる最小の 2 の累乗"""
+    return 1 << max(0, math.ceil(states / _MAX_LOAD) - 1).bit_length()
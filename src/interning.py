@@ -0,0 +1,136 @@
+"""ボトルの整数 ID への割り当て（インターン）と注ぎの遷移表"""
+from __future__ import annotations
+
+from src.models import BottleState, Move, PuzzleState, apply_move
+
+# ボトル ID のタプルで表した状態（InternedState[i] は i 本目のボトルの ID）
+InternedState = tuple[int, ...]
+
+# 遷移表で未計算の組を表す番兵
+_UNKNOWN = object()
+
+
+class BottleTable:
+    """
+    ボトルの内容を整数 ID に割り当て、状態をボトル ID のタプルとして扱う。
+    注ぎ元・注ぎ先の ID の組ごとに注ぎ後の (注ぎ元 ID, 注ぎ先 ID) を遷移表に記録するため、
+    一度計算した組の合法手判定と手の適用は表を引くだけで済む。遷移表は初めて現れた組から
+    順に埋める。状態のハッシュ・比較も小さな整数のタプルに対して行うので、ボトル内容の
+    タプルを入れ子にした PuzzleState より軽い。
+    ボトル ID 0 は空ボトル。表は容量ごとに作り、同じ容量のパズル間では共有できる。
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self._ids: dict[BottleState, int] = {}
+        self._bottles: list[BottleState] = []
+        self._sizes: list[int] = []
+        self._complete: list[bool] = []  # 空、または満杯かつ単色
+        self._uniform: list[bool] = []   # 空、または単色
+        # 注ぎ元 ID → {注ぎ先 ID: 注ぎ後の (注ぎ元 ID, 注ぎ先 ID) | None（不可）}
+        self._pours: list[dict[int, tuple[int, int] | None]] = []
+        # _move_rows[frm][to] は Move(frm, to)（同じオブジェクトを共有する）
+        self._move_rows: list[list[Move]] = []
+        self.intern(())
+
+    def __len__(self) -> int:
+        """割り当て済みのボトル ID の数"""
+        return len(self._bottles)
+
+    @property
+    def transitions(self) -> int:
+        """遷移表に記録済みの (注ぎ元, 注ぎ先) の組の数"""
+        return sum(len(row) for row in self._pours)
+
+    def intern(self, bottle: BottleState) -> int:
+        """bottle の ID を返す（初出なら新しい ID を割り当てる）。"""
+        bottle_id = self._ids.get(bottle)
+        if bottle_id is None:
+            bottle_id = len(self._bottles)
+            self._ids[bottle] = bottle_id
+            self._bottles.append(bottle)
+            self._sizes.append(len(bottle))
+            uniform = not bottle or bottle.count(bottle[0]) == len(bottle)
+            self._uniform.append(uniform)
+            self._complete.append(uniform and len(bottle) in (0, self.capacity))
+            self._pours.append({})
+        return bottle_id
+
+    def bottles(self) -> tuple[BottleState, ...]:
+        """ID 順のボトル内容（同じ順に intern() し直すと同じ ID の表になる）"""
+        return tuple(self._bottles)
+
+    def bottle(self, bottle_id: int) -> BottleState:
+        return self._bottles[bottle_id]
+
+    def size(self, bottle_id: int) -> int:
+        return self._sizes[bottle_id]
+
+    def encode(self, state: PuzzleState) -> InternedState:
+        """PuzzleState をボトル ID のタプルに変換する。"""
+        n = len(state)
+        if len(self._move_rows) < n:
+            self._move_rows = [[Move(frm, to) for to in range(n)] for frm in range(n)]
+        return tuple(self.intern(bottle) for bottle in state)
+
+    def decode(self, state: InternedState) -> PuzzleState:
+        """ボトル ID のタプルを PuzzleState に戻す（ボトルのタプルは共有する）。"""
+        bottles = self._bottles
+        return tuple(bottles[bottle_id] for bottle_id in state)
+
+    def pour(self, src_id: int, dst_id: int) -> tuple[int, int] | None:
+        """src_id から dst_id へ注いだ後の (注ぎ元 ID, 注ぎ先 ID) を返す（注げない場合は None）。"""
+        result = self._pours[src_id].get(dst_id, _UNKNOWN)
+        if result is _UNKNOWN:
+            result = self._fill(src_id, dst_id)
+        return result  # type: ignore[return-value]
+
+    def legal_moves(self, state: InternedState) -> list[Move]:
+        """get_legal_moves() と同じ順序で合法手の一覧を返す。"""
+        n = len(state)
+        rows = self._move_rows
+        pours = self._pours
+        moves: list[Move] = []
+        for frm in range(n):
+            src_id = state[frm]
+            if not src_id:
+                continue  # 空ボトルからは移動不可
+            row = pours[src_id]
+            move_row = rows[frm]
+            for to in range(n):
+                if frm == to:
+                    continue
+                result = row.get(state[to], _UNKNOWN)
+                if result is _UNKNOWN:
+                    result = self._fill(src_id, state[to])
+                if result is not None:
+                    moves.append(move_row[to])
+        return moves
+
+    def apply(self, state: InternedState, move: Move) -> InternedState:
+        """合法手 move を適用した状態を返す（合法手であることは呼び出し側で確認済み）。"""
+        frm, to = move
+        src_id, dst_id = self.pour(state[frm], state[to])  # type: ignore[misc]
+        bottles = list(state)
+        bottles[frm] = src_id
+        bottles[to] = dst_id
+        return tuple(bottles)
+
+    def is_solved(self, state: InternedState) -> bool:
+        """validator.is_solved() と同じ判定を行う。"""
+        return all(map(self._complete.__getitem__, state))
+
+    def is_uniform(self, state: InternedState) -> bool:
+        """すべてのボトルが空または単色なら True を返す。"""
+        return all(map(self._uniform.__getitem__, state))
+
+    def _fill(self, src_id: int, dst_id: int) -> tuple[int, int] | None:
+        """遷移表の (src_id, dst_id) を計算して記録する。"""
+        src = self._bottles[src_id]
+        dst = self._bottles[dst_id]
+        result: tuple[int, int] | None = None
+        if src and len(dst) < self.capacity and (not dst or dst[-1] == src[-1]):
+            poured = apply_move((src, dst), Move(0, 1), self.capacity)
+            result = (self.intern(poured[0]), self.intern(poured[1]))
+        self._pours[src_id][dst_id] = result
+        return result
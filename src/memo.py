@@ -0,0 +1,205 @@
+"""正規形の状態ごとに解決状態までの距離の下界・上界と解なしを記録するメモ表"""
+from __future__ import annotations
+
+import json
+from collections import OrderedDict
+from collections.abc import Hashable
+from pathlib import Path
+from typing import Generic, TypeVar
+
+from src.canonical import canonical_key
+from src.models import Move, PuzzleState, apply_move
+
+_K = TypeVar("_K", bound=Hashable)
+_V = TypeVar("_V")
+
+MEMO_FORMAT_VERSION = 1
+
+# 表の既定の上限エントリ数
+DEFAULT_MAX_BOUND_ENTRIES = 1_000_000
+DEFAULT_MAX_DEAD_ENTRIES = 1_000_000
+
+# (容量, 正規形)。容量が異なれば同じ並びでも別のパズルになる
+_MemoKey = tuple[int, PuzzleState]
+
+
+class LRUTable(Generic[_K, _V]):
+    """エントリ数の上限を持ち、最も長く参照されていないエントリから追い出す表"""
+
+    def __init__(self, max_entries: int) -> None:
+        if max_entries < 0:
+            raise ValueError(f"上限エントリ数は 0 以上である必要があります: {max_entries}")
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._data: OrderedDict[_K, _V] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: _K) -> bool:
+        return key in self._data
+
+    def get(self, key: _K) -> _V | None:
+        value = self._data.get(key)
+        if value is not None:
+            self._data.move_to_end(key)
+        return value
+
+    def put(self, key: _K, value: _V) -> None:
+        if self.max_entries == 0:
+            return  # 上限 0 の表には何も記録しない
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def items(self) -> list[tuple[_K, _V]]:
+        """参照の古い順に (キー, 値) を返す。"""
+        return list(self._data.items())
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class MemoTable:
+    """
+    探索で証明した事実を正規形の状態（src.canonical）ごとに記録する表。
+    - 解なし: どの手順でも解決状態に到達できない
+    - 下界 k: k - 1 手以内には解決できない（深さ制限付き探索で部分木を調べ尽くした場合）
+    - 上界 k: k 手以内に解決できる（解法の経路上の状態）
+    DFS は解なしの状態を展開せず、IDA* は下界で同じ部分木の再探索を打ち切り、
+    初期状態の上界があれば解の有無を確かめる貪欲 DFS を省く。
+    各表はエントリ数の上限を超えると最も長く参照されていないエントリから追い出す（LRU）。
+    save() / load() で JSON ファイルに保存し、別の実行に引き継げる。
+    """
+
+    def __init__(
+        self,
+        max_bound_entries: int = DEFAULT_MAX_BOUND_ENTRIES,
+        max_dead_entries: int = DEFAULT_MAX_DEAD_ENTRIES,
+    ) -> None:
+        # キー → (下界, 上界 または None)
+        self._bounds: LRUTable[_MemoKey, tuple[int, int | None]] = LRUTable(max_bound_entries)
+        self._dead: LRUTable[_MemoKey, bool] = LRUTable(max_dead_entries)
+        self.hits = 0  # is_dead() / lower_bound() が表の情報を返した回数
+
+    def __len__(self) -> int:
+        return len(self._bounds) + len(self._dead)
+
+    @property
+    def evictions(self) -> int:
+        """上限超過で追い出したエントリ数"""
+        return self._bounds.evictions + self._dead.evictions
+
+    def is_dead(self, state: PuzzleState, capacity: int) -> bool:
+        if (capacity, canonical_key(state)) in self._dead:
+            self.hits += 1
+            return True
+        return False
+
+    def lower_bound(self, state: PuzzleState, capacity: int) -> int:
+        """記録済みの下界（なければ 0）を返す。"""
+        entry = self._bounds.get((capacity, canonical_key(state)))
+        if entry is None or entry[0] == 0:
+            return 0
+        self.hits += 1
+        return entry[0]
+
+    def upper_bound(self, state: PuzzleState, capacity: int) -> int | None:
+        entry = self._bounds.get((capacity, canonical_key(state)))
+        return entry[1] if entry is not None else None
+
+    def mark_dead(self, state: PuzzleState, capacity: int) -> None:
+        self._dead.put((capacity, canonical_key(state)), True)
+
+    def record_lower_bound(self, state: PuzzleState, capacity: int, lower: int) -> None:
+        """state は lower - 1 手以内には解決できない。"""
+        self._update((capacity, canonical_key(state)), lower, None)
+
+    def record_upper_bound(self, state: PuzzleState, capacity: int, upper: int) -> None:
+        """state は upper 手以内に解決できる。"""
+        self._update((capacity, canonical_key(state)), 0, upper)
+
+    def record_solution(
+        self,
+        initial_state: PuzzleState,
+        moves: list[Move],
+        capacity: int,
+        optimal: bool,
+    ) -> None:
+        """
+        解法の経路上の各状態について残り手数を上界として記録する。
+        optimal=True（最短手順）の場合は残り手数が最短手数なので下界としても記録する。
+        """
+        current = initial_state
+        for index, move in enumerate(moves):
+            remaining = len(moves) - index
+            self._update(
+                (capacity, canonical_key(current)), remaining if optimal else 0, remaining
+            )
+            current = apply_move(current, move, capacity)
+
+    def _update(self, key: _MemoKey, lower: int, upper: int | None) -> None:
+        known = self._bounds.get(key)
+        if known is not None:
+            lower = max(lower, known[0])
+            if known[1] is not None:
+                upper = known[1] if upper is None else min(upper, known[1])
+        self._bounds.put(key, (lower, upper))
+
+    def clear(self) -> None:
+        self._bounds.clear()
+        self._dead.clear()
+
+    def save(self, path: str) -> None:
+        """
+        表を JSON ファイルに書き出す。
+        Raises: OSError（ファイル書き込み失敗時）
+        """
+        data = {
+            "version": MEMO_FORMAT_VERSION,
+            "dead": [
+                {"capacity": capacity, "bottles": [list(b) for b in state]}
+                for (capacity, state), _ in self._dead.items()
+            ],
+            "bounds": [
+                {
+                    "capacity": capacity,
+                    "bottles": [list(b) for b in state],
+                    "lower": lower,
+                    "upper": upper,
+                }
+                for (capacity, state), (lower, upper) in self._bounds.items()
+            ],
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def load(
+        cls,
+        path: str,
+        max_bound_entries: int = DEFAULT_MAX_BOUND_ENTRIES,
+        max_dead_entries: int = DEFAULT_MAX_DEAD_ENTRIES,
+    ) -> MemoTable:
+        """
+        save() で書き出した表を読み込む。
+        Raises: FileNotFoundError, ValueError（形式・バージョンが不正な場合）
+        """
+        try:
+            data = json.loads(Path(path).read_text(encoding="utf-8"))
+            if data.get("version") != MEMO_FORMAT_VERSION:
+                raise ValueError(f"未対応のメモ表バージョンです: {data.get('version')}: {path}")
+            memo = cls(max_bound_entries, max_dead_entries)
+            for entry in data["dead"]:
+                memo._dead.put(_key_from_json(entry), True)
+            for entry in data["bounds"]:
+                memo._bounds.put(_key_from_json(entry), (entry["lower"], entry["upper"]))
+        except (json.JSONDecodeError, KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f"メモ表ファイルの形式が不正です: {e}: {path}") from e
+        return memo
+
+
+def _key_from_json(entry: dict) -> _MemoKey:
+    return entry["capacity"], tuple(sorted(tuple(b) for b in entry["bottles"]))
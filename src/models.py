@@ -12,8 +12,11 @@ PuzzleState = tuple[BottleState, ...]
 # 標準ボトル容量（要件 1.5: 容量 4 セグメント）
 BOTTLE_CAPACITY: int = 4
 
-Strategy = Literal["bfs", "dfs"]
-OutputFormat = Literal["text", "json", "yaml"]
+Strategy = Literal["bfs", "dfs", "greedy", "beam", "ida"]
+# CLI で指定できる戦略（portfolio は複数の Strategy を並走させる、distributed は分散 BFS、
+# auto は selector の規則表で Strategy を選ぶ）
+CLIStrategy = Literal["bfs", "dfs", "greedy", "beam", "ida", "portfolio", "distributed", "auto"]
+OutputFormat = Literal["text", "json", "yaml", "binary"]
 
 
 class Move(NamedTuple):
@@ -21,11 +24,32 @@ class Move(NamedTuple):
     to_bottle: int    # 0-indexed
 
 
+class SearchProfile(NamedTuple):
+    """探索の計測結果（solve(profile=True) 時のみ SolverResult に付与される）"""
+    move_generation_time: float  # get_legal_moves の累計秒数
+    apply_move_time: float       # apply_move の累計秒数
+    hashing_time: float          # 訪問済み判定（ハッシュ計算 + dict 参照）の累計秒数
+    is_solved_time: float        # is_solved の累計秒数
+    expanded: int                # 展開したノード数
+    generated: int               # 生成した子ノード数
+    duplicate_hits: int          # 訪問済みとして破棄した子ノード数
+    states_per_depth: list[int]  # 深さごとの新規到達状態数（BFS ではフロンティアサイズ）
+    branching_per_depth: list[float]  # 深さごとの平均分岐数（生成子ノード数 / 展開数）
+    peak_memory: int             # 探索中の Python ヒープ使用量のピーク（バイト）
+
+    @property
+    def duplicate_ratio(self) -> float:
+        """生成した子ノードのうち訪問済みだった割合"""
+        return self.duplicate_hits / self.generated if self.generated else 0.0
+
+
 class SolverResult(NamedTuple):
     solved: bool
     moves: list[Move]
     states_visited: int
     elapsed_time: float  # seconds
+    profile: SearchProfile | None = None  # profile=True で探索した場合のみ
+    moves_pruned: int = 0  # prune=True で生成を省略した子ノード数
 
 
 class ValidationResult(NamedTuple):
@@ -39,12 +63,33 @@ class CLIArgs:
     """argparse.Namespace の型付きラッパー"""
     input_path: str
     validate_only: bool = False
-    strategy: Strategy = "bfs"
+    strategy: CLIStrategy = "bfs"
     timeout: float = 30.0
     output_format: OutputFormat = "text"
     output_path: str | None = None
     verbose: bool = False
     debug: bool = False
+    prune: bool = False
+    beam_width: int = 256
+    portfolio_deadline: float = 0.0
+    workers: int = 2
+    remote_workers: int = 0
+    listen: tuple[str, int] = ("127.0.0.1", 0)
+    selector_model_path: str | None = None
+    memo_path: str | None = None
+    checkpoint_path: str | None = None
+    checkpoint_interval: float = 60.0
+    resume: bool = False
+    all_solutions: int | None = None  # 0 はすべて、N は先頭 N 個
+    count_solutions: bool = False
+    analyze: bool = False
+    graph_output_path: str | None = None
+    hint_table_build_path: str | None = None
+    hint: bool = False
+    hint_table_path: str | None = None
+    capacity: int | None = None  # 指定時は途中まで注がれたボトルを許す
+    profile: bool = False
+    profile_trace_path: str | None = None
     format_help: bool = False  # True の場合、input_path は使用されない
 
 
@@ -56,7 +101,25 @@ class PuzzleTimeoutError(Exception):
     """解探索のタイムアウト"""
 
 
-def apply_move(state: PuzzleState, move: Move) -> PuzzleState:
+def infer_capacity(state: PuzzleState) -> int:
+    """
+    状態からボトル容量を推定する（最長ボトルの長さ、全ボトル空なら BOTTLE_CAPACITY）。
+    解析直後の状態は非空ボトルがすべて満杯なので正しく推定できるが、探索途中の状態では
+    満杯のボトルがあるとは限らないため、初期状態で一度だけ推定して引き回すこと。
+    """
+    return max((len(b) for b in state), default=0) or BOTTLE_CAPACITY
+
+
+# _block_size() の記録。上限を超えたら作り直す（色名の異なるパズルを続けて解く場合の肥大化防止）
+_BLOCK_SIZES: dict[BottleState, int] = {}
+_BLOCK_SIZES_LIMIT = 1 << 16
+
+
+def apply_move(
+    state: PuzzleState,
+    move: Move,
+    bottle_capacity: int = BOTTLE_CAPACITY,
+) -> PuzzleState:
     """
     ムーブを適用した新しい PuzzleState を返す。元の state は変更しない。
     Preconditions: move は get_legal_moves() で得た合法手であること
@@ -64,32 +127,36 @@ def apply_move(state: PuzzleState, move: Move) -> PuzzleState:
 
     移動元の最上層から連続する同色セグメントをまとめて移動する（ブロック移動）。
     ブロックサイズが移動先の空き容量を超える場合は、空き容量分だけ移動する。
+    移動するブロックはスライス 1 回で切り出し、変更のないボトルは元のタプルを共有する。
     """
-    bottles = list(state)
-    from_b = list(bottles[move.from_bottle])
-    to_b = list(bottles[move.to_bottle])
-
-    # 移動元の最上層の色
-    top_color = from_b[-1]
+    from_index, to_index = move
+    src = state[from_index]
+    dst = state[to_index]
 
-    # 末尾から連続する同色セグメント数（ブロックサイズ）
-    block_size = 0
-    for seg in reversed(from_b):
-        if seg == top_color:
-            block_size += 1
-        else:
-            break
+    # 実際に移動するセグメント数（ブロックサイズと移動先の空き容量の小さい方）
+    block_size = _block_size(src)
+    available = bottle_capacity - len(dst)
+    keep = len(src) - (block_size if block_size < available else available)
 
-    # 移動先の空き容量
-    available = BOTTLE_CAPACITY - len(to_b)
-
-    # 実際に移動するセグメント数
-    move_count = min(block_size, available)
+    bottles = list(state)
+    bottles[from_index] = src[:keep]
+    bottles[to_index] = dst + src[keep:]
+    return tuple(bottles)
 
-    # セグメントをまとめて移動（末尾 = 最上層から順に）
-    for _ in range(move_count):
-        to_b.append(from_b.pop())
 
-    bottles[move.from_bottle] = tuple(from_b)
-    bottles[move.to_bottle] = tuple(to_b)
-    return tuple(bottles)
+def _block_size(bottle: BottleState) -> int:
+    """
+    最上層から連続する同色セグメント数（ブロックサイズ）を返す。bottle は空でないこと。
+    探索中に現れるボトルの種類は色数と容量で抑えられ、同じボトルが何度も注ぎ元になるため、
+    ボトルごとの結果を _BLOCK_SIZES に記録して再利用する。
+    """
+    size = _BLOCK_SIZES.get(bottle)
+    if size is None:
+        top_color = bottle[-1]
+        size = 1
+        while size < len(bottle) and bottle[-size - 1] == top_color:
+            size += 1
+        if len(_BLOCK_SIZES) >= _BLOCK_SIZES_LIMIT:
+            _BLOCK_SIZES.clear()
+        _BLOCK_SIZES[bottle] = size
+    return size
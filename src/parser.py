@@ -2,39 +2,60 @@
 from __future__ import annotations
 
 import json
+import re
+from collections.abc import Iterator
 from pathlib import Path
-from typing import Literal
+from typing import Any, Literal, TextIO
 
 import yaml
 
+from src.binary_format import BinaryRecordReader
 from src.models import BOTTLE_CAPACITY, ParseError, PuzzleState
 
+# libyaml が利用可能なら C 実装のローダーを使う（純 Python 版より大幅に高速）
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:  # pragma: no cover - libyaml なしでビルドされた PyYAML
+    from yaml import SafeLoader as _YamlLoader  # type: ignore[assignment]
+
 _MIN_BOTTLES = 4
 _MAX_BOTTLES = 20
 
+InputFormat = Literal["yaml", "json", "jsonl", "binary", "text", "auto"]
+
+# JSON 配列を要素単位でデコードする際の読み込み単位（文字数）
+_JSON_CHUNK_SIZE = 1 << 16
+_JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# 読み込み済みの末尾からこの文字数以内の解析エラーは、値が途中で切れているだけの可能性がある
+# （true / false / null やサロゲートペアの \uXXXX\uXXXX が読み込みの境界で切れた場合）
+_JSON_TRUNCATION_MARGIN = 16
+_JSON_ARRAY_FORMAT = '期待フォーマット: [{"bottles": [["color1", "color2"], []]}, ...]'
+
 
 def parse_file(
     path: str,
-    fmt: Literal["yaml", "json", "text", "auto"] = "auto",
+    fmt: InputFormat = "auto",
+    capacity: int | None = None,
 ) -> tuple[PuzzleState, int]:
     """
     指定パスのファイルを読み込み (PuzzleState, bottle_capacity) を返す。
+    capacity を指定すると容量をその値とし、途中まで注がれたボトルを許す（途中局面の読み込み用）。
     Raises: FileNotFoundError, ParseError
     """
     p = Path(path)
     if not p.exists():
         raise FileNotFoundError(f"ファイルが見つかりません: {path}")
 
-    # フォーマット判定
-    resolved_fmt = fmt
-    if fmt == "auto":
-        suffix = p.suffix.lower()
-        if suffix in (".yaml", ".yml"):
-            resolved_fmt = "yaml"
-        elif suffix == ".json":
-            resolved_fmt = "json"
-        else:
-            resolved_fmt = "text"
+    resolved_fmt = _resolve_format(p, fmt)
+    if resolved_fmt == "binary":
+        with BinaryRecordReader(path) as reader:
+            if len(reader) != 1:
+                raise ParseError(
+                    f"バイナリファイルに {len(reader)} 件のパズルが含まれています: {path}\n"
+                    f"複数パズルの読み込みには iter_puzzles() を使用してください。"
+                )
+            record = reader[0]
+        return _build_state([list(b) for b in record.state], path, capacity)
 
     text = p.read_text(encoding="utf-8")
 
@@ -42,20 +63,202 @@ def parse_file(
         bottles_raw = _parse_yaml(text, path)
     elif resolved_fmt == "json":
         bottles_raw = _parse_json(text, path)
+    elif resolved_fmt == "jsonl":
+        lines = [line for line in text.splitlines() if line.strip()]
+        if len(lines) != 1:
+            raise ParseError(
+                f"JSON Lines ファイルに {len(lines)} 件のパズルが含まれています: {path}\n"
+                f"複数パズルの読み込みには iter_puzzles() を使用してください。"
+            )
+        bottles_raw = _parse_json(lines[0], path)
     else:
         bottles_raw = _parse_text(text, path)
 
-    return _build_state(bottles_raw, path)
+    return _build_state(bottles_raw, path, capacity)
+
+
+def iter_puzzles(
+    path: str,
+    fmt: InputFormat = "auto",
+) -> Iterator[tuple[PuzzleState, int]]:
+    """
+    複数パズルを含むファイルから (PuzzleState, bottle_capacity) を 1 件ずつ遅延生成する。
+    - YAML: `---` 区切りの複数ドキュメント（ファイルから逐次読み込み）
+    - JSON: {"bottles": ...} オブジェクトの配列（ファイルから要素ごとに逐次デコード）、
+      または単一オブジェクト
+    - JSON Lines（.jsonl / .ndjson）: 1 行 1 パズル（ファイルから逐次読み込み）
+    - バイナリ（.wsb）: mmap したコンテナからレコードを順にデコード
+    - テキスト: 単一パズルのみ
+    Raises: FileNotFoundError, ParseError（該当レコードに到達した時点で送出）
+    """
+    p = Path(path)
+    if not p.exists():
+        raise FileNotFoundError(f"ファイルが見つかりません: {path}")
+
+    resolved_fmt = _resolve_format(p, fmt)
+    if resolved_fmt == "yaml":
+        yield from _iter_yaml(p, path)
+    elif resolved_fmt == "json":
+        yield from _iter_json(p, path)
+    elif resolved_fmt == "jsonl":
+        yield from _iter_jsonl(p, path)
+    elif resolved_fmt == "binary":
+        yield from _iter_binary(path)
+    else:
+        text = p.read_text(encoding="utf-8")
+        yield _build_state(_parse_text(text, path), path)
+
+
+def _resolve_format(p: Path, fmt: InputFormat) -> str:
+    """fmt が auto の場合は拡張子からフォーマットを判定する"""
+    if fmt != "auto":
+        return fmt
+    suffix = p.suffix.lower()
+    if suffix in (".yaml", ".yml"):
+        return "yaml"
+    if suffix == ".json":
+        return "json"
+    if suffix in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if suffix == ".wsb":
+        return "binary"
+    return "text"
+
+
+def _iter_yaml(p: Path, path: str) -> Iterator[tuple[PuzzleState, int]]:
+    with p.open(encoding="utf-8") as f:
+        documents = yaml.load_all(f, Loader=_YamlLoader)
+        index = 0
+        while True:
+            try:
+                data = next(documents)
+            except StopIteration:
+                return
+            except yaml.YAMLError as e:
+                raise ParseError(
+                    f"YAML 解析エラー（ドキュメント {index + 1}）: {e}: {path}"
+                ) from e
+            index += 1
+            if data is None:
+                continue  # 空ドキュメント（末尾の `---` など）は無視
+            label = f"{path}（ドキュメント {index}）"
+            yield _build_state(_bottles_from_yaml_data(data, label), label)
+
+
+def _iter_json(p: Path, path: str) -> Iterator[tuple[PuzzleState, int]]:
+    with p.open(encoding="utf-8") as f:
+        for index, record in enumerate(_iter_json_values(f, path), start=1):
+            label = f"{path}（レコード {index}）"
+            yield _build_state(_bottles_from_json_data(record, label), label)
+
+
+def _iter_json_values(f: TextIO, path: str) -> Iterator[Any]:
+    """
+    先頭の値が配列ならその要素を、そうでなければその値を 1 つ返す。
+    配列は JSONDecoder.raw_decode() で読み込んだ分だけ要素単位にデコードするため、
+    メモリに載るのはファイル全体ではなく最大の要素の大きさ程度になる。
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def read() -> None:
+        """デコード済みの部分を捨てて続きを読む。大きな要素の再デコードが続かないよう倍々で読む"""
+        nonlocal buffer, pos, eof
+        chunk = f.read(max(_JSON_CHUNK_SIZE, len(buffer) - pos))
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        eof = not chunk
+
+    def peek() -> str:
+        """空白を読み飛ばして次の文字（ファイル末尾なら空文字列）を返す"""
+        nonlocal pos
+        while True:
+            pos = _JSON_WHITESPACE.match(buffer, pos).end()  # type: ignore[union-attr]
+            if pos < len(buffer) or eof:
+                return buffer[pos:pos + 1]
+            read()
+
+    def decode() -> Any:
+        nonlocal pos
+        peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                # 読み込み済みの範囲内の誤りは続きを読んでも直らないので、すぐに送出する
+                truncated = e.msg.startswith("Unterminated string") or (
+                    e.pos >= len(buffer) - _JSON_TRUNCATION_MARGIN
+                )
+                if eof or not truncated:
+                    raise ParseError(f"JSON 解析エラー: {e}: {path}\n{_JSON_ARRAY_FORMAT}") from e
+                read()
+                continue
+            # 数値などは続きがまだ読んでいない部分にあるかもしれない
+            if end == len(buffer) and not eof:
+                read()
+                continue
+            pos = end
+            return value
+
+    def expect_end() -> None:
+        if peek():
+            raise ParseError(
+                f"JSON 解析エラー: 値の後に余分なデータがあります: {path}\n{_JSON_ARRAY_FORMAT}"
+            )
+
+    if peek() != "[":
+        yield decode()
+        expect_end()
+        return
+    pos += 1
+    if peek() == "]":
+        pos += 1
+        expect_end()
+        return
+    while True:
+        yield decode()
+        separator = peek()
+        pos += 1
+        if separator == "]":
+            break
+        if separator != ",":
+            raise ParseError(
+                f"JSON 解析エラー: 配列の要素の後に ',' か ']' が必要です: {path}\n"
+                f"{_JSON_ARRAY_FORMAT}"
+            )
+    expect_end()
+
+
+def _iter_jsonl(p: Path, path: str) -> Iterator[tuple[PuzzleState, int]]:
+    with p.open(encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            label = f"{path}（{line_no} 行目）"
+            yield _build_state(_parse_json(line, label), label)
+
+
+def _iter_binary(path: str) -> Iterator[tuple[PuzzleState, int]]:
+    with BinaryRecordReader(path) as reader:
+        for index, record in enumerate(reader, start=1):
+            label = f"{path}（レコード {index}）"
+            yield _build_state([list(b) for b in record.state], label)
 
 
 def _parse_yaml(text: str, path: str) -> list[list[str]]:
     try:
-        data = yaml.safe_load(text)
+        data = yaml.load(text, Loader=_YamlLoader)
     except yaml.YAMLError as e:
         raise ParseError(
             f"YAML 解析エラー: {e}\n"
             f"期待フォーマット:\n  bottles:\n    - [color1, color2, ...]\n    - []"
         ) from e
+    return _bottles_from_yaml_data(data, path)
+
+
+def _bottles_from_yaml_data(data: Any, path: str) -> list[list[str]]:
     if not isinstance(data, dict) or "bottles" not in data:
         raise ParseError(
             f"'bottles' キーが見つかりません: {path}\n"
@@ -72,9 +275,13 @@ def _parse_json(text: str, path: str) -> list[list[str]]:
         data = json.loads(text)
     except json.JSONDecodeError as e:
         raise ParseError(
-            f"JSON 解析エラー: {e}\n"
+            f"JSON 解析エラー: {e}: {path}\n"
             f'期待フォーマット: {{"bottles": [["color1", "color2"], []]}}'
         ) from e
+    return _bottles_from_json_data(data, path)
+
+
+def _bottles_from_json_data(data: Any, path: str) -> list[list[str]]:
     if not isinstance(data, dict) or "bottles" not in data:
         raise ParseError(
             f"'bottles' キーが見つかりません: {path}\n"
@@ -99,7 +306,9 @@ def _parse_text(text: str, path: str) -> list[list[str]]:
     return bottles
 
 
-def _build_state(bottles_raw: list[list[str]], path: str) -> tuple[PuzzleState, int]:
+def _build_state(
+    bottles_raw: list[list[str]], path: str, capacity: int | None = None
+) -> tuple[PuzzleState, int]:
     """raw リストを検証して (PuzzleState, bottle_capacity) に変換する"""
     n = len(bottles_raw)
     if n < _MIN_BOTTLES:
@@ -111,6 +320,15 @@ def _build_state(bottles_raw: list[list[str]], path: str) -> tuple[PuzzleState,
             f"ボトル数が多すぎます: {n} 本（最大 {_MAX_BOTTLES} 本）: {path}"
         )
 
+    if capacity is not None:
+        # 容量が指定された途中局面: 容量を超えるボトルだけを拒否する
+        if any(len(b) > capacity for b in bottles_raw):
+            raise ParseError(
+                f"容量 {capacity} を超えるセグメント数のボトルがあります: {path}"
+            )
+        state: PuzzleState = tuple(tuple(b) for b in bottles_raw)
+        return state, capacity
+
     # 容量（空でないボトルの最大セグメント数）を決定
     non_empty_lengths = [len(b) for b in bottles_raw if len(b) > 0]
     if non_empty_lengths:
@@ -124,5 +342,5 @@ def _build_state(bottles_raw: list[list[str]], path: str) -> tuple[PuzzleState,
     else:
         capacity = BOTTLE_CAPACITY  # 全ボトル空の場合はデフォルト
 
-    state: PuzzleState = tuple(tuple(b) for b in bottles_raw)
+    state = tuple(tuple(b) for b in bottles_raw)
     return state, capacity
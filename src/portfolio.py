@@ -0,0 +1,160 @@
+"""複数の探索戦略を別プロセスで並走させるポートフォリオソルバー"""
+from __future__ import annotations
+
+import multiprocessing
+import queue
+import sys
+import time
+from collections.abc import Sequence
+from multiprocessing.queues import Queue
+from typing import Literal
+
+from src.models import PuzzleState, PuzzleTimeoutError, SolverResult, Strategy, infer_capacity
+from src.solver import DEFAULT_BEAM_WIDTH, solve
+from src.validator import is_solved
+
+# 既定で並走させる戦略
+DEFAULT_PORTFOLIO: tuple[Strategy, ...] = ("bfs", "dfs", "greedy", "beam")
+
+# 子プロセスの異常終了を検出するための待ち時間の上限（秒）
+_POLL_INTERVAL = 0.1
+
+_Outcome = Literal["ok", "timeout", "error"]
+
+
+def solve_portfolio(
+    initial_state: PuzzleState,
+    strategies: Sequence[Strategy] = DEFAULT_PORTFOLIO,
+    timeout: float = 30.0,
+    debug: bool = False,
+    profile: bool = False,
+    prune: bool = False,
+    bottle_capacity: int | None = None,
+    beam_width: int = DEFAULT_BEAM_WIDTH,
+    deadline: float = 0.0,
+) -> SolverResult:
+    """
+    strategies の各戦略を別プロセスで同時に solve() し、結果を SolverResult で返す。
+    deadline が 0 の場合は最初に得られた解を返す。deadline > 0 の場合は開始から
+    deadline 秒までに得られた解のうち最短のものを返す（BFS の解は最短なのでその時点で打ち切る）。
+    いずれかの戦略が「解なし」を返した場合は探索し尽くしているため、その結果を返す。
+    結果が確定した時点で残りのプロセスは強制終了する。
+    elapsed_time はプロセス起動を含むポートフォリオ全体の所要時間。
+    Raises: PuzzleTimeoutError（全戦略がタイムアウトした場合）
+            RuntimeError（タイムアウト以外の理由で全戦略が失敗した場合）
+    """
+    if not strategies:
+        raise ValueError("strategies が空です")
+    start_time = time.perf_counter()
+    capacity = bottle_capacity if bottle_capacity is not None else infer_capacity(initial_state)
+    if is_solved(initial_state, capacity):
+        return SolverResult(
+            solved=True, moves=[], states_visited=0, elapsed_time=time.perf_counter() - start_time
+        )
+
+    ctx = multiprocessing.get_context()
+    results: Queue[tuple[Strategy, _Outcome, SolverResult | str]] = ctx.Queue()
+    processes = {
+        strategy: ctx.Process(
+            target=_run_strategy,
+            args=(results, strategy, initial_state, timeout, profile, prune, capacity, beam_width),
+            daemon=True,
+        )
+        for strategy in dict.fromkeys(strategies)
+    }
+    for process in processes.values():
+        process.start()
+
+    best: SolverResult | None = None
+    best_strategy: Strategy | None = None
+    failures: dict[Strategy, tuple[_Outcome, str]] = {}
+    pending = set(processes)
+    try:
+        while pending:
+            wait = _POLL_INTERVAL
+            if best is not None:
+                remaining = start_time + deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                wait = min(wait, remaining)
+            try:
+                strategy, outcome, payload = results.get(timeout=wait)
+            except queue.Empty:
+                # 結果を送らずに異常終了したプロセスを失敗として扱う
+                for strategy in list(pending):
+                    exitcode = processes[strategy].exitcode
+                    if exitcode is not None and exitcode != 0:
+                        pending.discard(strategy)
+                        failures[strategy] = ("error", f"終了コード {exitcode}")
+                continue
+
+            pending.discard(strategy)
+            if outcome != "ok":
+                assert isinstance(payload, str)
+                failures[strategy] = (outcome, payload)
+                if debug:
+                    print(f"[DEBUG] PORTFOLIO: {strategy} failed: {payload}", file=sys.stderr)
+                continue
+
+            assert isinstance(payload, SolverResult)
+            if debug:
+                status = f"{len(payload.moves)} moves" if payload.solved else "no solution"
+                print(
+                    f"[DEBUG] PORTFOLIO: {strategy} finished ({status}, "
+                    f"{time.perf_counter() - start_time:.2f}s)",
+                    file=sys.stderr,
+                )
+            if not payload.solved:
+                best, best_strategy = payload, strategy
+                break
+            if best is None or len(payload.moves) < len(best.moves):
+                best, best_strategy = payload, strategy
+            if deadline <= 0 or strategy == "bfs":
+                break
+    finally:
+        for process in processes.values():
+            if process.is_alive():
+                process.terminate()
+        for process in processes.values():
+            process.join()
+        results.close()
+        results.cancel_join_thread()
+
+    if best is None:
+        detail = ", ".join(f"{s}: {message}" for s, (_, message) in failures.items())
+        if all(outcome == "timeout" for outcome, _ in failures.values()):
+            raise PuzzleTimeoutError(f"すべての戦略がタイムアウトしました（{detail}）")
+        raise RuntimeError(f"すべての戦略が失敗しました（{detail}）")
+
+    if debug:
+        print(f"[DEBUG] PORTFOLIO: selected {best_strategy}", file=sys.stderr)
+    return best._replace(elapsed_time=time.perf_counter() - start_time)
+
+
+def _run_strategy(
+    results: Queue[tuple[Strategy, _Outcome, SolverResult | str]],
+    strategy: Strategy,
+    initial_state: PuzzleState,
+    timeout: float,
+    profile: bool,
+    prune: bool,
+    capacity: int,
+    beam_width: int,
+) -> None:
+    """子プロセスで 1 戦略を実行し、結果または失敗理由を results に送る。"""
+    try:
+        result = solve(
+            initial_state,
+            strategy=strategy,
+            timeout=timeout,
+            profile=profile,
+            prune=prune,
+            bottle_capacity=capacity,
+            beam_width=beam_width,
+        )
+    except PuzzleTimeoutError as e:
+        results.put((strategy, "timeout", str(e)))
+    except Exception as e:
+        results.put((strategy, "error", f"{type(e).__name__}: {e}"))
+    else:
+        results.put((strategy, "ok", result))
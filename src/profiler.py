@@ -0,0 +1,148 @@
+"""探索のフェーズ別計測（プロファイリング）"""
+from __future__ import annotations
+
+import json
+import time
+import tracemalloc
+from collections.abc import Callable
+from typing import Any, TypeVar
+
+from src.models import SearchProfile
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+PHASES = ("move_generation", "apply_move", "hashing", "is_solved")
+
+
+class SearchProfiler:
+    """
+    探索ループの各フェーズの所要時間とノード統計を収集する。
+    wrap() で得た計測付き関数を探索ループが通常の関数の代わりに呼び出す。
+    ピークメモリは tracemalloc で計測するため、計測中の探索は通常より遅くなる。
+    """
+
+    def __init__(self) -> None:
+        self._phase_times: dict[str, float] = dict.fromkeys(PHASES, 0.0)
+        self._expanded: dict[int, int] = {}
+        self._generated: dict[int, int] = {}
+        self._discovered: dict[int, int] = {}
+        self._duplicate_hits = 0
+        self._started_tracemalloc = False
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        tracemalloc.reset_peak()
+
+    def wrap(self, phase: str, fn: _F) -> _F:
+        """fn の呼び出しごとの所要時間を phase に加算するラッパーを返す。"""
+        phase_times = self._phase_times
+        perf_counter = time.perf_counter
+
+        def timed(*args: Any) -> Any:
+            t0 = perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                phase_times[phase] += perf_counter() - t0
+
+        return timed  # type: ignore[return-value]
+
+    def record_expansion(self, depth: int, generated: int, duplicates: int) -> None:
+        """深さ depth のノードを 1 つ展開し、generated 個の子のうち duplicates 個が訪問済みだった。"""
+        self._expanded[depth] = self._expanded.get(depth, 0) + 1
+        self._generated[depth] = self._generated.get(depth, 0) + generated
+        self._discovered[depth + 1] = (
+            self._discovered.get(depth + 1, 0) + generated - duplicates
+        )
+        self._duplicate_hits += duplicates
+
+    def finish(self) -> SearchProfile:
+        peak = 0
+        if tracemalloc.is_tracing():
+            _, peak = tracemalloc.get_traced_memory()
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+
+        max_depth = max([0, *self._expanded, *self._discovered])
+        states_per_depth = [1] + [self._discovered.get(d, 0) for d in range(1, max_depth + 1)]
+        branching = [
+            self._generated.get(d, 0) / self._expanded[d] if self._expanded.get(d) else 0.0
+            for d in range(max_depth + 1)
+        ]
+        # 末尾の「未展開の深さ」は分岐数 0 として残さない
+        while branching and not self._expanded.get(len(branching) - 1):
+            branching.pop()
+
+        return SearchProfile(
+            move_generation_time=self._phase_times["move_generation"],
+            apply_move_time=self._phase_times["apply_move"],
+            hashing_time=self._phase_times["hashing"],
+            is_solved_time=self._phase_times["is_solved"],
+            expanded=sum(self._expanded.values()),
+            generated=sum(self._generated.values()),
+            duplicate_hits=self._duplicate_hits,
+            states_per_depth=states_per_depth,
+            branching_per_depth=branching,
+            peak_memory=peak,
+        )
+
+
+def profile_to_dict(profile: SearchProfile) -> dict[str, Any]:
+    """SearchProfile を json / yaml 出力用の dict に変換する。"""
+    return {
+        "phase_times": {
+            "move_generation": profile.move_generation_time,
+            "apply_move": profile.apply_move_time,
+            "hashing": profile.hashing_time,
+            "is_solved": profile.is_solved_time,
+        },
+        "expanded": profile.expanded,
+        "generated": profile.generated,
+        "duplicate_hits": profile.duplicate_hits,
+        "duplicate_ratio": profile.duplicate_ratio,
+        "states_per_depth": list(profile.states_per_depth),
+        "branching_per_depth": list(profile.branching_per_depth),
+        "peak_memory": profile.peak_memory,
+    }
+
+
+def format_profile_summary(profile: SearchProfile) -> str:
+    """--debug 用の人間向け計測サマリを返す。"""
+    total = (
+        profile.move_generation_time
+        + profile.apply_move_time
+        + profile.hashing_time
+        + profile.is_solved_time
+    )
+    lines = [
+        "[PROFILE] フェーズ別所要時間:",
+        *(
+            f"  {name}: {seconds:.4f}s ({seconds / total:.1%})" if total else f"  {name}: {seconds:.4f}s"
+            for name, seconds in profile_to_dict(profile)["phase_times"].items()
+        ),
+        f"[PROFILE] 展開 {profile.expanded} / 生成 {profile.generated}"
+        f" / 重複 {profile.duplicate_hits}（{profile.duplicate_ratio:.1%}）",
+        f"[PROFILE] 深さごとの新規状態数: {profile.states_per_depth}",
+        "[PROFILE] 深さごとの分岐数: "
+        + ", ".join(f"{b:.2f}" for b in profile.branching_per_depth),
+        f"[PROFILE] ピークメモリ: {profile.peak_memory / 1024:.1f} KiB",
+    ]
+    return "\n".join(lines)
+
+
+def write_trace(
+    profile: SearchProfile,
+    path: str,
+    metadata: dict[str, Any] | None = None,
+) -> None:
+    """
+    計測結果をトレースファイル（JSON）に書き出す。
+    metadata には戦略名や入力ファイル名など、比較に使う任意の情報を含められる。
+    Raises: OSError（ファイル書き込み失敗時）
+    """
+    data = {"metadata": metadata or {}, "profile": profile_to_dict(profile)}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,288 @@
+"""状態の完全ランキング（状態 ↔ 連番の整数）と、ランクで引く詰め込み配列"""
+from __future__ import annotations
+
+import mmap
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from collections.abc import Mapping
+
+from src.models import PuzzleState
+
+# ランクで引く表として確保する状態数の上限（2 ビット/状態で 4 GiB）
+MAX_RANKED_STATES = 1 << 34
+
+# (残りの色ごとのセグメント数, 残りのボトルの長さの並び)
+_NodeKey = tuple[tuple[int, ...], tuple[int, ...]]
+
+
+class StateRanker:
+    """
+    色の構成（色 → セグメント数）・ボトル数・容量が同じ状態を、ボトルの並び順を無視して
+    0 以上 size 未満の整数に 1 対 1 で対応させる（密な完全ランキング）。
+    状態はボトルを長い順（同じ長さは内容の辞書順）に並べた正規形（normalize()）で扱い、
+    ボトルの内容を色番号の k 進数（k は色数）とみなした「種類番号」の並びに組合せ数系で番号を振る。
+    同じ長さのボトルは種類番号が広義単調増加の並び（多重集合）だけを数えるため、
+    ボトルの入れ替えにすぎない並びに別の番号が付くことはなく、size は正規形の総数に等しい。
+    残りの色ごとのセグメント数と残りのボトルの長さの並びごとに、次に置ける種類番号と
+    それ以降の埋め方の数の累積和を初めて必要になったときに求めて記録するので、
+    rank() / unrank() はボトル 1 本あたり二分探索 1〜2 回で済む。
+    """
+
+    def __init__(self, color_counts: Mapping[str, int], n_bottles: int, capacity: int) -> None:
+        self.colors = tuple(sorted(color_counts))
+        self.n_bottles = n_bottles
+        self.capacity = capacity
+        self._counts = tuple(color_counts[color] for color in self.colors)
+        self._index = {color: i for i, color in enumerate(self.colors)}
+        self._base = max(1, len(self.colors))
+        self._segments = sum(self._counts)
+        if self._segments > n_bottles * capacity:
+            raise ValueError("セグメント数がボトルの総容量を超えています")
+        self._shapes = _partitions(self._segments, n_bottles, capacity)
+        self._shape_index = {shape: i for i, shape in enumerate(self._shapes)}
+        # キー → (置ける種類番号の昇順, 各種類以降に置く埋め方の数の累積和を負にした非減少列)
+        self._nodes: dict[_NodeKey, tuple[list[int], list[int]]] = {}
+        self._offsets: list[int] | None = None  # 長さの並びごとの最初のランク（末尾は size）
+
+    @classmethod
+    def for_state(cls, state: PuzzleState, capacity: int) -> StateRanker:
+        """state と同じ色の構成・ボトル数・容量の状態全体のランキングを作る。"""
+        return cls(Counter(color for bottle in state for color in bottle), len(state), capacity)
+
+    @property
+    def size(self) -> int:
+        """正規形の総数（初回は全体の埋め方を数えるため、状態空間が大きいと時間がかかる）"""
+        return self._shape_offsets()[-1]
+
+    @property
+    def upper_bound(self) -> int:
+        """
+        埋め方を数えずに求まる size の上界（長さの並びの数 × 色の並びの総数）。
+        1 つの正規形はボトルの並べ方の数（n_bottles! 以下）の並びにしか対応しないため、
+        size は upper_bound // n_bottles! 以上になる。
+        """
+        return len(self._shapes) * _multinomial(self._counts)
+
+    @staticmethod
+    def normalize(state: PuzzleState) -> PuzzleState:
+        """ボトルを長い順（同じ長さは内容の辞書順）に並べた正規形を返す。"""
+        return tuple(sorted(state, key=lambda bottle: (-len(bottle), bottle)))
+
+    def rank(self, state: PuzzleState) -> int:
+        """
+        state の正規形のランクを返す（ボトルの並び順だけが異なる状態は同じランクになる）。
+        Raises: ValueError（色の構成・ボトル数・容量が異なる場合）
+        """
+        if len(state) != self.n_bottles:
+            raise ValueError(f"ボトル数が {self.n_bottles} ではありません")
+        state = self.normalize(state)
+        shape = tuple(len(bottle) for bottle in state)
+        shape_index = self._shape_index.get(shape)
+        if shape_index is None:
+            raise ValueError("ボトルの長さが状態空間と一致しません")
+
+        rank = self._shape_offsets()[shape_index]
+        counts = list(self._counts)
+        previous = -1  # 直前のボトルの種類番号（長さが変わったら -1）
+        for position, bottle in enumerate(state):
+            types, cumulative = self._node(tuple(counts), shape[position:])
+            bottle_type = 0
+            for color in bottle:
+                index = self._index.get(color)
+                if index is None or not counts[index]:
+                    raise ValueError(f"色の構成が状態空間と一致しません: {color}")
+                counts[index] -= 1
+                bottle_type = bottle_type * self._base + index
+            # 同じ位置に、置ける範囲でより小さい種類のボトルを置いた埋め方の数を足す
+            rank += (
+                cumulative[bisect_left(types, bottle_type)]
+                - cumulative[bisect_left(types, previous)]
+            )
+            if position + 1 < len(shape) and shape[position + 1] == len(bottle):
+                previous = bottle_type
+            else:
+                previous = -1
+        return rank
+
+    def unrank(self, rank: int) -> PuzzleState:
+        """
+        rank() の逆変換。ランクに対応する正規形の状態を返す。
+        Raises: ValueError（rank が範囲外の場合）
+        """
+        if not 0 <= rank < self.size:
+            raise ValueError(f"ランクが範囲外です: {rank}")
+        offsets = self._shape_offsets()
+        shape_index = bisect_right(offsets, rank) - 1
+        shape = self._shapes[shape_index]
+        rank -= offsets[shape_index]
+
+        counts = list(self._counts)
+        bottles: list[tuple[str, ...]] = []
+        previous = -1
+        for position, length in enumerate(shape):
+            types, cumulative = self._node(tuple(counts), shape[position:])
+            low = bisect_left(types, previous)
+            # cumulative[i] - cumulative[low] <= rank となる最後の i
+            index = bisect_right(cumulative, rank + cumulative[low]) - 1
+            bottle_type = types[index]
+            rank -= cumulative[index] - cumulative[low]
+            digits = []
+            for _ in range(length):
+                bottle_type, digit = divmod(bottle_type, self._base)
+                digits.append(digit)
+            for digit in digits:
+                counts[digit] -= 1
+            bottles.append(tuple(self.colors[digit] for digit in reversed(digits)))
+            if position + 1 < len(shape) and shape[position + 1] == length:
+                previous = types[index]
+            else:
+                previous = -1
+        return tuple(bottles)
+
+    def _shape_offsets(self) -> list[int]:
+        if self._offsets is None:
+            offsets = [0]
+            for shape in self._shapes:
+                offsets.append(offsets[-1] + self._total(self._counts, shape))
+            self._offsets = offsets
+        return self._offsets
+
+    def _total(self, counts: tuple[int, ...], suffix: tuple[int, ...]) -> int:
+        """counts のセグメントを長さの並び suffix のボトルに詰める正規形の埋め方の数"""
+        if not suffix:
+            return 1
+        return -self._node(counts, suffix)[1][0]
+
+    def _node(self, counts: tuple[int, ...], suffix: tuple[int, ...]) -> tuple[list[int], list[int]]:
+        """
+        先頭のボトル（長さ suffix[0]）に置ける種類番号の昇順と、i 番目以降の種類を置く
+        埋め方の数の合計を負にした列（末尾は 0、先頭は -全体）を i の昇順に返す。
+        """
+        key = (counts, suffix)
+        node = self._nodes.get(key)
+        if node is not None:
+            return node
+        length, rest = suffix[0], suffix[1:]
+        same_length = bool(rest) and rest[0] == length
+        types = _bottle_types(counts, length, self._base)
+        ways = []
+        for bottle_type in types:
+            remaining = list(counts)
+            value = bottle_type
+            for _ in range(length):
+                value, digit = divmod(value, self._base)
+                remaining[digit] -= 1
+            if not rest:
+                ways.append(1)
+                continue
+            next_types, next_cumulative = self._node(tuple(remaining), rest)
+            if not next_types:
+                ways.append(0)
+                continue
+            # 同じ長さの次のボトルはこの種類以上に限る
+            low = bisect_left(next_types, bottle_type) if same_length else 0
+            ways.append(next_cumulative[-1] - next_cumulative[low])
+        # cumulative[i] = -(ways[i:] の合計) を i の昇順に並べると非減少になる
+        cumulative = [0] * (len(types) + 1)
+        total = 0
+        for i in range(len(types) - 1, -1, -1):
+            total += ways[i]
+            cumulative[i] = -total
+        node = (types, cumulative)
+        self._nodes[key] = node
+        return node
+
+
+class PackedArray:
+    """
+    bits ビット（1・2・4・8）の符号なし整数を詰めて格納する固定長配列。初期値はすべて 0。
+    mmap で確保するため、一度も書き込んでいないページは物理メモリを消費しない。
+    path を渡すとそのファイルにマップし（既存の内容は破棄する）、メモリに収まらない表も扱える。
+    """
+
+    def __init__(self, length: int, bits: int = 1, path: str | None = None) -> None:
+        if bits not in (1, 2, 4, 8):
+            raise ValueError(f"bits は 1, 2, 4, 8 のいずれかです: {bits}")
+        if length < 0:
+            raise ValueError(f"長さは 0 以上です: {length}")
+        self._length = length
+        self.bits = bits
+        self._per_byte = 8 // bits
+        self._mask = (1 << bits) - 1
+        self.nbytes = max(1, -(-length // self._per_byte))
+        self._file = None
+        if path is None:
+            self._buffer = mmap.mmap(-1, self.nbytes)
+        else:
+            self._file = open(path, "w+b")
+            self._file.truncate(self.nbytes)
+            self._buffer = mmap.mmap(self._file.fileno(), self.nbytes)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index: int) -> int:
+        byte, slot = divmod(index, self._per_byte)
+        return (self._buffer[byte] >> (slot * self.bits)) & self._mask
+
+    def __setitem__(self, index: int, value: int) -> None:
+        byte, slot = divmod(index, self._per_byte)
+        shift = slot * self.bits
+        self._buffer[byte] = (self._buffer[byte] & ~(self._mask << shift) & 0xFF) | (
+            (value & self._mask) << shift
+        )
+
+    def close(self) -> None:
+        """マップを解放する（path 指定時のファイルは残す）。"""
+        self._buffer.close()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> PackedArray:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+def _bottle_types(counts: tuple[int, ...], length: int, base: int) -> list[int]:
+    """counts の範囲で長さ length のボトルに置ける内容の種類番号（base 進数）を昇順に返す。"""
+    types: list[int] = []
+    remaining = list(counts)
+
+    def fill(depth: int, value: int) -> None:
+        if depth == length:
+            types.append(value)
+            return
+        for digit, count in enumerate(remaining):
+            if count:
+                remaining[digit] -= 1
+                fill(depth + 1, value * base + digit)
+                remaining[digit] += 1
+
+    fill(0, 0)
+    return types
+
+
+def _multinomial(counts: tuple[int, ...]) -> int:
+    """多項係数 (Σcounts)! / Π(count!)（重複順列の数）"""
+    result = 1
+    total = 0
+    for count in counts:
+        for k in range(1, count + 1):
+            total += 1
+            result = result * total // k
+    return result
+
+
+def _partitions(total: int, parts: int, largest: int) -> list[tuple[int, ...]]:
+    """total を largest 以下の parts 個の非負整数に分ける、長い順の並びの一覧（辞書順の降順）"""
+    if parts == 0:
+        return [()] if total == 0 else []
+    shapes: list[tuple[int, ...]] = []
+    for first in range(min(largest, total), -1, -1):
+        if first * parts < total:
+            break
+        shapes.extend((first, *rest) for rest in _partitions(total - first, parts - 1, first))
+    return shapes
@@ -0,0 +1,51 @@
+"""探索前の問題の縮小（完成済みボトル・使われない空ボトルの除去）と手の番号の復元"""
+from __future__ import annotations
+
+from collections import Counter
+from typing import NamedTuple
+
+from src.models import Move, PuzzleState
+
+
+class Reduction(NamedTuple):
+    state: PuzzleState        # 縮小後の状態
+    bottles: tuple[int, ...]  # 縮小後のボトル i は元の状態のボトル bottles[i]
+    removed: int              # 取り除いたボトルの数
+
+    def expand_move(self, move: Move) -> Move:
+        """縮小後の状態での手を元の状態での手に変換する。"""
+        return Move(self.bottles[move.from_bottle], self.bottles[move.to_bottle])
+
+    def expand_moves(self, moves: list[Move]) -> list[Move]:
+        return [self.expand_move(move) for move in moves]
+
+
+def reduce_puzzle(state: PuzzleState, capacity: int) -> Reduction:
+    """
+    解法に関係しない完成済みボトルと、使われることのない空ボトルを取り除いた小さな問題を返す。
+    完成済みボトルは、満杯かつ単色で、その色のセグメントがすべて入っているボトル
+    （色のセグメント数が容量と等しい）。他のボトルの最上層がその色になることはないため、
+    このボトルに注ぐ手はなく、このボトルから注げるのは空ボトルへ丸ごと移す手
+    （ボトルの並べ替えにすぎない）だけなので、取り除いても解の有無と最短手数は変わらない。
+    同じ色が容量の 2 倍以上ある場合は、完成済みのボトルも他のボトルとの注ぎ合いに
+    使われうるため残す。
+    空でないボトルは 1 セグメント以上を含むので、同時に空でないボトルは残りのセグメントの
+    総数を超えない。空ボトルは互いに区別がないため、空でないボトルとあわせてセグメント数
+    と同じ本数になるまで残せば、元の問題の手順はボトルの付け替えで縮小後の問題でも
+    同じ手数で指せる。それを超える空ボトルは取り除く。
+    """
+    counts = Counter(color for bottle in state for color in bottle)
+    kept = [
+        index
+        for index, bottle in enumerate(state)
+        if not (
+            len(bottle) == capacity
+            and counts[bottle[0]] == capacity
+            and bottle.count(bottle[0]) == capacity
+        )
+    ]
+    segments = sum(len(state[index]) for index in kept)
+    empty = [index for index in kept if not state[index]]
+    excess = set(empty[max(0, segments - (len(kept) - len(empty))):])
+    bottles = tuple(index for index in kept if index not in excess)
+    return Reduction(tuple(state[index] for index in bottles), bottles, len(state) - len(bottles))
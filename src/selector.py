@@ -0,0 +1,350 @@
+"""パズルの構造的特徴量から探索戦略とパラメータを選ぶ、ベンチマーク結果で学習した規則表"""
+from __future__ import annotations
+
+import json
+import time
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+from typing import Literal, NamedTuple, get_args
+
+from src.estimator import PuzzleFeatures, extract_features
+from src.models import PuzzleState, PuzzleTimeoutError, Strategy, infer_capacity
+from src.solver import DEFAULT_BEAM_WIDTH, solve
+
+SELECTOR_FORMAT_VERSION = 1
+
+# 学習の既定値: 決定木の深さの上限・葉に残すパズル数の下限・最短より 1 手長い解法の重み（秒）
+DEFAULT_MAX_DEPTH = 3
+DEFAULT_MIN_SAMPLES = 4
+DEFAULT_MOVE_COST = 0.5
+# タイムアウトした実行のコストを制限時間の何倍とするか（PAR10）
+_TIMEOUT_PENALTY = 10
+
+Outcome = Literal["solved", "unsolvable", "timeout"]
+# 規則の条件 (特徴量名, 演算子, 閾値)
+Condition = tuple[str, Literal["<=", ">"], int]
+
+
+class StrategyChoice(NamedTuple):
+    """選んだ戦略と探索パラメータ"""
+    strategy: Strategy
+    prune: bool = True
+    beam_width: int = DEFAULT_BEAM_WIDTH  # strategy が "beam" の場合のみ使う
+
+    @property
+    def label(self) -> str:
+        """"beam:256+prune" の形式の表記（parse() で戻せる）"""
+        name = f"beam:{self.beam_width}" if self.strategy == "beam" else self.strategy
+        return f"{name}+prune" if self.prune else name
+
+    @classmethod
+    def parse(cls, label: str) -> StrategyChoice:
+        """
+        label の表記（"dfs"、"ida+prune"、"beam:1024+prune" など）を解析する。
+        Raises: ValueError（不正な表記の場合）
+        """
+        name, plus, option = label.partition("+")
+        if plus and option != "prune":
+            raise ValueError(f"戦略の表記が不正です: {label}")
+        strategy, colon, width = name.partition(":")
+        if strategy not in get_args(Strategy) or (colon and strategy != "beam"):
+            raise ValueError(f"戦略の表記が不正です: {label}")
+        try:
+            beam_width = int(width) if colon else DEFAULT_BEAM_WIDTH
+        except ValueError:
+            raise ValueError(f"戦略の表記が不正です: {label}") from None
+        if beam_width < 1:
+            raise ValueError(f"戦略の表記が不正です: {label}")
+        return cls(strategy, bool(plus), beam_width)  # type: ignore[arg-type]
+
+
+class BenchmarkRecord(NamedTuple):
+    """1 つのパズルを 1 つの戦略で解いた記録（学習データの 1 行）"""
+    puzzle: str               # パズルの識別子（同じパズルの記録をまとめる）
+    features: PuzzleFeatures
+    choice: StrategyChoice
+    outcome: Outcome
+    elapsed: float            # 所要時間（秒）
+    moves: int | None         # 解法の手数（outcome が "solved" の場合のみ）
+    timeout: float            # 実行時の制限時間（秒）
+
+
+class SelectorRule(NamedTuple):
+    """conditions をすべて満たすパズルには choice を使う"""
+    conditions: tuple[Condition, ...]
+    choice: StrategyChoice
+
+
+# benchmarks/strategy_runs.jsonl（benchmarks/bench_strategies.py で記録した 4〜12 色・容量 3〜5・
+# 空ボトル 1〜3 本の生成パズル、制限時間 2 秒）から train_selector() の既定値で学習した規則表
+_DEFAULT_RULES: tuple[SelectorRule, ...] = (
+    SelectorRule(
+        (("color_boundaries", "<=", 15), ("empty_bottles", "<=", 1)), StrategyChoice("bfs")
+    ),
+    SelectorRule(
+        (("color_boundaries", "<=", 15), ("empty_bottles", ">", 1)), StrategyChoice("ida")
+    ),
+    SelectorRule(
+        (("color_boundaries", ">", 15), ("empty_bottles", "<=", 1)), StrategyChoice("bfs")
+    ),
+    SelectorRule(
+        (("color_boundaries", ">", 15), ("empty_bottles", ">", 1)), StrategyChoice("beam", True, 64)
+    ),
+)
+
+
+class StrategySelector:
+    """
+    互いに排他的な条件を持つ規則の表。特徴量が条件を満たす最初の規則の戦略を選ぶ
+    （どの規則にも当てはまらない場合は最後の規則を使う）。
+    """
+
+    def __init__(self, rules: Sequence[SelectorRule]) -> None:
+        if not rules:
+            raise ValueError("規則が空です")
+        for rule in rules:
+            for feature, op, _ in rule.conditions:
+                if feature not in PuzzleFeatures._fields or op not in ("<=", ">"):
+                    raise ValueError(f"規則の条件が不正です: {feature} {op}")
+        self.rules = tuple(rules)
+
+    def select(self, features: PuzzleFeatures) -> StrategyChoice:
+        for rule in self.rules:
+            if all(_holds(features, condition) for condition in rule.conditions):
+                return rule.choice
+        return self.rules[-1].choice
+
+    def format(self) -> str:
+        """規則表を 1 行 1 規則のテキストにする。"""
+        lines = []
+        for rule in self.rules:
+            when = " かつ ".join(f"{f} {op} {t}" for f, op, t in rule.conditions) or "常に"
+            lines.append(f"{when}: {rule.choice.label}")
+        return "\n".join(lines)
+
+    def save(self, path: str) -> None:
+        """
+        規則表を JSON ファイルに書き出す。
+        Raises: OSError（ファイル書き込み失敗時）
+        """
+        data = {
+            "version": SELECTOR_FORMAT_VERSION,
+            "rules": [
+                {"when": [list(c) for c in rule.conditions], "choice": rule.choice.label}
+                for rule in self.rules
+            ],
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+
+    @classmethod
+    def load(cls, path: str) -> StrategySelector:
+        """
+        save() で書き出した規則表を読み込む。
+        Raises: FileNotFoundError, ValueError（形式・バージョンが不正な場合）
+        """
+        try:
+            data = json.loads(Path(path).read_text(encoding="utf-8"))
+            if data.get("version") != SELECTOR_FORMAT_VERSION:
+                raise ValueError(f"未対応の規則表バージョンです: {data.get('version')}: {path}")
+            rules = [
+                SelectorRule(
+                    tuple((f, op, int(t)) for f, op, t in rule["when"]),
+                    StrategyChoice.parse(rule["choice"]),
+                )
+                for rule in data["rules"]
+            ]
+        except (json.JSONDecodeError, KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f"規則表ファイルの形式が不正です: {e}: {path}") from e
+        return cls(rules)
+
+
+DEFAULT_SELECTOR = StrategySelector(_DEFAULT_RULES)
+
+
+def select_strategy(
+    state: PuzzleState,
+    bottle_capacity: int | None = None,
+    selector: StrategySelector | None = None,
+) -> tuple[StrategyChoice, PuzzleFeatures]:
+    """state の特徴量を計算し、selector（未指定時は DEFAULT_SELECTOR）で戦略を選ぶ。"""
+    capacity = bottle_capacity if bottle_capacity is not None else infer_capacity(state)
+    features = extract_features(state, capacity)
+    return (selector or DEFAULT_SELECTOR).select(features), features
+
+
+def run_benchmark(
+    puzzle: str,
+    state: PuzzleState,
+    choices: Iterable[StrategyChoice],
+    timeout: float,
+    bottle_capacity: int | None = None,
+) -> list[BenchmarkRecord]:
+    """state を choices の各戦略で solve() し、学習データの記録を返す。"""
+    capacity = bottle_capacity if bottle_capacity is not None else infer_capacity(state)
+    features = extract_features(state, capacity)
+    records = []
+    for choice in choices:
+        started = time.perf_counter()
+        try:
+            result = solve(
+                state,
+                strategy=choice.strategy,
+                timeout=timeout,
+                prune=choice.prune,
+                bottle_capacity=capacity,
+                beam_width=choice.beam_width,
+            )
+        except PuzzleTimeoutError:
+            outcome: Outcome = "timeout"
+            moves = None
+        else:
+            outcome = "solved" if result.solved else "unsolvable"
+            moves = len(result.moves) if result.solved else None
+        elapsed = time.perf_counter() - started
+        records.append(BenchmarkRecord(puzzle, features, choice, outcome, elapsed, moves, timeout))
+    return records
+
+
+def write_records(records: Iterable[BenchmarkRecord], path: str) -> None:
+    """
+    records を JSON Lines ファイルに追記する。
+    Raises: OSError（ファイル書き込み失敗時）
+    """
+    with open(path, "a", encoding="utf-8") as f:
+        for record in records:
+            data = {
+                "puzzle": record.puzzle,
+                "features": record.features._asdict(),
+                "choice": record.choice.label,
+                "outcome": record.outcome,
+                "elapsed": round(record.elapsed, 4),
+                "moves": record.moves,
+                "timeout": record.timeout,
+            }
+            f.write(json.dumps(data, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+
+def read_records(path: str) -> list[BenchmarkRecord]:
+    """
+    write_records() で書き出した記録を読み込む。
+    Raises: FileNotFoundError, ValueError（形式が不正な行がある場合）
+    """
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+                outcome = data["outcome"]
+                if outcome not in get_args(Outcome):
+                    raise ValueError(f"不明な結果です: {outcome}")
+                records.append(BenchmarkRecord(
+                    puzzle=str(data["puzzle"]),
+                    features=PuzzleFeatures(**data["features"]),
+                    choice=StrategyChoice.parse(data["choice"]),
+                    outcome=outcome,
+                    elapsed=float(data["elapsed"]),
+                    moves=data["moves"],
+                    timeout=float(data["timeout"]),
+                ))
+            except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+                raise ValueError(f"ベンチマーク記録の形式が不正です: {e}: {path}:{line_number}") from e
+    return records
+
+
+def train_selector(
+    records: Iterable[BenchmarkRecord],
+    max_depth: int = DEFAULT_MAX_DEPTH,
+    min_samples: int = DEFAULT_MIN_SAMPLES,
+    move_cost: float = DEFAULT_MOVE_COST,
+) -> StrategySelector:
+    """
+    ベンチマーク記録から規則表を学習する。
+    各実行のコストは所要時間に、そのパズルで見つかった最短の解法より長い手数 × move_cost 秒を
+    加えたもの（タイムアウトは制限時間の _TIMEOUT_PENALTY 倍、記録のない戦略も同じ扱い）。
+    合計コストが最小の戦略を葉とする決定木を、合計コストが最も減る特徴量の閾値で分割して作り、
+    根から葉までの条件を 1 つの規則にする。
+    Raises: ValueError（記録が空の場合）
+    """
+    by_puzzle: dict[str, list[BenchmarkRecord]] = {}
+    for record in records:
+        by_puzzle.setdefault(record.puzzle, []).append(record)
+    if not by_puzzle:
+        raise ValueError("ベンチマーク記録が空です")
+    choices = sorted({r.choice for runs in by_puzzle.values() for r in runs}, key=lambda c: c.label)
+    samples = [
+        (runs[0].features, _costs(runs, choices, move_cost)) for runs in by_puzzle.values()
+    ]
+    rules: list[SelectorRule] = []
+    _grow(samples, choices, (), max_depth, min_samples, rules)
+    return StrategySelector(rules)
+
+
+def _costs(
+    runs: list[BenchmarkRecord], choices: list[StrategyChoice], move_cost: float
+) -> list[float]:
+    """1 つのパズルの記録から choices の順のコストを計算する。"""
+    shortest = min((r.moves for r in runs if r.moves is not None), default=0)
+    penalty = _TIMEOUT_PENALTY * max(r.timeout for r in runs)
+    cost_of: dict[StrategyChoice, float] = {}
+    for r in runs:
+        if r.outcome == "timeout":
+            cost = penalty
+        else:
+            cost = r.elapsed + move_cost * ((r.moves or shortest) - shortest)
+        cost_of[r.choice] = min(cost, cost_of.get(r.choice, cost))
+    return [cost_of.get(choice, penalty) for choice in choices]
+
+
+def _best(samples: list[tuple[PuzzleFeatures, list[float]]]) -> tuple[int, float]:
+    """合計コストが最小の戦略の添字と合計コスト"""
+    totals = [sum(column) for column in zip(*(costs for _, costs in samples))]
+    index = min(range(len(totals)), key=totals.__getitem__)
+    return index, totals[index]
+
+
+def _grow(
+    samples: list[tuple[PuzzleFeatures, list[float]]],
+    choices: list[StrategyChoice],
+    conditions: tuple[Condition, ...],
+    depth: int,
+    min_samples: int,
+    rules: list[SelectorRule],
+) -> None:
+    """samples を分割して葉ごとの規則を rules に追加する。"""
+    index, cost = _best(samples)
+    split: tuple[float, str, int] | None = None
+    if depth > 0:
+        for feature in PuzzleFeatures._fields:
+            values = sorted({getattr(f, feature) for f, _ in samples})
+            for threshold in values[:-1]:
+                low = [s for s in samples if getattr(s[0], feature) <= threshold]
+                high = [s for s in samples if getattr(s[0], feature) > threshold]
+                if len(low) < min_samples or len(high) < min_samples:
+                    continue
+                split_cost = _best(low)[1] + _best(high)[1]
+                if split_cost < cost - 1e-9 and (split is None or split_cost < split[0]):
+                    split = (split_cost, feature, threshold)
+    if split is None:
+        rules.append(SelectorRule(conditions, choices[index]))
+        return
+    _, feature, threshold = split
+    low = [s for s in samples if getattr(s[0], feature) <= threshold]
+    high = [s for s in samples if getattr(s[0], feature) > threshold]
+    start = len(rules)
+    _grow(low, choices, conditions + ((feature, "<=", threshold),), depth - 1, min_samples, rules)
+    _grow(high, choices, conditions + ((feature, ">", threshold),), depth - 1, min_samples, rules)
+    if len({rule.choice for rule in rules[start:]}) == 1:
+        # 分割しても同じ戦略になる場合はまとめる
+        choice = rules[start].choice
+        del rules[start:]
+        rules.append(SelectorRule(conditions, choice))
+
+
+def _holds(features: PuzzleFeatures, condition: Condition) -> bool:
+    feature, op, threshold = condition
+    value = getattr(features, feature)
+    return value <= threshold if op == "<=" else value > threshold
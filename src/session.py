@@ -0,0 +1,232 @@
+"""関連する複数のパズルで探索結果を共有するソルバーセッション"""
+from __future__ import annotations
+
+import time
+from functools import partial
+from typing import Literal, NamedTuple
+
+from src.canonical import (
+    canonicalize,
+    canonicalize_colors,
+    from_canonical_move,
+    to_canonical_move,
+)
+from src.memo import LRUTable, MemoTable
+from src.models import Move, PuzzleState, SolverResult, apply_move, infer_capacity
+from src.reduction import reduce_puzzle
+from src.solver import solve
+from src.validator import is_solved
+
+SessionStrategy = Literal["bfs", "dfs"]
+
+# 表の既定の上限エントリ数
+DEFAULT_MAX_SOLVABLE_ENTRIES = 100_000
+DEFAULT_MAX_DEAD_ENTRIES = 1_000_000
+DEFAULT_MAX_PUZZLE_ENTRIES = 10_000
+
+# (容量, 正規形)。容量が異なれば同じ並びでも別のパズルになる
+_SessionKey = tuple[int, PuzzleState]
+
+
+class _Solvable(NamedTuple):
+    """解ありと分かっている正規形の状態の情報"""
+    distance: int    # 解決状態までの手数（exact=False の場合は上界）
+    next_move: Move  # 正規形での次の手
+    exact: bool      # distance が最短手数か（BFS で得た場合のみ True）
+
+
+class _Puzzle(NamedTuple):
+    """解いたことのあるパズル（色名も無視した正規形）の結果"""
+    moves: tuple[Move, ...] | None  # 正規形での解法（解なしの場合は None）
+    exact: bool                     # moves が最短手数か（BFS で得た場合のみ True）
+
+
+class SessionStats(NamedTuple):
+    solvable_entries: int  # 解あり表のエントリ数
+    dead_entries: int      # 解なし表のエントリ数
+    hits: int              # 表の情報で探索を打ち切った・枝刈りした回数
+    evictions: int         # 上限超過で追い出したエントリ数
+    puzzle_entries: int    # パズル表のエントリ数
+
+
+class SolverSession:
+    """
+    複数回の solve() の間で探索結果を共有するセッション。
+    容量とボトルの並び順を無視した正規形（src.canonical）をキーに、次の 2 つの表を保持する。
+    - 解あり表: 解法が見つかった経路上の状態 → 解決状態までの手数と次の手
+    - 解なし表: 解が存在しないと確定した状態（探索し尽くして解がなかった場合の訪問済み状態）
+    探索には solver.solve() を使い、解なし表を memo として、解あり表を finisher として渡す。
+    探索中に解あり表の状態に到達すると残りの手順を表から復元し、解なし表の状態は展開しない。
+    さらに solve() に渡されたパズル単位の結果を、色名も無視した正規形
+    （canonicalize_colors()）をキーにパズル表に記録する。色名だけが異なるパズルは
+    探索せずにパズル表の解法をボトル番号の付け替えで返す。
+    表は完成済みボトルを取り除いた状態（src.reduction）で引くため、完成済みボトルの
+    有無だけが異なるパズルも同じ結果を共有する。
+    BFS は最短手数と確定した表の情報だけを使い、候補解より短い解がないと分かるまで
+    探索を続けるため、最短手数の保証は維持される。
+    各表はエントリ数の上限を超えると最も長く参照されていないエントリから追い出す（LRU）。
+    """
+
+    def __init__(
+        self,
+        max_solvable_entries: int = DEFAULT_MAX_SOLVABLE_ENTRIES,
+        max_dead_entries: int = DEFAULT_MAX_DEAD_ENTRIES,
+        max_puzzle_entries: int = DEFAULT_MAX_PUZZLE_ENTRIES,
+    ) -> None:
+        self._solvable: LRUTable[_SessionKey, _Solvable] = LRUTable(max_solvable_entries)
+        # 解なし表（下界・上界は記録しない）
+        self._dead = MemoTable(max_bound_entries=0, max_dead_entries=max_dead_entries)
+        self._puzzles: LRUTable[_SessionKey, _Puzzle] = LRUTable(max_puzzle_entries)
+        self._hits = 0
+
+    @property
+    def stats(self) -> SessionStats:
+        return SessionStats(
+            solvable_entries=len(self._solvable),
+            dead_entries=len(self._dead),
+            hits=self._hits + self._dead.hits,
+            evictions=self._solvable.evictions + self._dead.evictions + self._puzzles.evictions,
+            puzzle_entries=len(self._puzzles),
+        )
+
+    def clear(self) -> None:
+        """学習した表をすべて破棄する。"""
+        self._solvable.clear()
+        self._dead.clear()
+        self._puzzles.clear()
+
+    def known_distance(self, state: PuzzleState, bottle_capacity: int | None = None) -> int | None:
+        """state の解決状態までの最短手数が表にあれば返す。"""
+        capacity = bottle_capacity if bottle_capacity is not None else infer_capacity(state)
+        key, _ = canonicalize(reduce_puzzle(state, capacity).state)
+        entry = self._solvable.get((capacity, key))
+        return entry.distance if entry is not None and entry.exact else None
+
+    def is_known_dead(self, state: PuzzleState, bottle_capacity: int | None = None) -> bool:
+        """state に解がないと分かっていれば True を返す。"""
+        capacity = bottle_capacity if bottle_capacity is not None else infer_capacity(state)
+        return self._dead.is_dead(reduce_puzzle(state, capacity).state, capacity)
+
+    def solve(
+        self,
+        initial_state: PuzzleState,
+        strategy: SessionStrategy = "bfs",
+        timeout: float = 30.0,
+        debug: bool = False,
+        bottle_capacity: int | None = None,
+        prune: bool = False,
+    ) -> SolverResult:
+        """
+        表を参照・更新しながら解法を探索する。引数と戻り値は solver.solve() と同じ。
+        Raises: PuzzleTimeoutError（timeout > 0 かつ制限時間超過時）
+        """
+        start_time = time.perf_counter()
+        capacity = bottle_capacity if bottle_capacity is not None else infer_capacity(initial_state)
+        if is_solved(initial_state, capacity):
+            return SolverResult(
+                solved=True, moves=[], states_visited=0,
+                elapsed_time=time.perf_counter() - start_time,
+            )
+        # 完成済みボトルを除いた状態で表を引いて探索し、手の番号を元に戻す
+        reduction = reduce_puzzle(initial_state, capacity)
+        state = reduction.state
+        if self._dead.is_dead(state, capacity):
+            return SolverResult(
+                solved=False, moves=[], states_visited=0,
+                elapsed_time=time.perf_counter() - start_time,
+            )
+
+        # 色名とボトルの並び順だけが異なるパズルを解いたことがあればその結果を返す
+        form = canonicalize_colors(state)
+        puzzle = self._puzzles.get((capacity, form.state))
+        if puzzle is not None and (puzzle.moves is None or puzzle.exact or strategy != "bfs"):
+            self._hits += 1
+            moves = [from_canonical_move(move, form.order) for move in puzzle.moves or ()]
+            return SolverResult(
+                solved=puzzle.moves is not None, moves=reduction.expand_moves(moves),
+                states_visited=0, elapsed_time=time.perf_counter() - start_time,
+            )
+
+        # 同じ（ボトルの並び順だけが異なる）状態を解いたことがあれば表から復元する
+        exact = strategy == "bfs"
+        known = self._finish(state, capacity, exact)
+        if known is not None:
+            return SolverResult(
+                solved=True, moves=reduction.expand_moves(known), states_visited=0,
+                elapsed_time=time.perf_counter() - start_time,
+            )
+
+        # 探索し尽くして解がなかった場合は solver が訪問した状態をすべて解なし表に記録する
+        result = solve(
+            state,
+            strategy=strategy,
+            timeout=timeout,
+            debug=debug,
+            prune=prune,
+            bottle_capacity=capacity,
+            memo=self._dead,
+            finisher=partial(self._finish, capacity=capacity, exact_only=exact),
+        )
+        if not result.solved:
+            self._puzzles.put((capacity, form.state), _Puzzle(None, True))
+            return result._replace(elapsed_time=time.perf_counter() - start_time)
+        self._record_path(state, result.moves, capacity, exact)
+        self._puzzles.put((capacity, form.state), _Puzzle(
+            tuple(to_canonical_move(move, form.order) for move in result.moves), exact
+        ))
+        return result._replace(
+            moves=reduction.expand_moves(result.moves),
+            elapsed_time=time.perf_counter() - start_time,
+        )
+
+    def _finish(self, state: PuzzleState, capacity: int, exact_only: bool) -> list[Move] | None:
+        """solver.solve() の finisher。解あり表から手順を復元できれば返す。"""
+        moves = self._follow(state, capacity, exact_only)
+        if moves is not None:
+            self._hits += 1
+        return moves
+
+    def _follow(self, state: PuzzleState, capacity: int, exact_only: bool) -> list[Move] | None:
+        """
+        解あり表をたどって state から解決状態までの手順を復元する。
+        表にない場合・途中のエントリが追い出されていた場合は None を返す。
+        """
+        key, order = canonicalize(state)
+        entry = self._solvable.get((capacity, key))
+        if entry is None or (exact_only and not entry.exact):
+            return None
+        moves: list[Move] = []
+        current = state
+        while True:
+            move = from_canonical_move(entry.next_move, order)
+            moves.append(move)
+            current = apply_move(current, move, capacity)
+            if is_solved(current, capacity):
+                return moves
+            key, order = canonicalize(current)
+            previous_distance = entry.distance
+            entry = self._solvable.get((capacity, key))
+            # 追い出し後に別の経路で記録し直された場合は手数が減らないことがある。
+            # 手数が 1 ずつ減る正しい連鎖でなければ使わない（循環も防ぐ）
+            if entry is None or entry.distance != previous_distance - 1 or (
+                exact_only and not entry.exact
+            ):
+                return None
+
+    def _record_path(
+        self, initial_state: PuzzleState, moves: list[Move], capacity: int, exact: bool
+    ) -> None:
+        """解法の経路上の各状態について、解決状態までの手数と次の手を解あり表に記録する。"""
+        current = initial_state
+        for index, move in enumerate(moves):
+            key, order = canonicalize(current)
+            distance = len(moves) - index
+            known = self._solvable.get((capacity, key))
+            # 最短と確定した情報を上界で上書きしない
+            if known is None or (exact and not known.exact) or (
+                exact == known.exact and distance < known.distance
+            ):
+                self._solvable.put(
+                    (capacity, key), _Solvable(distance, to_canonical_move(move, order), exact)
+                )
+            current = apply_move(current, move, capacity)
@@ -1,36 +1,105 @@
-"""BFS / DFS によるウォーターソートパズル解法探索"""
+"""BFS / DFS / 貪欲 DFS / ビームサーチ / IDA* によるウォーターソートパズル解法探索"""
 from __future__ import annotations
 
+import heapq
+import math
 import sys
 import time
-from collections import deque
+from array import array
+from collections.abc import Callable, Iterator
+from functools import partial
+from typing import Any
 
 from src.models import (
-    BOTTLE_CAPACITY,
+    BottleState,
     Move,
     PuzzleState,
     PuzzleTimeoutError,
     SolverResult,
     Strategy,
     apply_move,
+    infer_capacity,
 )
+from src.checkpoint import Checkpoint, Checkpointer
+from src.endgame import endgame_moves
+from src.heuristics import distance_lower_bound, order_moves, state_cost
+from src.interning import BottleTable, InternedState
+from src.memo import MemoTable
+from src.profiler import SearchProfiler
+from src.ranking import MAX_RANKED_STATES, PackedArray, StateRanker
+from src.reduction import reduce_puzzle
 from src.validator import is_solved
 
+# ビームサーチの既定幅（深さごとに保持する状態数）
+DEFAULT_BEAM_WIDTH = 256
 
-def get_legal_moves(state: PuzzleState) -> list[Move]:
+# IDA* の探索で解を見つけたことを表す番兵
+_FOUND = -1
+
+# チェックポイントからの再開に対応した戦略
+_CHECKPOINT_STRATEGIES = ("bfs", "dfs", "greedy")
+
+# 訪問済み状態（ボトル ID のタプル） → その状態に至った手の手コード（_MoveCodec、初期状態は None）
+_ParentMap = dict[InternedState, int | None]
+
+# 状態から解決状態までの既知の手順を返す関数（知らなければ None）
+Finisher = Callable[[PuzzleState], "list[Move] | None"]
+
+# finisher に対応した戦略
+_FINISHER_STRATEGIES = ("bfs", "dfs", "greedy")
+
+
+class _MoveCodec:
+    """
+    手 (注ぎ元, 注ぎ先, 移動したセグメント数) を 1 つの小さな整数（手コード）と相互変換する。
+    parent 表に直前の状態と Move のタプルを持つ代わりに手コードだけを記録し、
+    直前の状態は注ぎを巻き戻して求める（undo()）。
+    手コードと Move は探索開始時にすべて作っておき、同じオブジェクトを共有する。
+    状態は table でインターンしたボトル ID のタプルで扱う。
+    """
+
+    def __init__(self, n_bottles: int, capacity: int, table: BottleTable) -> None:
+        self._table = table
+        self._n_bottles = n_bottles
+        self._span = capacity + 1
+        self._codes = list(range(n_bottles * n_bottles * self._span))
+        self._moves = [
+            (Move(code // self._span // n_bottles, code // self._span % n_bottles), code % self._span)
+            for code in self._codes
+        ]
+
+    def encode(self, state: InternedState, move: Move, next_state: InternedState) -> int:
+        """state に move を適用して next_state になった手の手コードを返す。"""
+        size = self._table.size
+        moved = size(next_state[move.to_bottle]) - size(state[move.to_bottle])
+        return self._codes[
+            (move.from_bottle * self._n_bottles + move.to_bottle) * self._span + moved
+        ]
+
+    def move(self, code: int) -> Move:
+        return self._moves[code][0]
+
+    def undo(self, state: InternedState, code: int) -> tuple[InternedState, Move]:
+        """手コード code の手で state に至る直前の状態と、その手を返す。"""
+        move, moved = self._moves[code]
+        src = self._table.bottle(state[move.from_bottle])
+        dst = self._table.bottle(state[move.to_bottle])
+        bottles = list(state)
+        bottles[move.from_bottle] = self._table.intern(src + dst[len(dst) - moved:])
+        bottles[move.to_bottle] = self._table.intern(dst[:len(dst) - moved])
+        return tuple(bottles), move
+
+
+def get_legal_moves(state: PuzzleState, bottle_capacity: int | None = None) -> list[Move]:
     """
     現在の状態から合法手の一覧を返す。
     合法手の条件:
     - 注ぎ元が空でない
-    - 注ぎ先に空き容量がある（全ボトルの最大長 = ボトル容量 = max len で判定）
+    - 注ぎ先に空き容量がある（bottle_capacity 未指定時は infer_capacity(state) で判定）
     - 注ぎ元の最上層色が注ぎ先の最上層色と一致するか、注ぎ先が空
     """
     n = len(state)
-    # ボトル容量を推定（最大のボトル長か、デフォルト）
-    capacity = max((len(b) for b in state), default=BOTTLE_CAPACITY)
-    # capacity が 0 の場合は BOTTLE_CAPACITY を使う
-    if capacity == 0:
-        capacity = BOTTLE_CAPACITY
+    capacity = bottle_capacity if bottle_capacity is not None else infer_capacity(state)
 
     moves: list[Move] = []
     for frm in range(n):
@@ -53,31 +122,360 @@ def get_legal_moves(state: PuzzleState) -> list[Move]:
     return moves
 
 
+def get_pruned_moves(
+    state: PuzzleState,
+    last_move: Move | None = None,
+    prev_state: PuzzleState | None = None,
+    commute: bool = False,
+    bottle_capacity: int | None = None,
+) -> tuple[list[Move], int]:
+    """
+    get_legal_moves() から、探索上冗長な子を生む手を除外して (手の一覧, 除外数) を返す。
+    除外規則:
+    - 直前の手 a→b の逆手 b→a（祖父状態から 1 手で到達できる状態にしかならない）
+    - 単色ボトルを丸ごと空ボトルへ移す手（ボトルの並べ替えにすぎない）
+    - 空ボトルへの移動は最初の空ボトル宛てのみ（空ボトル同士は交換可能）
+    - commute=True の場合、直前の手と独立な（ボトルが重ならず、空ボトルの増減もない）手は
+      (from, to) が直前の手より大きい順序のみ許す（半順序削減）。prev_state が必要。
+    commute は手を昇順に生成する BFS 専用（各状態の最初の到達経路が辞書順最小になるため）。
+    """
+    capacity = bottle_capacity if bottle_capacity is not None else infer_capacity(state)
+    moves = get_legal_moves(state, capacity)
+    first_empty = next((i for i, b in enumerate(state) if not b), -1)
+
+    kept: list[Move] = []
+    for move in moves:
+        src = state[move.from_bottle]
+        dst = state[move.to_bottle]
+        if last_move is not None and (
+            move.from_bottle == last_move.to_bottle and move.to_bottle == last_move.from_bottle
+        ):
+            continue
+        if not dst:
+            if move.to_bottle != first_empty or src.count(src[-1]) == len(src):
+                continue
+        elif (
+            commute
+            and last_move is not None
+            and prev_state is not None
+            and move < last_move
+            and _is_stable_independent(state, move, last_move, prev_state, capacity)
+        ):
+            continue
+        kept.append(move)
+    return kept, len(moves) - len(kept)
+
+
+def _is_stable_independent(
+    state: PuzzleState,
+    move: Move,
+    last_move: Move,
+    prev_state: PuzzleState,
+    capacity: int,
+) -> bool:
+    """
+    move と last_move が入れ替え可能で、どちらの順でも空ボトルの集合が変わらないか判定する。
+    move の注ぎ先が空でないことは呼び出し側で確認済み。
+    """
+    if {move.from_bottle, move.to_bottle} & {last_move.from_bottle, last_move.to_bottle}:
+        return False
+    # 直前の手が空ボトルへ注いだ、または注ぎ元を空にした場合は独立とみなさない
+    if not prev_state[last_move.to_bottle] or not state[last_move.from_bottle]:
+        return False
+    # move が注ぎ元を空にする場合も同様
+    src = state[move.from_bottle]
+    return src.count(src[-1]) != len(src) or len(src) > capacity - len(state[move.to_bottle])
+
+
 def solve(
     initial_state: PuzzleState,
     strategy: Strategy = "bfs",
     timeout: float = 30.0,
     debug: bool = False,
+    profile: bool = False,
+    prune: bool = False,
+    bottle_capacity: int | None = None,
+    beam_width: int = DEFAULT_BEAM_WIDTH,
+    memo: MemoTable | None = None,
+    ranked: bool = False,
+    ranked_path: str | None = None,
+    checkpointer: Checkpointer | None = None,
+    resume: bool = False,
+    finisher: Finisher | None = None,
 ) -> SolverResult:
     """
     初期状態から解法手順を探索して SolverResult を返す。
-    Raises: PuzzleTimeoutError（timeout > 0 かつ制限時間超過時）
+    bottle_capacity 未指定時は初期状態から infer_capacity() で推定する。
+    strategy="beam" の場合は深さごとに評価上位 beam_width 状態だけを保持する。
+    profile=True の場合はフェーズ別の計測結果を SolverResult.profile に格納する
+    （計測のオーバーヘッドにより探索自体は遅くなる）。
+    prune=True の場合は get_pruned_moves() で冗長な子を生成せず、除外数を
+    SolverResult.moves_pruned に格納する（BFS の最短手数保証は維持される）。
+    strategy="ida" の場合は IDA* で最短手数の解法を探索する。
+    memo を渡すと、解なしと記録済みの状態を展開せず、探索で証明した事実（解なし・
+    解決状態までの手数の下界・上界）を memo に追記する。同じ memo を使い回すことで
+    関連するパズルの探索や、save() / load() を介した別の実行と結果を共有できる。
+    ranked=True の場合（strategy="bfs" のみ）は、訪問済み状態を dict の代わりに
+    src.ranking のランクで引く 2 ビット/状態の表に記録する（_bfs_ranked()）。ranked_path を
+    渡すと表をそのファイルにマップする。prune と memo の解なしの記録は使わない。
+    checkpointer を渡すと（strategy が "bfs" / "dfs" / "greedy" のみ）、訪問済み状態・未展開の状態・
+    カウンタを定期的に書き出し、タイムアウト時にも書き出す。resume=True の場合は checkpointer の
+    ファイルがあればそこから探索を再開する（ファイルがなければ最初から探索する）。
+    再開した探索の経過時間（timeout の判定と SolverResult.elapsed_time）は中断前の分も含む。
+    finisher を渡すと（strategy が "bfs" / "dfs" / "greedy" のみ）、探索中に生成した状態について
+    解決状態までの既知の手順を問い合わせ、手順が返った状態は展開せず終盤の仕上げ手順と同様に扱う。
+    BFS の最短手数保証を保つには、BFS に渡す finisher は最短手順だけを返す必要がある
+    （src.session が解あり表を引くのに使う）。
+    完成済みのボトルと使われることのない空ボトルは src.reduction.reduce_puzzle() で取り除いてから探索し、
+    手の番号は元の状態のボトル番号に戻して返す。
+    複数の戦略を並走させる場合は src.portfolio.solve_portfolio() を使う。
+    Raises: PuzzleTimeoutError（timeout > 0 かつ制限時間超過時）、
+            ValueError（ranked=True で strategy が "bfs" でない、または状態空間が大きすぎる場合、
+            checkpointer・finisher が使えない設定の場合、再開するチェックポイントが別の探索のものか
+            不正な場合）、
+            CheckpointError（チェックポイントの読み書き失敗時）
     """
+    if ranked and strategy != "bfs":
+        raise ValueError(f"ranked は strategy=\"bfs\" でのみ使えます: {strategy}")
+    if finisher is not None and (ranked or strategy not in _FINISHER_STRATEGIES):
+        raise ValueError(
+            f"finisher は strategy が {', '.join(_FINISHER_STRATEGIES)} の場合のみ"
+            f"使えます（ranked は不可）: {strategy}"
+        )
+    if checkpointer is not None:
+        if ranked or strategy not in _CHECKPOINT_STRATEGIES:
+            raise ValueError(
+                f"チェックポイントは strategy が {', '.join(_CHECKPOINT_STRATEGIES)} の場合のみ"
+                f"使えます（ranked は不可）: {strategy}"
+            )
+        if profile:
+            raise ValueError("チェックポイントと profile は同時に使えません")
     start_time = time.perf_counter()
+    profiler = SearchProfiler() if profile else None
+    capacity = bottle_capacity if bottle_capacity is not None else infer_capacity(initial_state)
 
     # 解決済み判定
-    if is_solved(initial_state):
+    if is_solved(initial_state, capacity):
         return SolverResult(
             solved=True,
             moves=[],
             states_visited=0,
             elapsed_time=time.perf_counter() - start_time,
+            profile=profiler.finish() if profiler is not None else None,
+        )
+
+    # 完成済みボトルを除いた小さな問題を解き、手の番号を元に戻す
+    reduction = reduce_puzzle(initial_state, capacity)
+    if reduction.removed:
+        if debug:
+            print(
+                f"[DEBUG] REDUCE: removed {reduction.removed} completed or unusable empty bottles",
+                file=sys.stderr,
+            )
+        result = solve(
+            reduction.state,
+            strategy=strategy,
+            timeout=timeout,
+            debug=debug,
+            profile=profile,
+            prune=prune,
+            bottle_capacity=capacity,
+            beam_width=beam_width,
+            memo=memo,
+            ranked=ranked,
+            ranked_path=ranked_path,
+            checkpointer=checkpointer,
+            resume=resume,
+            finisher=finisher,
+        )
+        return result._replace(
+            moves=reduction.expand_moves(result.moves),
+            elapsed_time=time.perf_counter() - start_time,
+        )
+
+    if memo is not None and memo.is_dead(initial_state, capacity):
+        return SolverResult(
+            solved=False,
+            moves=[],
+            states_visited=0,
+            elapsed_time=time.perf_counter() - start_time,
+            profile=profiler.finish() if profiler is not None else None,
+        )
+
+    resumed: Checkpoint | None = None
+    if checkpointer is not None and resume:
+        resumed = checkpointer.load()
+        if resumed is not None:
+            if not resumed.matches(strategy, capacity, prune, initial_state):
+                raise ValueError(
+                    f"チェックポイントは別のパズルまたは設定の探索のものです: {checkpointer.path}"
+                )
+            start_time -= resumed.elapsed
+            if debug:
+                print(
+                    f"[DEBUG] RESUME: {len(resumed.parent)} states loaded from {checkpointer.path}",
+                    file=sys.stderr,
+                )
+
+    if profiler is not None:
+        profiler.start()
+    try:
+        if ranked:
+            result = _bfs_ranked(initial_state, timeout, debug, start_time, capacity, ranked_path)
+        elif strategy == "bfs":
+            result = _bfs(
+                initial_state, timeout, debug, start_time, capacity, profiler, prune, memo,
+                checkpointer, resumed, finisher,
+            )
+        elif strategy == "beam":
+            result = _beam(
+                initial_state, timeout, debug, start_time, capacity, profiler, prune, beam_width,
+                memo,
+            )
+        elif strategy == "greedy":
+            result = _dfs(
+                initial_state, timeout, debug, start_time, capacity, profiler, prune, True, memo,
+                checkpointer, resumed, finisher,
+            )
+        elif strategy == "ida":
+            result = _ida(
+                initial_state, timeout, debug, start_time, capacity, profiler, prune, memo
+            )
+        else:
+            result = _dfs(
+                initial_state, timeout, debug, start_time, capacity, profiler, prune, False, memo,
+                checkpointer, resumed, finisher,
+            )
+    except PuzzleTimeoutError:
+        if profiler is not None:
+            profiler.finish()  # tracemalloc を停止する
+        raise
+
+    if memo is not None and result.solved:
+        memo.record_solution(
+            initial_state, result.moves, capacity, optimal=strategy in ("bfs", "ida")
         )
+    if profiler is not None:
+        result = result._replace(profile=profiler.finish())
+    return result
+
+
+class _PruningMoveGenerator:
+    """parent に記録された直前の手をもとに get_pruned_moves() を呼び、除外数を累計する"""
+
+    def __init__(
+        self,
+        parent: _ParentMap,
+        codec: _MoveCodec,
+        commute: bool,
+        capacity: int,
+        table: BottleTable,
+    ) -> None:
+        self.parent = parent
+        self.codec = codec
+        self.commute = commute
+        self.capacity = capacity
+        self.table = table
+        self.pruned = 0
+
+    def __call__(self, state: InternedState) -> list[Move]:
+        code = self.parent[state]
+        bottles = self.table.decode(state)
+        if code is None:
+            moves, pruned = get_pruned_moves(bottles, bottle_capacity=self.capacity)
+        elif self.commute:
+            # 入れ替え可能な手の判定には直前の状態が必要
+            prev_state, last_move = self.codec.undo(state, code)
+            moves, pruned = get_pruned_moves(
+                bottles, last_move, self.table.decode(prev_state), True, self.capacity
+            )
+        else:
+            moves, pruned = get_pruned_moves(
+                bottles, self.codec.move(code), bottle_capacity=self.capacity
+            )
+        self.pruned += pruned
+        return moves
 
-    if strategy == "bfs":
-        return _bfs(initial_state, timeout, debug, start_time)
+
+def _best_last(
+    generator: Callable[[InternedState], list[Move]],
+    capacity: int,
+    table: BottleTable,
+) -> Callable[[InternedState], list[Move]]:
+    """有望な手ほど後に返す生成関数（スタックに後から積まれ、先に展開される）"""
+
+    def generate(state: InternedState) -> list[Move]:
+        moves = order_moves(table.decode(state), generator(state), capacity)
+        moves.reverse()
+        return moves
+
+    return generate
+
+
+def _search_functions(
+    parent: _ParentMap,
+    profiler: SearchProfiler | None,
+    capacity: int,
+    generator: Callable[[Any], list[Move]] | None = None,
+    memo: MemoTable | None = None,
+    table: BottleTable | None = None,
+) -> tuple[
+    Callable[[Any], list[Move]],
+    Callable[[Any, Move], Any],
+    Callable[[Any], bool],
+    Callable[[Any], bool],
+]:
+    """
+    探索ループが使う (合法手生成, 手の適用, 訪問済み判定, 解決判定) を返す。計測時は計測付き版を返す。
+    table を渡すと状態をボトル ID のタプル（InternedState）として扱い、渡さなければ PuzzleState として扱う。
+    memo を渡すと、解なしと記録済みの状態も訪問済みとして扱う。
+    """
+    if table is None:
+        legal_moves = generator or partial(get_legal_moves, bottle_capacity=capacity)
+        move_to = partial(apply_move, bottle_capacity=capacity)
+        solved = partial(is_solved, bottle_capacity=capacity)
     else:
-        return _dfs(initial_state, timeout, debug, start_time)
+        legal_moves = generator or table.legal_moves
+        move_to = table.apply
+        solved = table.is_solved
+    seen = parent.__contains__
+    if memo is not None:
+        seen = partial(_seen_or_dead, parent, memo, capacity, table)
+    if profiler is None:
+        return legal_moves, move_to, seen, solved
+    return (
+        profiler.wrap("move_generation", legal_moves),
+        profiler.wrap("apply_move", move_to),
+        profiler.wrap("hashing", seen),
+        profiler.wrap("is_solved", solved),
+    )
+
+
+def _seen_or_dead(
+    parent: _ParentMap,
+    memo: MemoTable,
+    capacity: int,
+    table: BottleTable | None,
+    state: Any,
+) -> bool:
+    if state in parent:
+        return True
+    return memo.is_dead(table.decode(state) if table is not None else state, capacity)
+
+
+def _mark_dead(
+    memo: MemoTable | None,
+    parent: _ParentMap,
+    capacity: int,
+    table: BottleTable,
+) -> None:
+    """
+    探索し尽くして解がなかった場合に、訪問した状態をすべて解なしとして記録する。
+    訪問した状態はどれも初期状態から到達可能なので、解決状態には到達できない。
+    """
+    if memo is not None:
+        for state in parent:
+            memo.mark_dead(table.decode(state), capacity)
 
 
 def _bfs(
@@ -85,78 +483,370 @@ def _bfs(
     timeout: float,
     debug: bool,
     start_time: float,
+    capacity: int,
+    profiler: SearchProfiler | None = None,
+    prune: bool = False,
+    memo: MemoTable | None = None,
+    checkpointer: Checkpointer | None = None,
+    resumed: Checkpoint | None = None,
+    finisher: Finisher | None = None,
 ) -> SolverResult:
-    """幅優先探索（最短手数保証）"""
-    # parent: state → (parent_state, move)
-    parent: dict[PuzzleState, tuple[PuzzleState, Move] | None] = {initial_state: None}
-    queue: deque[PuzzleState] = deque([initial_state])
+    """
+    幅優先探索（最短手数保証）。深さごとのフロンティアを順に展開する。
+    終盤の状態（src.endgame）と finisher が手順を返した状態は展開せず、
+    最短の仕上げ手順をつないだ解法を候補として残す。
+    候補の手数が次に生成する子の深さ以下になった時点で、それより短い解はないので候補を返す。
+    checkpointer を渡すと、現在の深さの未展開の状態と生成済みの次の深さの状態を書き出す。
+    """
+    # 状態はボトル ID のタプルで扱う。parent: state → その状態に至った手の手コード
+    table = _restore_table(capacity, resumed)
+    start = table.encode(initial_state)
+    parent: _ParentMap = resumed.parent if resumed is not None else {start: None}
+    codec = _MoveCodec(len(initial_state), capacity, table)
+    pruner = _PruningMoveGenerator(parent, codec, True, capacity, table) if prune else None
+    legal_moves, move_to, seen, solved = _search_functions(
+        parent, profiler, capacity, pruner, memo, table
+    )
+    uniform = table.is_uniform
+    frontier: list[InternedState] = [start]
+    next_frontier: list[InternedState] = []
+    best: list[Move] | None = None
+    depth = 0
     iterations = 0
+    if resumed is not None:
+        frontier, next_frontier = resumed.frontier, resumed.next_frontier
+        best, depth, iterations = resumed.best, resumed.depth, resumed.iterations
+        if pruner is not None:
+            pruner.pruned = resumed.moves_pruned
 
-    while queue:
-        # タイムアウトチェック
-        if timeout > 0:
-            elapsed = time.perf_counter() - start_time
-            if elapsed >= timeout:
-                raise PuzzleTimeoutError(
-                    f"探索がタイムアウトしました（{elapsed:.1f}秒）"
-                    f"、訪問済み状態数: {len(parent)}"
-                )
+    def snapshot(index: int) -> Checkpoint:
+        """frontier[index] 以降を未展開とする途中経過"""
+        return Checkpoint(
+            "bfs", capacity, prune, initial_state, table.bottles(), parent,
+            frontier[index:], next_frontier, depth, best, iterations,
+            pruner.pruned if pruner is not None else 0, time.perf_counter() - start_time,
+        )
 
-        iterations += 1
-        if debug and iterations % 1000 == 0:
-            elapsed = time.perf_counter() - start_time
-            print(
-                f"[DEBUG] BFS: {len(parent)} states visited, {elapsed:.2f}s",
-                file=sys.stderr,
-            )
+    while frontier:
+        # これから生成する子は深さ depth + 1。候補より短い解はもう見つからない
+        if best is not None and len(best) <= depth + 1:
+            break
+        for index, current in enumerate(frontier):
+            # タイムアウトチェック
+            if timeout > 0:
+                elapsed = time.perf_counter() - start_time
+                if elapsed >= timeout:
+                    if checkpointer is not None:
+                        _save_checkpoint(checkpointer, snapshot(index), debug)
+                    raise PuzzleTimeoutError(
+                        f"探索がタイムアウトしました（{elapsed:.1f}秒）"
+                        f"、訪問済み状態数: {len(parent)}"
+                    )
+            if checkpointer is not None and checkpointer.due():
+                _save_checkpoint(checkpointer, snapshot(index), debug)
 
-        current = queue.popleft()
+            iterations += 1
+            if debug and iterations % 1000 == 0:
+                elapsed = time.perf_counter() - start_time
+                print(
+                    f"[DEBUG] BFS: {len(parent)} states visited, {elapsed:.2f}s",
+                    file=sys.stderr,
+                )
 
-        for move in get_legal_moves(current):
-            next_state = apply_move(current, move)
-            if next_state in parent:
-                continue
-            parent[next_state] = (current, move)
+            generated = duplicates = 0
+            for move in legal_moves(current):
+                next_state = move_to(current, move)
+                generated += 1
+                if seen(next_state):
+                    duplicates += 1
+                    continue
+                parent[next_state] = codec.encode(current, move, next_state)
 
-            if is_solved(next_state):
-                moves = _reconstruct_path(parent, initial_state, next_state)
-                return SolverResult(
-                    solved=True,
-                    moves=moves,
-                    states_visited=len(parent),
-                    elapsed_time=time.perf_counter() - start_time,
-                )
-            queue.append(next_state)
+                if solved(next_state):
+                    if profiler is not None:
+                        profiler.record_expansion(depth, generated, duplicates)
+                    moves = _reconstruct_path(parent, codec, next_state)
+                    return SolverResult(
+                        solved=True,
+                        moves=moves,
+                        states_visited=len(parent),
+                        elapsed_time=time.perf_counter() - start_time,
+                        moves_pruned=pruner.pruned if pruner is not None else 0,
+                    )
+                # 終盤なら展開せず、最短の仕上げ手順をつないだ解法を候補にする
+                tail = _endgame(table, capacity, next_state) if uniform(next_state) else None
+                if tail is None and finisher is not None:
+                    tail = finisher(table.decode(next_state))
+                if tail is not None:
+                    if best is None or depth + 1 + len(tail) < len(best):
+                        best = _reconstruct_path(parent, codec, next_state) + tail
+                    continue
+                next_frontier.append(next_state)
+            if profiler is not None:
+                profiler.record_expansion(depth, generated, duplicates)
+
+        frontier = next_frontier
+        next_frontier = []
+        depth += 1
 
+    if best is not None:
+        return SolverResult(
+            solved=True,
+            moves=best,
+            states_visited=len(parent),
+            elapsed_time=time.perf_counter() - start_time,
+            moves_pruned=pruner.pruned if pruner is not None else 0,
+        )
+    _mark_dead(memo, parent, capacity, table)
     return SolverResult(
         solved=False,
         moves=[],
         states_visited=len(parent),
         elapsed_time=time.perf_counter() - start_time,
+        moves_pruned=pruner.pruned if pruner is not None else 0,
     )
 
 
+def _bfs_ranked(
+    initial_state: PuzzleState,
+    timeout: float,
+    debug: bool,
+    start_time: float,
+    capacity: int,
+    path: str | None = None,
+) -> SolverResult:
+    """
+    訪問済み状態をランクで引く表に記録する幅優先探索（最短手数保証）。
+    ボトルの並び順を無視した状態ごとに 深さ mod 3 + 1（0 は未訪問）を 2 ビットで記録し、
+    フロンティアも状態の代わりにランクの配列で持つ。表は正規形の総数（StateRanker.size）の
+    大きさで、状態あたりのメモリは dict の parent 表よりはるかに小さい。
+    解法は解決状態から、表の値が 1 つ前の深さに一致する直前の状態を注ぎの巻き戻しで辿って復元する。
+    Raises: ValueError（状態空間が MAX_RANKED_STATES を超える場合）
+    """
+    ranker = StateRanker.for_state(initial_state, capacity)
+    # 正規形の総数を数えるまでもなく大きすぎる状態空間は、下界で先に弾く
+    lower_bound = ranker.upper_bound // math.factorial(len(initial_state))
+    if lower_bound > MAX_RANKED_STATES:
+        raise ValueError(
+            f"状態空間が大きすぎてランクの表を確保できません（{lower_bound} 状態以上）"
+        )
+    if ranker.size > MAX_RANKED_STATES:
+        raise ValueError(
+            f"状態空間が大きすぎてランクの表を確保できません（{ranker.size} 状態）"
+        )
+    with PackedArray(ranker.size, 2, path) as depths:
+        start = ranker.rank(initial_state)
+        depths[start] = 1
+        frontier = array("Q", [start])
+        visited = 1
+        depth = 0
+        iterations = 0
+
+        while frontier:
+            mark = (depth + 1) % 3 + 1
+            next_frontier = array("Q")
+            for rank in frontier:
+                # タイムアウトチェック
+                if timeout > 0:
+                    elapsed = time.perf_counter() - start_time
+                    if elapsed >= timeout:
+                        raise PuzzleTimeoutError(
+                            f"探索がタイムアウトしました（{elapsed:.1f}秒）"
+                            f"、訪問済み状態数: {visited}"
+                        )
+
+                iterations += 1
+                if debug and iterations % 1000 == 0:
+                    elapsed = time.perf_counter() - start_time
+                    print(
+                        f"[DEBUG] RANKED BFS: {visited} states visited, {elapsed:.2f}s",
+                        file=sys.stderr,
+                    )
+
+                current = ranker.unrank(rank)
+                for move in get_legal_moves(current, capacity):
+                    next_state = apply_move(current, move, capacity)
+                    next_rank = ranker.rank(next_state)
+                    if depths[next_rank]:
+                        continue
+                    depths[next_rank] = mark
+                    visited += 1
+                    if is_solved(next_state, capacity):
+                        moves = _unwind_ranked(
+                            initial_state, next_state, depth + 1, ranker, depths, capacity
+                        )
+                        return SolverResult(
+                            solved=True,
+                            moves=moves,
+                            states_visited=visited,
+                            elapsed_time=time.perf_counter() - start_time,
+                        )
+                    next_frontier.append(next_rank)
+            frontier = next_frontier
+            depth += 1
+
+    return SolverResult(
+        solved=False,
+        moves=[],
+        states_visited=visited,
+        elapsed_time=time.perf_counter() - start_time,
+    )
+
+
+def _unwind_ranked(
+    initial_state: PuzzleState,
+    goal_state: PuzzleState,
+    goal_depth: int,
+    ranker: StateRanker,
+    depths: PackedArray,
+    capacity: int,
+) -> list[Move]:
+    """
+    _bfs_ranked() の深さ表を解決状態から遡って手順を復元し、初期状態のボトル番号に直して返す。
+    表は深さ mod 3 しか持たず、注ぎは元に戻せるとは限らないため、値が一致する直前の状態の
+    深さが 1 つ前とは限らない（3 以上深い状態も同じ値になる）。そこで値が一致する直前の状態を
+    深さ優先で辿り、ちょうど goal_depth 手で初期状態（ボトルの並び順は無視）に着く経路を返す。
+    行き止まりだった (ランク, 深さ) は記録して二度と辿らない。
+    遡った先は初期状態とボトルの並び順だけが異なる状態になる。
+    """
+    start = ranker.rank(initial_state)
+    failed: set[tuple[int, int]] = set()
+    # スタックの各要素は (状態, 深さ, 直前の状態の候補のイテレータ)
+    path: list[Move] = []
+    stack = [(goal_state, goal_depth, _predecessors(goal_state, capacity))]
+    while stack:
+        state, depth, candidates = stack[-1]
+        for previous, move in candidates:
+            previous_rank = ranker.rank(previous)
+            if depths[previous_rank] != (depth - 1) % 3 + 1 or (previous_rank, depth - 1) in failed:
+                continue
+            if depth == 1:
+                if previous_rank != start:
+                    continue
+                path.append(move)
+                state = previous
+                stack.clear()
+                break
+            path.append(move)
+            stack.append((previous, depth - 1, _predecessors(previous, capacity)))
+            break
+        else:
+            failed.add((ranker.rank(state), depth))
+            stack.pop()
+            if path:
+                path.pop()
+    else:
+        if len(path) != goal_depth:
+            raise AssertionError("深さ表に直前の状態が見つかりません")
+    moves = path[::-1]
+
+    # 遡った先のボトル i が初期状態のボトル order[i] に対応する
+    unused: dict[BottleState, list[int]] = {}
+    for index in range(len(initial_state) - 1, -1, -1):
+        unused.setdefault(initial_state[index], []).append(index)
+    order = [unused[bottle].pop() for bottle in state]
+    return [Move(order[move.from_bottle], order[move.to_bottle]) for move in moves]
+
+
+def _predecessors(
+    state: PuzzleState, capacity: int
+) -> Iterator[tuple[PuzzleState, Move]]:
+    """
+    1 手で state になる直前の状態と、その手をすべて列挙する（注ぎの巻き戻し）。
+    注ぎ先の最上層の同色ブロックから k セグメントを注ぎ元に戻した状態のうち、
+    その状態で同じ手を指すとちょうど k セグメントが移るものだけを返す。
+    """
+    n = len(state)
+    for to in range(n):
+        dst = state[to]
+        if not dst:
+            continue
+        color = dst[-1]
+        run = 1
+        while run < len(dst) and dst[-run - 1] == color:
+            run += 1
+        for frm in range(n):
+            if frm == to:
+                continue
+            src = state[frm]
+            # 注ぎ元の最上層が同色なら、注ぎ先が満杯になって止まった場合しか k で止まらない
+            if src and src[-1] == color and len(dst) != capacity:
+                continue
+            for k in range(1, run + 1):
+                if len(src) + k > capacity:
+                    break
+                # 注ぎ先のブロックを丸ごと戻す場合、注ぎ先は空だったはず（別の色の上には注げない）
+                if k == run and run < len(dst):
+                    break
+                bottles = list(state)
+                bottles[frm] = src + (color,) * k
+                bottles[to] = dst[:-k]
+                yield tuple(bottles), Move(frm, to)
+
+
 def _dfs(
     initial_state: PuzzleState,
     timeout: float,
     debug: bool,
     start_time: float,
+    capacity: int,
+    profiler: SearchProfiler | None = None,
+    prune: bool = False,
+    ordered: bool = False,
+    memo: MemoTable | None = None,
+    checkpointer: Checkpointer | None = None,
+    resumed: Checkpoint | None = None,
+    finisher: Finisher | None = None,
 ) -> SolverResult:
-    """深さ優先探索（高速探索、最適性保証なし）"""
-    # parent: state → (parent_state, move) | None（初期状態）
-    parent: dict[PuzzleState, tuple[PuzzleState, Move] | None] = {initial_state: None}
-    stack: list[PuzzleState] = [initial_state]
+    """
+    深さ優先探索（高速探索、最適性保証なし）。
+    ordered=True の場合は heuristics.order_moves() の評価が高い手から展開する（貪欲 DFS）。
+    終盤の状態（src.endgame）か finisher が手順を返す状態に到達した時点で、その手順をつないで返す。
+    checkpointer を渡すと、スタックに積んだ未展開の状態を書き出す。
+    """
+    # 状態はボトル ID のタプルで扱う。parent: state → その状態に至った手の手コード | None（初期状態）
+    table = _restore_table(capacity, resumed)
+    start = table.encode(initial_state)
+    parent: _ParentMap = resumed.parent if resumed is not None else {start: None}
+    codec = _MoveCodec(len(initial_state), capacity, table)
+    # DFS は手の展開順が辞書順でないため、入れ替え可能な手の削減は行わない
+    pruner = _PruningMoveGenerator(parent, codec, False, capacity, table) if prune else None
+    generator = pruner or table.legal_moves
+    if ordered:
+        generator = _best_last(generator, capacity, table)
+    legal_moves, move_to, seen, solved = _search_functions(
+        parent, profiler, capacity, generator, memo, table
+    )
+    uniform = table.is_uniform
+    stack: list[InternedState] = [start]
+    # 計測時のみ各状態の深さを記録する
+    depth_of: dict[InternedState, int] | None = {start: 0} if profiler is not None else None
     iterations = 0
+    if resumed is not None:
+        stack, iterations = resumed.frontier, resumed.iterations
+        if pruner is not None:
+            pruner.pruned = resumed.moves_pruned
+
+    def snapshot() -> Checkpoint:
+        return Checkpoint(
+            "greedy" if ordered else "dfs", capacity, prune, initial_state, table.bottles(),
+            parent, stack, [], 0, None, iterations,
+            pruner.pruned if pruner is not None else 0, time.perf_counter() - start_time,
+        )
 
     while stack:
         # タイムアウトチェック
         if timeout > 0:
             elapsed = time.perf_counter() - start_time
             if elapsed >= timeout:
+                if checkpointer is not None:
+                    _save_checkpoint(checkpointer, snapshot(), debug)
                 raise PuzzleTimeoutError(
                     f"探索がタイムアウトしました（{elapsed:.1f}秒）"
                     f"、訪問済み状態数: {len(parent)}"
                 )
+        if checkpointer is not None and checkpointer.due():
+            _save_checkpoint(checkpointer, snapshot(), debug)
 
         iterations += 1
         if debug and iterations % 1000 == 0:
@@ -167,44 +857,355 @@ def _dfs(
             )
 
         current = stack.pop()
+        depth = depth_of[current] if depth_of is not None else 0
 
-        for move in get_legal_moves(current):
-            next_state = apply_move(current, move)
-            if next_state in parent:
+        generated = duplicates = 0
+        for move in legal_moves(current):
+            next_state = move_to(current, move)
+            generated += 1
+            if seen(next_state):
+                duplicates += 1
                 continue
-            parent[next_state] = (current, move)
+            parent[next_state] = codec.encode(current, move, next_state)
+            if depth_of is not None:
+                depth_of[next_state] = depth + 1
 
-            if is_solved(next_state):
-                moves = _reconstruct_path(parent, initial_state, next_state)
+            tail = [] if solved(next_state) else None
+            if tail is None and uniform(next_state):
+                tail = _endgame(table, capacity, next_state)
+            if tail is None and finisher is not None:
+                tail = finisher(table.decode(next_state))
+            if tail is not None:
+                if profiler is not None:
+                    profiler.record_expansion(depth, generated, duplicates)
+                moves = _reconstruct_path(parent, codec, next_state) + tail
                 return SolverResult(
                     solved=True,
                     moves=moves,
                     states_visited=len(parent),
                     elapsed_time=time.perf_counter() - start_time,
+                    moves_pruned=pruner.pruned if pruner is not None else 0,
                 )
             stack.append(next_state)
+        if profiler is not None:
+            profiler.record_expansion(depth, generated, duplicates)
 
+    _mark_dead(memo, parent, capacity, table)
     return SolverResult(
         solved=False,
         moves=[],
         states_visited=len(parent),
         elapsed_time=time.perf_counter() - start_time,
+        moves_pruned=pruner.pruned if pruner is not None else 0,
     )
 
 
-def _reconstruct_path(
-    parent: dict[PuzzleState, tuple[PuzzleState, Move] | None],
+def _beam(
     initial_state: PuzzleState,
-    goal_state: PuzzleState,
+    timeout: float,
+    debug: bool,
+    start_time: float,
+    capacity: int,
+    profiler: SearchProfiler | None = None,
+    prune: bool = False,
+    width: int = DEFAULT_BEAM_WIDTH,
+    memo: MemoTable | None = None,
+) -> SolverResult:
+    """
+    ビームサーチ（最適性保証なし）。深さごとに heuristics.state_cost() の小さい順に
+    width 状態だけを残すため、メモリは O(width × 深さ) に抑えられる。
+    ビームが途絶えた場合は幅を 2 倍にして最初からやり直す。一度も状態を切り捨てずに
+    途絶えた場合は全探索と同じなので、解なしと判定して終了する。
+    """
+    states_visited = 0
+    moves_pruned = 0
+    while True:
+        result, truncated = _beam_pass(
+            initial_state, timeout, debug, start_time, capacity, profiler, prune, width, memo
+        )
+        states_visited += result.states_visited
+        moves_pruned += result.moves_pruned
+        if result.solved or not truncated:
+            return result._replace(states_visited=states_visited, moves_pruned=moves_pruned)
+        width *= 2
+        if debug:
+            elapsed = time.perf_counter() - start_time
+            print(
+                f"[DEBUG] BEAM: beam died out, restarting with width {width}, {elapsed:.2f}s",
+                file=sys.stderr,
+            )
+
+
+def _beam_pass(
+    initial_state: PuzzleState,
+    timeout: float,
+    debug: bool,
+    start_time: float,
+    capacity: int,
+    profiler: SearchProfiler | None,
+    prune: bool,
+    width: int,
+    memo: MemoTable | None = None,
+) -> tuple[SolverResult, bool]:
+    """幅 width のビームサーチを 1 回行い (結果, 状態を切り捨てたか) を返す。"""
+    # 状態はボトル ID のタプルで扱い、parent にはビームに残した状態だけを記録する
+    table = BottleTable(capacity)
+    start = table.encode(initial_state)
+    parent: _ParentMap = {start: None}
+    codec = _MoveCodec(len(initial_state), capacity, table)
+    # 展開順が BFS と異なるため、入れ替え可能な手の削減は行わない
+    pruner = _PruningMoveGenerator(parent, codec, False, capacity, table) if prune else None
+    legal_moves, move_to, seen, solved = _search_functions(
+        parent, profiler, capacity, pruner, memo, table
+    )
+    uniform = table.is_uniform
+    beam: list[InternedState] = [start]
+    depth = 0
+    iterations = 0
+    truncated = False
+
+    while beam:
+        candidates: dict[InternedState, int] = {}
+        for current in beam:
+            # タイムアウトチェック
+            if timeout > 0:
+                elapsed = time.perf_counter() - start_time
+                if elapsed >= timeout:
+                    raise PuzzleTimeoutError(
+                        f"探索がタイムアウトしました（{elapsed:.1f}秒）"
+                        f"、訪問済み状態数: {len(parent)}"
+                    )
+
+            iterations += 1
+            if debug and iterations % 1000 == 0:
+                elapsed = time.perf_counter() - start_time
+                print(
+                    f"[DEBUG] BEAM: depth {depth}, width {width}, "
+                    f"{len(parent)} states kept, {elapsed:.2f}s",
+                    file=sys.stderr,
+                )
+
+            generated = duplicates = 0
+            for move in legal_moves(current):
+                next_state = move_to(current, move)
+                generated += 1
+                if seen(next_state) or next_state in candidates:
+                    duplicates += 1
+                    continue
+                candidates[next_state] = code = codec.encode(current, move, next_state)
+
+                tail = [] if solved(next_state) else None
+                if tail is None and uniform(next_state):
+                    tail = _endgame(table, capacity, next_state)
+                if tail is not None:
+                    if profiler is not None:
+                        profiler.record_expansion(depth, generated, duplicates)
+                    parent[next_state] = code
+                    moves = _reconstruct_path(parent, codec, next_state) + tail
+                    return SolverResult(
+                        solved=True,
+                        moves=moves,
+                        states_visited=len(parent),
+                        elapsed_time=time.perf_counter() - start_time,
+                        moves_pruned=pruner.pruned if pruner is not None else 0,
+                    ), truncated
+            if profiler is not None:
+                profiler.record_expansion(depth, generated, duplicates)
+
+        if len(candidates) > width:
+            truncated = True
+        # 同点の状態は生成順を保つ（heapq.nsmallest は安定）
+        beam = heapq.nsmallest(width, candidates, key=lambda s: state_cost(table.decode(s), capacity))
+        for state in beam:
+            parent[state] = candidates[state]
+        depth += 1
+
+    if not truncated:
+        _mark_dead(memo, parent, capacity, table)
+    return SolverResult(
+        solved=False,
+        moves=[],
+        states_visited=len(parent),
+        elapsed_time=time.perf_counter() - start_time,
+        moves_pruned=pruner.pruned if pruner is not None else 0,
+    ), truncated
+
+
+def _ida(
+    initial_state: PuzzleState,
+    timeout: float,
+    debug: bool,
+    start_time: float,
+    capacity: int,
+    profiler: SearchProfiler | None = None,
+    prune: bool = False,
+    memo: MemoTable | None = None,
+) -> SolverResult:
+    """
+    IDA*（反復深化 A*、最短手数保証）。手数 + 下界 が閾値以下の経路だけを深さ優先で展開し、
+    解がなければ閾値を超えた値の最小値まで閾値を上げて繰り返す。
+    下界には heuristics.distance_lower_bound() と memo に記録済みの下界の大きい方を使う。
+    調べ尽くした部分木の根には、その部分木で示せた下界（子がすべて解なしなら解なし）を
+    memo に記録するため、同じ状態に余裕のない手数で再び到達した場合は展開せずに打ち切る。
+    IDA* は解がないと停止しないため、先に貪欲 DFS で解の有無を確かめる。貪欲 DFS で
+    見つからなければ解なしが確定し、見つかればその手数に閾値が達した時点で最短と確定する。
+    memo に初期状態の上界（以前の実行で見つけた解の手数）があれば解の存在は確定しているので
+    貪欲 DFS を省き、閾値が上界に達するまでに必ず解が見つかる。
+    """
+    memo = memo if memo is not None else MemoTable()
+    upper = memo.upper_bound(initial_state, capacity)
+    greedy: SolverResult | None = None
+    if upper is None:
+        greedy = _dfs(
+            initial_state, timeout, debug, start_time, capacity, profiler, prune, True, memo
+        )
+        if not greedy.solved:
+            return greedy
+        upper = len(greedy.moves)
+
+    # 直前の手に依存する削減（逆手・入れ替え）は部分木の下界を経路依存にするため使わず、
+    # 状態だけで決まる空ボトル・単色ボトルの対称性による削減のみ行う
+    pruned = 0
+
+    def generate(state: PuzzleState) -> list[Move]:
+        nonlocal pruned
+        if not prune:
+            return get_legal_moves(state, capacity)
+        moves, count = get_pruned_moves(state, bottle_capacity=capacity)
+        pruned += count
+        return moves
+
+    legal_moves, move_to, _, solved = _search_functions({}, profiler, capacity, generate)
+    path: list[Move] = []
+    expanded = 0
+
+    def search(state: PuzzleState, g: int, bound: int) -> float:
+        """閾値 bound で state 以下を探索し、解があれば _FOUND、なければ閾値を超えた最小値を返す。"""
+        nonlocal expanded
+        if memo.is_dead(state, capacity):
+            return math.inf
+        f = g + max(distance_lower_bound(state, capacity), memo.lower_bound(state, capacity))
+        if f > bound:
+            return f
+        if solved(state):
+            return _FOUND
+        # 終盤なら仕上げ手順の手数が正確な残り手数
+        tail = endgame_moves(state, capacity)
+        if tail is not None:
+            if g + len(tail) > bound:
+                return g + len(tail)
+            path.extend(reversed(tail))
+            return _FOUND
+
+        expanded += 1
+        # タイムアウトチェック
+        if timeout > 0 and expanded % 1000 == 0:
+            elapsed = time.perf_counter() - start_time
+            if elapsed >= timeout:
+                raise PuzzleTimeoutError(
+                    f"探索がタイムアウトしました（{elapsed:.1f}秒）"
+                    f"、訪問済み状態数: {_states_visited(greedy) + expanded}"
+                )
+
+        minimum = math.inf
+        generated = 0
+        for move in order_moves(state, legal_moves(state), capacity):
+            generated += 1
+            t = search(move_to(state, move), g + 1, bound)
+            if t == _FOUND:
+                path.append(move)
+                return _FOUND
+            minimum = min(minimum, t)
+        if profiler is not None:
+            profiler.record_expansion(g, generated, 0)
+        # state 以下の経路はどれも minimum - g 手未満では解決状態に達しない
+        if minimum == math.inf:
+            memo.mark_dead(state, capacity)
+        else:
+            memo.record_lower_bound(state, capacity, int(minimum) - g)
+        return minimum
+
+    bound = max(
+        distance_lower_bound(initial_state, capacity), memo.lower_bound(initial_state, capacity)
+    )
+    while True:
+        if greedy is not None and bound >= upper:
+            # 閾値が貪欲 DFS の手数に達したので、貪欲 DFS の解が最短
+            moves = greedy.moves
+            break
+        if greedy is None and bound > upper:
+            # 記録された上界までに解がない（別のパズルのメモ表など）。貪欲 DFS で確かめ直す
+            greedy = _dfs(
+                initial_state, timeout, debug, start_time, capacity, profiler, prune, True, memo
+            )
+            if not greedy.solved:
+                return greedy._replace(states_visited=greedy.states_visited + expanded)
+            upper = len(greedy.moves)
+            continue
+        t = search(initial_state, 0, bound)
+        if t == _FOUND:
+            path.reverse()
+            moves = path
+            break
+        if debug:
+            elapsed = time.perf_counter() - start_time
+            print(
+                f"[DEBUG] IDA*: bound {bound} exhausted, {expanded} states expanded, "
+                f"{memo.hits} memo hits, {elapsed:.2f}s",
+                file=sys.stderr,
+            )
+        # 上界を超える閾値では探索しない
+        bound = int(min(t, upper + 1))
+
+    return SolverResult(
+        solved=True,
+        moves=moves,
+        states_visited=_states_visited(greedy) + expanded,
+        elapsed_time=time.perf_counter() - start_time,
+        moves_pruned=(greedy.moves_pruned if greedy is not None else 0) + pruned,
+    )
+
+
+def _states_visited(result: SolverResult | None) -> int:
+    return result.states_visited if result is not None else 0
+
+
+def _restore_table(capacity: int, resumed: Checkpoint | None) -> BottleTable:
+    """再開時はチェックポイントのボトルを同じ順に割り当て、保存時と同じボトル ID にした表を返す"""
+    table = BottleTable(capacity)
+    if resumed is not None:
+        for bottle in resumed.bottles:
+            table.intern(bottle)
+    return table
+
+
+def _save_checkpoint(checkpointer: Checkpointer, checkpoint: Checkpoint, debug: bool) -> None:
+    checkpointer.save(checkpoint)
+    if debug:
+        print(
+            f"[DEBUG] CHECKPOINT: {len(checkpoint.parent)} states saved to {checkpointer.path} "
+            f"in {checkpointer.last_cost:.2f}s",
+            file=sys.stderr,
+        )
+
+
+def _endgame(table: BottleTable, capacity: int, state: InternedState) -> list[Move] | None:
+    """全ボトルが空または単色の state（table.is_uniform() で判定済み）の仕上げ手順を返す"""
+    return endgame_moves(table.decode(state), capacity)
+
+
+def _reconstruct_path(
+    parent: _ParentMap,
+    codec: _MoveCodec,
+    goal_state: InternedState,
 ) -> list[Move]:
-    """解決状態から初期状態へ遡って手順を復元する"""
+    """解決状態から手コードの注ぎを巻き戻しながら初期状態へ遡って手順を復元する"""
     moves: list[Move] = []
     current = goal_state
-    while current != initial_state:
-        entry = parent[current]
-        assert entry is not None
-        prev_state, move = entry
+    code = parent[current]
+    while code is not None:
+        current, move = codec.undo(current, code)
         moves.append(move)
-        current = prev_state
+        code = parent[current]
     moves.reverse()
     return moves
@@ -0,0 +1,50 @@
+"""複数のテストモジュールで共有するパズルと解の検証ヘルパー"""
+from src.models import BOTTLE_CAPACITY, Move, PuzzleState, apply_move
+from src.solver import get_legal_moves
+from src.validator import is_solved
+
+
+def make_capacity4_solvable() -> PuzzleState:
+    return (
+        ("red", "blue", "red", "blue"),
+        ("blue", "red", "blue", "red"),
+        (),
+        (),
+    )
+
+
+def make_three_color_puzzle() -> PuzzleState:
+    return (
+        ("red", "blue", "green", "red"),
+        ("green", "red", "blue", "blue"),
+        ("blue", "green", "red", "green"),
+        (),
+        (),
+    )
+
+
+def make_eight_color_puzzle() -> PuzzleState:
+    colors = ["c0", "c1", "c2", "c3", "c4", "c5", "c6", "c7"]
+    segments = [colors[(i * 3 + i // 8) % 8] for i in range(32)]
+    return tuple(tuple(segments[i * 4:(i + 1) * 4]) for i in range(8)) + ((), ())
+
+
+def make_unsolvable() -> PuzzleState:
+    """全ボトルが満杯で最上層の色がすべて異なり、合法手がない"""
+    return (
+        ("red", "blue", "green", "yellow"),
+        ("yellow", "green", "blue", "red"),
+        ("blue", "red", "yellow", "green"),
+        ("green", "yellow", "red", "blue"),
+    )
+
+
+def assert_solves(
+    state: PuzzleState, moves: list[Move], capacity: int = BOTTLE_CAPACITY
+) -> None:
+    """moves がすべて合法手で、state に順に適用すると解決状態になることを確認する"""
+    current = state
+    for move in moves:
+        assert move in get_legal_moves(current, capacity)
+        current = apply_move(current, move, capacity)
+    assert is_solved(current, capacity)
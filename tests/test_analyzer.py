@@ -0,0 +1,109 @@
+"""src/analyzer.py のテスト"""
+import json
+
+import pytest
+import yaml
+from src.analyzer import analyze_state_space, compute_distances, format_analysis, read_state_graph
+from src.models import ParseError, PuzzleState, PuzzleTimeoutError, apply_move
+from src.solver import get_legal_moves, solve
+from src.validator import is_solved
+from tests.puzzles import make_unsolvable
+
+
+def make_two_color_puzzle() -> PuzzleState:
+    return (
+        ("red", "blue", "red", "blue"),
+        ("blue", "red", "blue", "red"),
+        (),
+        (),
+    )
+
+
+def reachable_states(state: PuzzleState, capacity: int) -> set:
+    seen = {state}
+    stack = [state]
+    while stack:
+        current = stack.pop()
+        for move in get_legal_moves(current, capacity):
+            next_state = apply_move(current, move, capacity)
+            if next_state not in seen:
+                seen.add(next_state)
+                stack.append(next_state)
+    return seen
+
+
+def test_counts_match_exhaustive_search():
+    state = make_two_color_puzzle()
+    stats = analyze_state_space(state)
+    reachable = reachable_states(state, 4)
+    assert stats.states == len(reachable)
+    assert stats.edges == sum(len(get_legal_moves(s, 4)) for s in reachable)
+    assert stats.solved_states == sum(1 for s in reachable if is_solved(s, 4))
+    assert stats.initial_distance == len(solve(state).moves)
+    assert sum(stats.distance_histogram.values()) + stats.dead_states == stats.states
+    assert sum(stats.depth_histogram.values()) == stats.states
+    assert stats.max_distance == max(stats.distance_histogram)
+
+
+def test_canonical_distances_merge_bottle_orders():
+    state = make_two_color_puzzle()
+    full = compute_distances(state)
+    merged = compute_distances(state, canonical=True)
+    assert len(merged.states) < len(full.states)
+    distance_of = {
+        full.codec.canonical(data): distance for data, distance in zip(full.states, full.distances)
+    }
+    assert dict(zip(merged.states, merged.distances)) == distance_of
+    with pytest.raises(ValueError):
+        compute_distances(state, canonical=True, max_states=len(merged.states) - 1)
+
+
+def test_unsolvable_puzzle():
+    stats = analyze_state_space(make_unsolvable())
+    assert stats.initial_distance is None
+    assert stats.dead_states == stats.states
+    assert stats.stuck_states == 1  # 合法手がない
+    assert stats.distance_histogram == {}
+
+
+def test_graph_export_roundtrip_with_disk_spill(tmp_path):
+    state = make_two_color_puzzle()
+    path = str(tmp_path / "graph.wsg")
+    # 辺を数個ごとに一時ファイルへ書き出しても同じ結果になる
+    stats = analyze_state_space(state, graph_path=path, spill_edges=3, spill_dir=str(tmp_path))
+    assert stats == analyze_state_space(state)._replace(elapsed_time=stats.elapsed_time)
+    graph = read_state_graph(path)
+    assert graph.initial_state == state
+    assert graph.capacity == 4
+    assert len(graph.states) == stats.states
+    assert len(graph.targets) == stats.edges
+    for index in range(len(graph.states)):
+        current = graph.states[index]
+        expected = [apply_move(current, m, 4) for m in get_legal_moves(current, 4)]
+        assert [graph.states[t] for t in graph.successors(index)] == expected
+        result = solve(current, bottle_capacity=4)
+        assert graph.distances[index] == (len(result.moves) if result.solved else -1)
+
+
+def test_read_state_graph_rejects_other_files(tmp_path):
+    path = tmp_path / "graph.wsg"
+    path.write_bytes(b"XXXX" + bytes(40))
+    with pytest.raises(ParseError):
+        read_state_graph(str(path))
+
+
+def test_timeout():
+    state: PuzzleState = tuple(
+        tuple(f"c{(i * 3 + j) % 8}" for j in range(4)) for i in range(8)
+    ) + ((), ())
+    with pytest.raises(PuzzleTimeoutError):
+        analyze_state_space(state, timeout=0.01)
+
+
+def test_format_analysis():
+    stats = analyze_state_space(make_two_color_puzzle())
+    assert "到達可能な状態数" in format_analysis(stats, "text")
+    assert json.loads(format_analysis(stats, "json"))["states"] == stats.states
+    assert yaml.safe_load(format_analysis(stats, "yaml"))["edges"] == stats.edges
+    with pytest.raises(ValueError):
+        format_analysis(stats, "binary")
@@ -0,0 +1,128 @@
+"""src/binary_format.py の単体テスト"""
+import os
+import tempfile
+
+import pytest
+
+from src.binary_format import (
+    BinaryRecord,
+    BinaryRecordReader,
+    BinaryRecordWriter,
+    decode_moves,
+    decode_puzzle,
+    decode_record,
+    encode_moves,
+    encode_puzzle,
+    encode_record,
+    write_records,
+)
+from src.models import Move, ParseError, PuzzleState
+
+
+def make_state() -> PuzzleState:
+    return (
+        ("赤", "青", "赤", "青"),
+        ("青", "赤", "青", "赤"),
+        (),
+        ("緑", "緑"),
+    )
+
+
+def temp_path(suffix: str = ".wsb") -> str:
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    return path
+
+
+# --- パズル ---
+
+def test_puzzle_roundtrip():
+    state = make_state()
+    assert decode_puzzle(encode_puzzle(state, 4)) == (state, 4)
+
+
+def test_puzzle_encoding_is_compact():
+    # パレット（3 色）+ 4 本 × 容量 4 バイト + ヘッダ 3 バイト
+    data = encode_puzzle(make_state(), 4)
+    palette_size = sum(1 + len(c.encode("utf-8")) for c in ("赤", "青", "緑"))
+    assert len(data) == 3 + palette_size + 4 * 4
+
+
+def test_puzzle_rejects_overfull_bottle():
+    with pytest.raises(ValueError):
+        encode_puzzle((("a", "a", "a"),), 2)
+
+
+def test_puzzle_truncated_data_raises_parse_error():
+    data = encode_puzzle(make_state(), 4)
+    with pytest.raises(ParseError):
+        decode_puzzle(data[:-3])
+
+
+# --- 手順 ---
+
+def test_moves_roundtrip_nibble_packed():
+    moves = [Move(0, 15), Move(15, 0), Move(3, 7)]
+    data = encode_moves(moves, n_bottles=16)
+    assert len(data) == 4 + len(moves)  # 手数 u32 + 1 手 1 バイト
+    assert decode_moves(data, n_bottles=16) == moves
+
+
+def test_moves_roundtrip_wide_for_many_bottles():
+    moves = [Move(19, 0), Move(16, 17)]
+    data = encode_moves(moves, n_bottles=20)
+    assert len(data) == 4 + 2 * len(moves)
+    assert decode_moves(data, n_bottles=20) == moves
+
+
+def test_record_with_and_without_moves():
+    state = make_state()
+    assert decode_record(encode_record(state, 4)) == BinaryRecord(state, 4, None)
+    moves = [Move(0, 2), Move(1, 2)]
+    assert decode_record(encode_record(state, 4, moves)) == BinaryRecord(state, 4, moves)
+
+
+# --- コンテナ ---
+
+def test_container_random_access():
+    path = temp_path()
+    states = [((f"c{i}", f"c{i}", f"d{i}", f"d{i}"), (), (), ()) for i in range(50)]
+    with BinaryRecordWriter(path) as writer:
+        for i, state in enumerate(states):
+            writer.append(state, 4, [Move(0, 1)] * i if i % 2 else None)
+    with BinaryRecordReader(path) as reader:
+        assert len(reader) == 50
+        assert reader[37].state == states[37]
+        assert reader[37].moves == [Move(0, 1)] * 37
+        assert reader[10].moves is None
+        assert reader[-1].state == states[-1]
+        with pytest.raises(IndexError):
+            reader[50]
+
+
+def test_container_iteration_and_write_records():
+    path = temp_path()
+    state = make_state()
+    count = write_records(path, [(state, 4), BinaryRecord(state, 4, [Move(2, 3)])])
+    assert count == 2
+    with BinaryRecordReader(path) as reader:
+        records = list(reader)
+    assert records[0].moves is None
+    assert records[1].moves == [Move(2, 3)]
+
+
+def test_empty_container():
+    path = temp_path()
+    with BinaryRecordWriter(path):
+        pass
+    with BinaryRecordReader(path) as reader:
+        assert len(reader) == 0
+        assert list(reader) == []
+
+
+def test_reader_rejects_non_container_file():
+    path = temp_path()
+    with open(path, "wb") as f:
+        f.write(b"bottles: []\n" * 4)
+    with pytest.raises(ParseError):
+        BinaryRecordReader(path)
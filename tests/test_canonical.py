@@ -0,0 +1,57 @@
+"""src/canonical.py のテスト"""
+from src.canonical import (
+    canonical_key,
+    canonicalize,
+    canonicalize_colors,
+    color_canonical_key,
+    from_canonical_colors,
+    from_canonical_move,
+    to_canonical_move,
+)
+from src.models import Move, PuzzleState, apply_move
+
+
+def test_canonicalize_ignores_bottle_order():
+    a: PuzzleState = (("red", "blue"), (), ("blue", "red"))
+    b: PuzzleState = ((), ("blue", "red"), ("red", "blue"))
+    assert canonicalize(a)[0] == canonicalize(b)[0] == canonical_key(a)
+
+
+def test_canonicalize_order_maps_back_to_original():
+    state: PuzzleState = (("red", "blue"), (), ("blue", "red"))
+    canonical, order = canonicalize(state)
+    assert all(canonical[i] == state[order[i]] for i in range(len(state)))
+
+
+def test_move_translation_commutes_with_apply_move():
+    state: PuzzleState = (("red", "blue", "blue", "red"), (), ("blue", "red", "red", "blue"), ())
+    canonical, order = canonicalize(state)
+    move = Move(0, 1)
+    canonical_move = to_canonical_move(move, order)
+    assert from_canonical_move(canonical_move, order) == move
+    assert canonical_key(apply_move(state, move)) == canonical_key(
+        apply_move(canonical, canonical_move)
+    )
+
+
+def test_canonicalize_colors_ignores_color_names_and_bottle_order():
+    a: PuzzleState = (("赤", "青", "赤", "青"), ("青", "緑", "緑", "赤"), ("緑", "赤", "青", "緑"), ())
+    renamed = {"赤": "青", "青": "緑", "緑": "赤"}
+    b: PuzzleState = tuple(tuple(renamed[c] for c in bottle) for bottle in reversed(a))
+    assert color_canonical_key(a) == color_canonical_key(b)
+    assert color_canonical_key(a) != color_canonical_key(
+        (("赤", "赤", "青", "青"), ("青", "緑", "緑", "赤"), ("緑", "赤", "青", "緑"), ())
+    )
+
+
+def test_canonicalize_colors_names_by_first_appearance():
+    form = canonicalize_colors((("blue", "red"), ("red", "blue"), ()))
+    assert form.state == ((), ("color0", "color1"), ("color1", "color0"))
+    assert set(form.colors.values()) == {"red", "blue"}
+
+
+def test_canonicalize_colors_maps_back_to_original():
+    state: PuzzleState = (("red", "blue", "green"), (), ("green", "red", "blue"), ("blue",))
+    form = canonicalize_colors(state)
+    restored = from_canonical_colors(form.state, form.colors)
+    assert all(restored[i] == state[form.order[i]] for i in range(len(state)))
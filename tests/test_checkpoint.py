@@ -0,0 +1,97 @@
+"""src/checkpoint.py のテスト"""
+import pickle
+import zlib
+
+import pytest
+from src.checkpoint import Checkpoint, CheckpointError, Checkpointer
+from src.models import Move
+
+
+def make_checkpoint() -> Checkpoint:
+    return Checkpoint(
+        strategy="bfs",
+        capacity=2,
+        prune=False,
+        initial_state=(("red", "blue"), ("blue", "red"), ()),
+        bottles=((), ("red", "blue"), ("blue", "red"), ("red",), ("blue",)),
+        parent={(1, 2, 0): None, (1, 4, 3): 5},
+        frontier=[(1, 4, 3)],
+        next_frontier=[],
+        depth=1,
+        best=[Move(0, 2), Move(1, 0)],
+        iterations=1,
+        moves_pruned=0,
+        elapsed=1.5,
+    )
+
+
+def test_checkpoint_roundtrip(tmp_path):
+    checkpointer = Checkpointer(str(tmp_path / "search.ckpt"))
+    checkpoint = make_checkpoint()
+    checkpointer.save(checkpoint)
+    loaded = checkpointer.load()
+    assert loaded == checkpoint
+    assert isinstance(loaded.best[0], Move)
+    assert checkpointer.saves == 1
+
+
+def test_checkpoint_load_missing_file_returns_none(tmp_path):
+    assert Checkpointer(str(tmp_path / "missing.ckpt")).load() is None
+
+
+def test_checkpoint_matches():
+    checkpoint = make_checkpoint()
+    assert checkpoint.matches("bfs", 2, False, checkpoint.initial_state)
+    assert not checkpoint.matches("dfs", 2, False, checkpoint.initial_state)
+    assert not checkpoint.matches("bfs", 2, True, checkpoint.initial_state)
+
+
+def test_checkpoint_rejects_other_files(tmp_path):
+    path = tmp_path / "search.ckpt"
+    path.write_bytes(b"not a checkpoint")
+    with pytest.raises(ValueError):
+        Checkpointer(str(path)).load()
+
+
+def test_checkpoint_write_failure_raises_checkpoint_error(tmp_path):
+    checkpointer = Checkpointer(str(tmp_path / "missing" / "search.ckpt"))
+    with pytest.raises(CheckpointError):
+        checkpointer.save(make_checkpoint())
+    with pytest.raises(CheckpointError):
+        Checkpointer(str(tmp_path)).load()  # ディレクトリは読めない
+
+
+def test_checkpoint_does_not_unpickle_arbitrary_objects(tmp_path):
+    path = tmp_path / "search.ckpt"
+    path.write_bytes(b"WSCK" + zlib.compress(pickle.dumps((1, Move(0, 1)))))
+    with pytest.raises(ValueError):
+        Checkpointer(str(path)).load()
+
+
+def test_checkpoint_interval_grows_with_save_cost(tmp_path, monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("src.checkpoint.time.perf_counter", lambda: now[0])
+    checkpointer = Checkpointer(str(tmp_path / "search.ckpt"), interval=10.0)
+    assert not checkpointer.due()
+    now[0] = 10.0
+    assert checkpointer.due()
+    checkpointer.save(make_checkpoint())
+    assert not checkpointer.due()
+    now[0] = 20.0
+    assert checkpointer.due()
+
+    # 書き出しに 2 秒かかると、次の書き出しは間隔の 10 秒ではなく 38 秒後になる
+    clock = iter([20.0, 22.0])
+    monkeypatch.setattr("src.checkpoint.time.perf_counter", lambda: next(clock))
+    checkpointer.save(make_checkpoint())
+    assert checkpointer.last_cost == 2.0
+    monkeypatch.setattr("src.checkpoint.time.perf_counter", lambda: now[0])
+    now[0] = 50.0
+    assert not checkpointer.due()
+    now[0] = 60.0
+    assert checkpointer.due()
+
+
+def test_checkpointer_rejects_negative_interval(tmp_path):
+    with pytest.raises(ValueError):
+        Checkpointer(str(tmp_path / "search.ckpt"), interval=-1.0)
@@ -0,0 +1,100 @@
+"""src/distributed.py のテスト"""
+import socket
+import threading
+import time
+
+import pytest
+from src.distributed import _WireCodec, owner_of, run_worker, solve_distributed
+from src.models import PuzzleState, PuzzleTimeoutError, apply_move
+from src.solver import get_legal_moves, solve
+from tests.puzzles import assert_solves
+
+
+def make_puzzle() -> PuzzleState:
+    return (
+        ("red", "blue", "green", "red"),
+        ("blue", "green", "red", "blue"),
+        ("green", "red", "blue", "green"),
+        (),
+        (),
+    )
+
+
+def test_wire_codec_pour_and_undo():
+    codec = _WireCodec(3, 4)
+    state = ((1, 2, 2), (2,), ())
+    data = codec.encode(state)
+    assert len(data) == codec.state_size == 12
+    assert codec.decode(data) == state
+    for move in get_legal_moves(state, 4):
+        child, moved = codec.pour(data, state, move)
+        assert codec.decode(child) == apply_move(state, move, 4)
+        # 手コードから直前の状態と手を復元できる
+        assert codec.undo(child, codec.move_code(move, moved)) == (data, move)
+
+
+def test_wire_codec_is_solved():
+    codec = _WireCodec(3, 2)
+    assert codec.is_solved(codec.encode(((1, 1), (), (2, 2))))
+    assert not codec.is_solved(codec.encode(((1,), (1,), (2, 2))))
+    assert not codec.is_solved(codec.encode(((1, 2), (2, 1), ())))
+
+
+def test_owner_of_is_in_range():
+    codec = _WireCodec(2, 2)
+    owners = {owner_of(codec.encode(((a, b), ())), 3) for a in range(1, 6) for b in range(1, 6)}
+    assert owners <= {0, 1, 2}
+    assert len(owners) > 1
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_solve_distributed_finds_shortest_solution(workers):
+    state = make_puzzle()
+    result = solve_distributed(state, workers=workers, timeout=30.0)
+    assert result.solved is True
+    assert len(result.moves) == len(solve(state, strategy="bfs", timeout=30.0).moves)
+    assert_solves(state, result.moves)
+
+
+def test_solve_distributed_unsolvable():
+    state: PuzzleState = (("red", "blue", "red", "blue"), ("blue", "red", "blue", "red"))
+    result = solve_distributed(state, workers=2, timeout=30.0)
+    assert result.solved is False
+    assert result.moves == []
+
+
+def test_solve_distributed_with_remote_workers():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+
+    def connect() -> None:
+        # コーディネーターが待ち受けを始めるまで接続を試みる
+        for _ in range(100):
+            try:
+                run_worker("127.0.0.1", port)
+                return
+            except ConnectionRefusedError:
+                time.sleep(0.05)
+
+    threads = [threading.Thread(target=connect, daemon=True) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    state = make_puzzle()
+    result = solve_distributed(
+        state, workers=0, timeout=30.0, listen=("127.0.0.1", port), remote_workers=2
+    )
+    for thread in threads:
+        thread.join(5.0)
+    assert result.solved is True
+    assert_solves(state, result.moves)
+
+
+def test_solve_distributed_times_out_waiting_for_workers():
+    with pytest.raises(PuzzleTimeoutError):
+        solve_distributed(make_puzzle(), workers=0, remote_workers=1, timeout=0.2)
+
+
+def test_solve_distributed_rejects_no_workers():
+    with pytest.raises(ValueError):
+        solve_distributed(make_puzzle(), workers=0)
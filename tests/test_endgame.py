@@ -0,0 +1,51 @@
+"""src/endgame.py のテスト"""
+from src.endgame import endgame_moves
+from src.enumerator import build_solution_dag
+from src.models import Move, PuzzleState, apply_move
+from src.solver import solve
+from src.validator import is_solved
+
+
+def test_endgame_merges_each_color_into_fullest_bottle():
+    state: PuzzleState = (
+        ("red",),
+        ("blue", "blue", "blue"),
+        ("red", "red", "red"),
+        ("blue",),
+        (),
+    )
+    moves = endgame_moves(state, 4)
+    assert moves == [Move(0, 2), Move(3, 1)]
+    for move in moves:
+        state = apply_move(state, move, 4)
+    assert is_solved(state, 4)
+
+
+def test_endgame_length_matches_bfs():
+    state: PuzzleState = (
+        ("red", "red"),
+        ("blue",),
+        ("red",),
+        ("blue", "blue"),
+        ("red",),
+        ("blue",),
+    )
+    moves = endgame_moves(state, 4)
+    assert moves is not None and len(moves) == 4
+    # 仕上げ手順を使わない BFS（最短解法の列挙）と同じ手数
+    assert build_solution_dag(state, bottle_capacity=4).depth == 4
+    assert len(solve(state, strategy="bfs", timeout=10.0, bottle_capacity=4).moves) == 4
+
+
+def test_endgame_solved_state_needs_no_moves():
+    assert endgame_moves((("red",) * 4, (), ("blue",) * 4), 4) == []
+
+
+def test_endgame_rejects_mixed_bottles():
+    assert endgame_moves((("red", "blue"), ("blue", "red"), ()), 2) is None
+
+
+def test_endgame_rejects_split_double_color():
+    # 容量の 2 倍ある色が満杯でないボトルに分かれている場合は扱わない
+    state: PuzzleState = (("red",) * 3, ("red",) * 3, ("red",) * 2, ())
+    assert endgame_moves(state, 4) is None
@@ -0,0 +1,94 @@
+"""src/enumerator.py のテスト"""
+import pytest
+from src.enumerator import build_solution_dag, count_optimal_solutions, iter_optimal_solutions
+from src.models import PuzzleState, PuzzleTimeoutError, apply_move
+from src.solver import get_legal_moves, solve
+from src.validator import is_solved
+from tests.puzzles import assert_solves, make_unsolvable
+
+
+def make_three_color_puzzle() -> PuzzleState:
+    return (
+        ("red", "blue", "green"),
+        ("green", "red", "blue"),
+        ("blue", "green", "red"),
+        (),
+        (),
+    )
+
+
+def brute_force_solutions(state: PuzzleState, capacity: int, length: int) -> list:
+    """length 手ちょうどで解決するすべての手順（途中で解決しないもの）"""
+    found = []
+
+    def search(current, moves):
+        if is_solved(current, capacity):
+            if len(moves) == length:
+                found.append(list(moves))
+            return
+        if len(moves) == length:
+            return
+        for move in get_legal_moves(current, capacity):
+            moves.append(move)
+            search(apply_move(current, move, capacity), moves)
+            moves.pop()
+
+    search(state, [])
+    return found
+
+
+def test_enumerates_all_optimal_solutions_in_order():
+    state = make_three_color_puzzle()
+    dag = build_solution_dag(state, bottle_capacity=3)
+    assert dag.depth == len(solve(state, bottle_capacity=3).moves)
+    solutions = list(dag.iter_solutions())
+    assert solutions == sorted(brute_force_solutions(state, 3, dag.depth))
+    assert dag.count() == len(solutions)
+
+
+def test_every_enumerated_solution_solves_the_puzzle():
+    state = make_three_color_puzzle()
+    for moves in iter_optimal_solutions(state, bottle_capacity=3):
+        assert_solves(state, moves, 3)
+
+
+def test_limit_stops_enumeration():
+    state = make_three_color_puzzle()
+    assert len(list(iter_optimal_solutions(state, limit=2, bottle_capacity=3))) == 2
+    assert list(iter_optimal_solutions(state, limit=0, bottle_capacity=3)) == []
+
+
+def test_count_matches_enumeration_without_materializing():
+    state = make_three_color_puzzle()
+    count = count_optimal_solutions(state, bottle_capacity=3)
+    assert count == sum(1 for _ in iter_optimal_solutions(state, bottle_capacity=3))
+    assert count > 1
+
+
+def test_unsolvable_puzzle_has_no_solutions():
+    dag = build_solution_dag(make_unsolvable())
+    assert dag.solvable is False
+    assert dag.count() == 0
+    assert list(dag.iter_solutions()) == []
+
+
+def test_already_solved_has_single_empty_solution():
+    state: PuzzleState = (("red", "red", "red", "red"), ())
+    dag = build_solution_dag(state)
+    assert dag.depth == 0
+    assert list(dag.iter_solutions()) == [[]]
+    assert dag.count() == 1
+
+
+def test_dag_keeps_only_states_on_optimal_paths():
+    state = make_three_color_puzzle()
+    dag = build_solution_dag(state, bottle_capacity=3)
+    assert len(dag) < dag.states_visited
+
+
+def test_timeout():
+    state: PuzzleState = tuple(
+        tuple(f"c{(i * 3 + j) % 8}" for j in range(4)) for i in range(8)
+    ) + ((), ())
+    with pytest.raises(PuzzleTimeoutError):
+        build_solution_dag(state, timeout=0.001)
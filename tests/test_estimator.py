@@ -0,0 +1,72 @@
+"""src/estimator.py のテスト"""
+import pytest
+from src.estimator import estimate_difficulty, extract_features
+from src.heuristics import distance_lower_bound
+from src.models import PuzzleState
+from src.solver import solve
+from tests.puzzles import make_capacity4_solvable, make_eight_color_puzzle
+
+
+def test_extract_features():
+    features = extract_features(make_capacity4_solvable(), 4)
+    assert features.bottles == 4
+    assert features.colors == 2
+    assert features.empty_bottles == 2
+    assert features.color_boundaries == 6
+    assert features.spread == 2
+    assert features.mobility == 4
+
+
+def test_estimate_lower_bound_matches_search_heuristic():
+    state = make_capacity4_solvable()
+    estimate = estimate_difficulty(state, 4, search_budget=0)
+    assert estimate.lower_bound == distance_lower_bound(state, 4)
+
+
+def test_estimate_small_puzzle_is_exact():
+    state = make_capacity4_solvable()
+    estimate = estimate_difficulty(state, 4)
+    assert estimate.solvable is True
+    assert estimate.exact is True
+    assert estimate.estimated_moves == len(solve(state, timeout=10.0).moves)
+
+
+def test_estimate_unsolvable_puzzle():
+    state: PuzzleState = (
+        ("red", "blue", "green", "yellow"),
+        ("yellow", "green", "blue", "red"),
+        ("blue", "red", "yellow", "green"),
+        ("green", "yellow", "red", "blue"),
+    )
+    estimate = estimate_difficulty(state, 4)
+    assert estimate.solvable is False
+    assert estimate.likely_solvable is False
+    assert estimate.estimated_moves is None
+
+
+def test_estimate_already_solved():
+    estimate = estimate_difficulty((("red", "red", "red", "red"), ()), 4)
+    assert estimate.estimated_moves == 0
+    assert estimate.exact is True
+
+
+def test_estimate_large_puzzle_uses_playouts():
+    estimate = estimate_difficulty(make_eight_color_puzzle(), 4, search_budget=100, seed=0)
+    assert estimate.exact is False
+    assert estimate.likely_solvable is True
+    assert estimate.estimated_moves is not None
+    assert estimate.lower_bound <= estimate.estimated_moves
+    if estimate.upper_bound is not None:
+        assert estimate.estimated_moves <= estimate.upper_bound
+
+
+def test_estimate_is_reproducible_with_seed():
+    state = make_eight_color_puzzle()
+    first = estimate_difficulty(state, 4, search_budget=100, seed=1)
+    second = estimate_difficulty(state, 4, search_budget=100, seed=1)
+    assert first == second
+
+
+def test_estimate_rejects_invalid_state():
+    with pytest.raises(ValueError):
+        estimate_difficulty((("red", "red", "red"), ()), 4)
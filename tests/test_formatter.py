@@ -1,4 +1,5 @@
 """src/formatter.py の単体テスト"""
+import io
 import json
 import os
 import tempfile
@@ -6,8 +7,15 @@ import tempfile
 import pytest
 import yaml
 
-from src.formatter import format_output, write_output
-from src.models import Move, PuzzleState, SolverResult
+from src.binary_format import BinaryRecordReader
+from src.formatter import (
+    format_output,
+    stream_output,
+    write_output,
+    write_output_stream,
+    write_solutions_stream,
+)
+from src.models import Move, PuzzleState, SearchProfile, SolverResult
 
 
 # --- テスト用データ ---
@@ -78,6 +86,19 @@ def test_format_text_verbose():
     assert "ボトル" in output or "[" in output or "|" in output
 
 
+
+def test_verbose_replay_uses_bottle_capacity():
+    # 容量 3 のパズルで容量 4 として再生すると 4 個目が注がれてしまう
+    state: PuzzleState = (("red", "blue", "blue"), ("red", "red", "blue"), ("blue", "blue"), ())
+    result = make_result([(0, 2)])
+    expected = "  ボトル 1: [red, blue]\n  ボトル 2: [red, red, blue]\n  ボトル 3: [blue, blue, blue]"
+    assert expected in format_output(result, state, fmt="text", verbose=True, bottle_capacity=3)
+    assert expected in format_output(result, state, fmt="text", verbose=True)  # 容量を推定
+    buf = io.StringIO()
+    stream_output(result, state, buf, fmt="text", verbose=True, bottle_capacity=3)
+    assert expected in buf.getvalue()
+
+
 # --- JSON 形式テスト ---
 
 def test_format_json_basic():
@@ -92,6 +113,7 @@ def test_format_json_basic():
     assert data["moves"][0]["to"] == 3    # 1-indexed
     assert "stats" in data
     assert data["stats"]["states_visited"] == 42
+    assert data["stats"]["moves_pruned"] == 0
 
 
 def test_format_json_stats():
@@ -162,3 +184,170 @@ def test_write_output_none_path_goes_to_stdout(capsys):
     write_output("stdout テスト", output_path=None)
     captured = capsys.readouterr()
     assert "stdout テスト" in captured.out
+
+
+# --- ストリーミング出力テスト ---
+
+def make_long_result(n: int) -> SolverResult:
+    # 0→2, 2→0 を繰り返す（verbose 描画でも合法な手順になる）
+    moves = [Move(0, 2) if i % 2 == 0 else Move(2, 0) for i in range(n)]
+    return SolverResult(solved=True, moves=moves, states_visited=n, elapsed_time=1.5)
+
+
+@pytest.mark.parametrize("fmt", ["text", "json", "yaml"])
+@pytest.mark.parametrize("n_moves", [0, 1, 7])
+def test_stream_output_matches_format_output(fmt, n_moves):
+    result = make_long_result(n_moves)
+    state = make_initial_state()
+    buf = io.StringIO()
+    stream_output(result, state, buf, fmt=fmt)
+    assert buf.getvalue() == format_output(result, state, fmt=fmt)
+
+
+def test_stream_output_text_verbose_matches_format_output():
+    result = make_long_result(6)
+    state = make_initial_state()
+    buf = io.StringIO()
+    stream_output(result, state, buf, fmt="text", verbose=True)
+    assert buf.getvalue() == format_output(result, state, fmt="text", verbose=True)
+
+
+def test_stream_output_writes_incrementally():
+    # 書き込みが 1 回にまとめられず、手順ごとに分割されていること
+    class CountingWriter:
+        def __init__(self) -> None:
+            self.calls = 0
+
+        def write(self, text: str) -> int:
+            self.calls += 1
+            return len(text)
+
+    writer = CountingWriter()
+    stream_output(make_long_result(50), make_initial_state(), writer, fmt="json")  # type: ignore[arg-type]
+    assert writer.calls > 50
+
+
+def test_stream_output_invalid_fmt():
+    with pytest.raises(ValueError):
+        stream_output(make_result(), make_initial_state(), io.StringIO(), fmt="xml")  # type: ignore
+
+
+def test_write_output_stream_to_file():
+    result = make_result([(0, 2), (1, 3)])
+    fd, path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    write_output_stream(result, make_initial_state(), fmt="json", output_path=path)
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == format_output(result, make_initial_state(), fmt="json")
+
+
+def test_write_output_stream_to_stdout(capsys):
+    result = make_result([(0, 2)])
+    write_output_stream(result, make_initial_state(), fmt="yaml")
+    captured = capsys.readouterr()
+    assert captured.out == format_output(result, make_initial_state(), fmt="yaml")
+
+
+# --- binary 形式テスト ---
+
+def test_format_binary_roundtrip():
+    result = make_result([(0, 2), (1, 3)])
+    data = format_output(result, make_initial_state(), fmt="binary")
+    assert isinstance(data, bytes)
+    fd, path = tempfile.mkstemp(suffix=".wsb")
+    os.close(fd)
+    write_output(data, output_path=path)
+    with BinaryRecordReader(path) as reader:
+        record = reader[0]
+    assert record.state == make_initial_state()
+    assert record.capacity == 2
+    assert record.moves == result.moves
+
+
+def test_write_output_stream_binary_matches_format_output():
+    result = make_result([(0, 2)])
+    fd, path = tempfile.mkstemp(suffix=".wsb")
+    os.close(fd)
+    write_output_stream(result, make_initial_state(), fmt="binary", output_path=path)
+    with open(path, "rb") as f:
+        assert f.read() == format_output(result, make_initial_state(), fmt="binary")
+
+
+def test_stream_output_rejects_binary():
+    with pytest.raises(ValueError):
+        stream_output(make_result(), make_initial_state(), io.StringIO(), fmt="binary")
+
+
+# --- profile 出力テスト ---
+
+def make_profiled_result() -> SolverResult:
+    profile = SearchProfile(
+        move_generation_time=0.1,
+        apply_move_time=0.2,
+        hashing_time=0.05,
+        is_solved_time=0.01,
+        expanded=10,
+        generated=30,
+        duplicate_hits=12,
+        states_per_depth=[1, 3, 6],
+        branching_per_depth=[3.0, 3.0],
+        peak_memory=2048,
+    )
+    return make_result([(0, 2)])._replace(profile=profile)
+
+
+@pytest.mark.parametrize("fmt", ["json", "yaml"])
+def test_format_includes_profile_stats(fmt):
+    output = format_output(make_profiled_result(), make_initial_state(), fmt=fmt)
+    data = json.loads(output) if fmt == "json" else yaml.safe_load(output)
+    profile = data["stats"]["profile"]
+    assert profile["phase_times"]["apply_move"] == pytest.approx(0.2)
+    assert profile["duplicate_ratio"] == pytest.approx(0.4)
+    assert profile["states_per_depth"] == [1, 3, 6]
+
+
+@pytest.mark.parametrize("fmt", ["json", "yaml"])
+def test_stream_output_with_profile_matches_format_output(fmt):
+    result = make_profiled_result()
+    buf = io.StringIO()
+    stream_output(result, make_initial_state(), buf, fmt=fmt)
+    assert buf.getvalue() == format_output(result, make_initial_state(), fmt=fmt)
+
+
+def test_format_omits_profile_when_absent():
+    data = json.loads(format_output(make_result(), make_initial_state(), fmt="json"))
+    assert "profile" not in data["stats"]
+
+
+# --- 複数解法の逐次出力テスト ---
+
+_SOLUTIONS = [[Move(0, 2), Move(1, 0)], [Move(1, 2), Move(0, 1)]]
+
+
+def test_write_solutions_stream_text(capsys):
+    assert write_solutions_stream(iter(_SOLUTIONS), "text") == 2
+    lines = capsys.readouterr().out.splitlines()
+    assert lines == ["解法 1（2 手）: 1→3, 2→1", "解法 2（2 手）: 2→3, 1→2"]
+
+
+def test_write_solutions_stream_json_lines(tmp_path):
+    path = str(tmp_path / "solutions.jsonl")
+    assert write_solutions_stream(iter(_SOLUTIONS), "json", path) == 2
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert records[1] == {
+        "solution": 2,
+        "total_moves": 2,
+        "moves": [{"from": 2, "to": 3}, {"from": 1, "to": 2}],
+    }
+
+
+def test_write_solutions_stream_yaml(capsys):
+    write_solutions_stream(iter(_SOLUTIONS), "yaml")
+    documents = list(yaml.safe_load_all(capsys.readouterr().out))
+    assert [d["solution"] for d in documents] == [1, 2]
+
+
+def test_write_solutions_stream_rejects_binary():
+    with pytest.raises(ValueError):
+        write_solutions_stream(iter(_SOLUTIONS), "binary")
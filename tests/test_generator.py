@@ -0,0 +1,91 @@
+"""src/generator.py のテスト"""
+import random
+
+import pytest
+from src.binary_format import BinaryRecordReader
+from src.canonical import color_canonical_key
+from src.generator import generate_puzzle, generate_puzzles, write_puzzles
+from src.models import apply_move
+from src.parser import iter_puzzles
+from src.validator import is_solved, validate
+
+
+def test_generated_puzzle_is_solved_by_its_solution():
+    puzzle = generate_puzzle(6, rng=random.Random(0))
+    assert not is_solved(puzzle.state, puzzle.capacity)
+    current = puzzle.state
+    for move in puzzle.solution:
+        current = apply_move(current, move, puzzle.capacity)
+    assert is_solved(current, puzzle.capacity)
+
+
+def test_generated_puzzle_is_valid_input():
+    puzzle = generate_puzzle(5, empty_bottles=1, capacity=3, rng=random.Random(1))
+    assert len(puzzle.state) == 6
+    assert all(len(bottle) in (0, 3) for bottle in puzzle.state)
+    assert validate(puzzle.state, 3).valid
+
+
+def test_generated_puzzle_honours_min_boundaries():
+    puzzle = generate_puzzle(4, rng=random.Random(2), min_boundaries=9)
+    boundaries = sum(
+        1 for bottle in puzzle.state for i in range(1, len(bottle)) if bottle[i] != bottle[i - 1]
+    )
+    assert boundaries >= 9
+
+
+def test_generate_puzzles_is_reproducible_with_seed():
+    first = list(generate_puzzles(5, 4, seed=42))
+    second = list(generate_puzzles(5, 4, seed=42))
+    assert first == second
+
+
+def test_generate_puzzles_unique_skips_color_permutations():
+    puzzles = list(generate_puzzles(8, 2, seed=1, unique=True))
+    assert len({color_canonical_key(p.state) for p in puzzles}) == 8
+
+
+def test_generate_puzzles_unique_gives_up_when_exhausted():
+    with pytest.raises(ValueError):
+        list(generate_puzzles(1000, 2, seed=1, unique=True))
+
+
+def test_generate_puzzle_custom_color_names():
+    puzzle = generate_puzzle(2, rng=random.Random(3), color_names=["赤", "青"])
+    assert {color for bottle in puzzle.state for color in bottle} == {"赤", "青"}
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"colors": 1, "empty_bottles": 1},   # ボトル数が少なすぎる
+        {"colors": 19, "empty_bottles": 2},  # ボトル数が多すぎる
+        {"colors": 4, "empty_bottles": 0},
+        {"colors": 4, "capacity": 1},
+        {"colors": 4, "min_boundaries": 13},
+    ],
+)
+def test_generate_puzzle_rejects_invalid_arguments(kwargs):
+    with pytest.raises(ValueError):
+        generate_puzzle(**kwargs)
+
+
+@pytest.mark.parametrize("suffix", [".yaml", ".json", ".jsonl", ".wsb"])
+def test_write_puzzles_roundtrip(tmp_path, suffix):
+    puzzles = list(generate_puzzles(3, 4, seed=7))
+    path = str(tmp_path / f"puzzles{suffix}")
+    assert write_puzzles(puzzles, path) == 3
+    assert list(iter_puzzles(path)) == [(p.state, p.capacity) for p in puzzles]
+
+
+def test_write_puzzles_binary_includes_solution(tmp_path):
+    puzzles = list(generate_puzzles(2, 4, seed=8))
+    path = str(tmp_path / "puzzles.wsb")
+    write_puzzles(puzzles, path)
+    with BinaryRecordReader(path) as reader:
+        assert [record.moves for record in reader] == [p.solution for p in puzzles]
+
+
+def test_write_puzzles_unknown_extension(tmp_path):
+    with pytest.raises(ValueError):
+        write_puzzles([], str(tmp_path / "puzzles.txt"))
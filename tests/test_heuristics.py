@@ -0,0 +1,107 @@
+"""src/heuristics.py の単体テスト"""
+from src.heuristics import (
+    distance_lower_bound,
+    order_moves,
+    score_move,
+    state_cost,
+    top_run_length,
+)
+from src.models import Move, PuzzleState
+
+
+def test_top_run_length():
+    assert top_run_length(()) == 0
+    assert top_run_length(("red",)) == 1
+    assert top_run_length(("blue", "red", "red")) == 2
+    assert top_run_length(("red", "red", "red", "red")) == 4
+
+
+def test_completing_a_bottle_scores_highest():
+    state: PuzzleState = (
+        ("red", "red", "red"),   # あと 1 つで完成
+        ("blue", "red"),
+        ("green", "red"),
+        (),
+    )
+    complete = score_move(state, Move(1, 0), 4)
+    extend = score_move(state, Move(1, 2), 4)
+    to_empty = score_move(state, Move(1, 3), 4)
+    assert complete > extend > to_empty
+
+
+def test_using_empty_bottle_is_last_resort():
+    state: PuzzleState = (
+        ("blue", "red"),
+        ("green", "red"),
+        (),
+    )
+    ordered = order_moves(state, [Move(0, 2), Move(0, 1)], 4)
+    assert ordered == [Move(0, 1), Move(0, 2)]
+
+
+def test_freeing_a_bottle_is_preferred():
+    state: PuzzleState = (
+        ("red",),
+        ("blue", "red"),
+        ("green", "blue", "red"),
+    )
+    # 0 → 1 はボトル 0 を空にする、2 → 1 は空にしない
+    assert score_move(state, Move(0, 1), 4) > score_move(state, Move(2, 1), 4)
+
+
+def test_single_color_bottle_into_empty_is_not_a_free():
+    state: PuzzleState = (
+        ("red", "red"),
+        ("blue",),
+        (),
+    )
+    assert score_move(state, Move(0, 2), 4) < 0
+
+
+def test_order_moves_is_stable_for_ties():
+    state: PuzzleState = (
+        ("blue", "red"),
+        ("green", "red"),
+        (),
+        (),
+    )
+    moves = [Move(0, 2), Move(0, 3)]
+    assert order_moves(state, moves, 4) == moves
+
+
+def test_state_cost_is_zero_when_solved():
+    state: PuzzleState = (
+        ("red", "red", "red", "red"),
+        ("blue", "blue", "blue", "blue"),
+        (),
+    )
+    assert state_cost(state, 4) == 0
+
+
+def test_state_cost_counts_boundaries_and_spread():
+    state: PuzzleState = (
+        ("red", "blue", "red", "blue"),
+        ("blue", "red", "blue", "red"),
+        (),
+        (),
+    )
+    # 境目 3 + 3、red・blue がそれぞれ 1 本余分に散らばっている
+    assert state_cost(state, 4) == 8
+
+
+def test_state_cost_decreases_towards_goal():
+    near: PuzzleState = (("red", "red", "red"), ("blue", "blue", "blue", "blue"), ("red",))
+    far: PuzzleState = (("red", "blue", "red"), ("blue", "blue", "blue"), ("red", "red"))
+    assert state_cost(near, 4) < state_cost(far, 4)
+
+
+def test_distance_lower_bound_is_larger_of_boundaries_and_spread():
+    state: PuzzleState = (
+        ("red", "blue", "red", "blue"),
+        ("blue", "red", "blue", "red"),
+        (),
+        (),
+    )
+    assert distance_lower_bound(state, 4) == 6
+    solved: PuzzleState = (("red", "red", "red", "red"), ())
+    assert distance_lower_bound(solved, 4) == 0
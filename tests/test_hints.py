@@ -0,0 +1,96 @@
+"""src/hints.py のテスト"""
+import random
+
+import pytest
+from src.generator import generate_puzzle
+from src.hints import HintTable, build_hint_table, estimate_table_size, get_hint
+from src.models import ParseError, PuzzleState, apply_move
+from src.solver import get_legal_moves, solve
+from src.validator import is_solved
+
+
+def make_puzzle() -> PuzzleState:
+    return generate_puzzle(4, rng=random.Random(1)).state
+
+
+def random_walk(state: PuzzleState, steps: int, rng: random.Random) -> PuzzleState:
+    for _ in range(steps):
+        moves = get_legal_moves(state, 4)
+        if not moves:
+            break
+        state = apply_move(state, rng.choice(moves), 4)
+    return state
+
+
+def test_distances_match_bfs(tmp_path):
+    state = make_puzzle()
+    rng = random.Random(0)
+    with build_hint_table(state, str(tmp_path / "level.wht"), 4) as table:
+        for _ in range(20):
+            current = random_walk(state, rng.randrange(6), rng)
+            result = solve(current, strategy="bfs", bottle_capacity=4)
+            expected = len(result.moves) if result.solved else -1
+            assert table.distance(current) == expected
+
+
+def test_following_hints_solves_puzzle(tmp_path):
+    state = make_puzzle()
+    with build_hint_table(state, str(tmp_path / "level.wht"), 4) as table:
+        hint = get_hint(state, table)
+        assert hint.source == "table"
+        for remaining in range(hint.distance, 0, -1):
+            hint = get_hint(state, table)
+            assert hint.distance == remaining
+            state = apply_move(state, hint.move, 4)
+        assert is_solved(state, 4)
+        assert get_hint(state, table).distance == 0
+
+
+def test_dead_state(tmp_path):
+    state = (
+        ("red", "blue", "green", "yellow"),
+        ("yellow", "green", "blue", "red"),
+        ("blue", "red", "yellow", "green"),
+        ("green", "yellow", "red", "blue"),
+    )
+    with build_hint_table(state, str(tmp_path / "dead.wht"), 4) as table:
+        assert table.distance(state) == -1
+        assert get_hint(state, table).move is None
+
+
+def test_unknown_state_falls_back_to_search(tmp_path):
+    state = make_puzzle()
+    other = generate_puzzle(4, rng=random.Random(2)).state
+    with build_hint_table(state, str(tmp_path / "level.wht"), 4) as table:
+        assert table.distance(other) is None
+        hint = get_hint(other, table)
+    assert hint.source == "search"
+    assert hint.distance == len(solve(other, strategy="bfs", bottle_capacity=4).moves)
+
+
+def test_get_hint_rejects_table_of_other_capacity(tmp_path):
+    state = make_puzzle()
+    with build_hint_table(state, str(tmp_path / "level.wht"), 4) as table:
+        with pytest.raises(ValueError):
+            get_hint(state, table, bottle_capacity=5)
+        assert get_hint(state, table, bottle_capacity=4).source == "table"
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "level.wht"
+    path.write_bytes(b"not a hint table")
+    with pytest.raises(ParseError):
+        HintTable(str(path))
+
+
+def test_estimate_matches_built_table(tmp_path):
+    state = make_puzzle()
+    estimate = estimate_table_size(state, 4)
+    with build_hint_table(state, str(tmp_path / "level.wht"), 4) as table:
+        assert (estimate.states, estimate.nbytes) == (table.states, table.nbytes)
+        # スロットは 8 バイトの指紋 + 1 バイト、使用率 0.35〜0.7
+        assert table.slots * 9 <= 26 * table.states
+    assert estimate.states <= estimate.upper_bound
+    assert estimate_table_size(state, 4, max_states=10).states is None
+    with pytest.raises(ValueError):
+        build_hint_table(state, str(tmp_path / "small.wht"), 4, max_states=10)
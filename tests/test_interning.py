@@ -0,0 +1,75 @@
+"""src/interning.py のテスト"""
+import random
+
+from src.generator import generate_puzzle
+from src.interning import BottleTable
+from src.models import Move, PuzzleState, apply_move
+from src.solver import get_legal_moves
+from src.validator import is_solved
+
+
+def make_state() -> PuzzleState:
+    return (
+        ("red", "blue", "red", "blue"),
+        ("blue", "red", "blue", "red"),
+        (),
+        (),
+    )
+
+
+def test_encode_decode_roundtrip():
+    table = BottleTable(4)
+    state = make_state()
+    interned = table.encode(state)
+    assert table.decode(interned) == state
+    # 同じ内容のボトルは同じ ID、空ボトルは ID 0
+    assert interned[2] == interned[3] == 0
+    assert table.encode(state) == interned
+
+
+def test_pour_records_transition():
+    table = BottleTable(4)
+    src = table.intern(("red", "blue", "blue"))
+    dst = table.intern(("red", "blue"))
+    transitions = table.transitions
+    new_src, new_dst = table.pour(src, dst)
+    assert table.bottle(new_src) == ("red",)
+    assert table.bottle(new_dst) == ("red", "blue", "blue", "blue")
+    assert table.transitions == transitions + 1
+    # 2 回目は表を引くだけ
+    assert table.pour(src, dst) == (new_src, new_dst)
+    assert table.transitions == transitions + 1
+
+
+def test_pour_illegal_returns_none():
+    table = BottleTable(2)
+    full = table.intern(("red", "red"))
+    blue = table.intern(("blue",))
+    assert table.pour(blue, full) is None  # 注ぎ先が満杯
+    assert table.pour(full, blue) is None  # 色が異なる
+    assert table.pour(0, blue) is None     # 注ぎ元が空
+
+
+def test_legal_moves_and_apply_match_tuple_implementation():
+    rng = random.Random(3)
+    table = BottleTable(4)
+    for _ in range(20):
+        state = generate_puzzle(5, rng=rng).state
+        for _ in range(15):
+            interned = table.encode(state)
+            moves = get_legal_moves(state, 4)
+            assert table.legal_moves(interned) == moves
+            assert table.is_solved(interned) == is_solved(state, 4)
+            if not moves:
+                break
+            move = rng.choice(moves)
+            state = apply_move(state, move, 4)
+            assert table.decode(table.apply(interned, move)) == state
+
+
+def test_is_solved():
+    table = BottleTable(2)
+    assert table.is_solved(table.encode((("red", "red"), ())))
+    assert not table.is_solved(table.encode((("red",), ("red",))))
+    assert not table.is_solved(table.encode((("red", "blue"), ("blue", "red"))))
+    assert table.legal_moves(table.encode((("red", "red"), ()))) == [Move(0, 1)]
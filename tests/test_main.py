@@ -1,8 +1,12 @@
 """main.py の統合テスト・エンドツーエンドテスト"""
 import json
 import os
+import socket
+import struct
 import sys
 import tempfile
+import threading
+import time
 
 import pytest
 import yaml
@@ -10,7 +14,9 @@ import yaml
 # main モジュールのインポート
 import main as main_module
 from main import build_parser, run
+from src.memo import MemoTable
 from src.models import CLIArgs
+from src.selector import StrategyChoice, StrategySelector, run_benchmark, write_records
 
 
 # --- テスト用パズルファイル生成 ---
@@ -299,3 +305,350 @@ def test_input_format_help_does_not_run_pipeline():
         cwd="/home/smoothpudding/Documents/dev/github/water-sort-puzzle-solver-2026",
     )
     assert result.returncode == 0
+
+
+# --- --profile / --profile-trace テスト ---
+
+_CAPACITY4_SOLVABLE_BOTTLES = [
+    ["red", "blue", "red", "blue"],
+    ["blue", "red", "blue", "red"],
+    [],
+    [],
+]
+
+
+def test_build_parser_profile_options():
+    parser = build_parser()
+    args = parser.parse_args(["--input", "p.yaml", "--profile", "--profile-trace", "t.json"])
+    assert args.profile is True
+    assert args.profile_trace == "t.json"
+
+
+def test_run_profile_json_output(capsys):
+    path = write_puzzle_yaml(_CAPACITY4_SOLVABLE_BOTTLES)
+    args = CLIArgs(input_path=path, output_format="json", profile=True)
+    assert run(args) == 0
+    data = json.loads(capsys.readouterr().out)
+    assert "profile" in data["stats"]
+    assert data["stats"]["profile"]["expanded"] > 0
+
+
+def test_run_profile_trace_file(capsys):
+    path = write_puzzle_yaml(_CAPACITY4_SOLVABLE_BOTTLES)
+    fd, trace_path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    args = CLIArgs(input_path=path, profile_trace_path=trace_path, debug=True)
+    assert run(args) == 0
+    with open(trace_path, encoding="utf-8") as f:
+        trace = json.load(f)
+    assert trace["metadata"]["strategy"] == "bfs"
+    assert trace["profile"]["generated"] > 0
+    assert "[PROFILE]" in capsys.readouterr().err
+
+
+def test_build_parser_strategy_greedy():
+    parser = build_parser()
+    args = parser.parse_args(["--input", "p.yaml", "--strategy", "greedy"])
+    assert args.strategy == "greedy"
+
+
+def test_run_greedy_solve(capsys):
+    path = write_puzzle_yaml(_CAPACITY4_SOLVABLE_BOTTLES)
+    args = CLIArgs(input_path=path, strategy="greedy")
+    assert run(args) == 0
+    assert "合計" in capsys.readouterr().out
+
+
+def test_build_parser_beam_width():
+    parser = build_parser()
+    args = parser.parse_args(["--input", "p.yaml", "--strategy", "beam", "--beam-width", "8"])
+    assert args.strategy == "beam"
+    assert args.beam_width == 8
+
+
+def test_build_parser_beam_width_rejects_zero():
+    parser = build_parser()
+    with pytest.raises(SystemExit):
+        parser.parse_args(["--input", "p.yaml", "--beam-width", "0"])
+
+
+def test_run_beam_solve(capsys):
+    path = write_puzzle_yaml(_CAPACITY4_SOLVABLE_BOTTLES)
+    args = CLIArgs(input_path=path, strategy="beam", beam_width=4)
+    assert run(args) == 0
+    assert "合計" in capsys.readouterr().out
+
+
+def test_build_parser_portfolio():
+    parser = build_parser()
+    args = parser.parse_args(
+        ["--input", "p.yaml", "--strategy", "portfolio", "--portfolio-deadline", "1.5"]
+    )
+    assert args.strategy == "portfolio"
+    assert args.portfolio_deadline == 1.5
+
+
+def test_run_portfolio_solve(capsys):
+    path = write_puzzle_yaml(_CAPACITY4_SOLVABLE_BOTTLES)
+    args = CLIArgs(input_path=path, strategy="portfolio")
+    assert run(args) == 0
+    assert "合計" in capsys.readouterr().out
+
+
+def test_run_portfolio_all_strategies_failed(monkeypatch, capsys):
+    path = write_puzzle_yaml(_CAPACITY4_SOLVABLE_BOTTLES)
+
+    def fail(**kwargs):
+        raise RuntimeError("すべての戦略が失敗しました（bfs: MemoryError）")
+
+    monkeypatch.setattr(main_module, "solve_portfolio", fail)
+    assert run(CLIArgs(input_path=path, strategy="portfolio")) == 1
+    assert "エラー: すべての戦略が失敗しました" in capsys.readouterr().err
+
+
+def test_build_parser_distributed_options():
+    parser = build_parser()
+    args = parser.parse_args(
+        ["--input", "p.yaml", "--strategy", "distributed", "--workers", "3",
+         "--listen", "0.0.0.0:9000", "--remote-workers", "2"]
+    )
+    assert args.strategy == "distributed"
+    assert args.workers == 3
+    assert args.listen == ("0.0.0.0", 9000)
+    assert args.remote_workers == 2
+    with pytest.raises(SystemExit):
+        parser.parse_args(["--input", "p.yaml", "--listen", "9000"])
+
+
+def test_run_distributed_solve(capsys):
+    path = write_puzzle_yaml(_CAPACITY4_SOLVABLE_BOTTLES)
+    args = CLIArgs(input_path=path, strategy="distributed", workers=2)
+    assert run(args) == 0
+    assert "合計" in capsys.readouterr().out
+
+
+def test_run_distributed_worker_disconnect(capsys):
+    path = write_puzzle_yaml(_CAPACITY4_SOLVABLE_BOTTLES)
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+
+    def disconnect() -> None:
+        # 設定と最初のバッチを受け取ったところで応答せずに切断する
+        while True:
+            try:
+                connection = socket.create_connection(("127.0.0.1", port))
+                break
+            except ConnectionRefusedError:
+                time.sleep(0.05)
+        with connection, connection.makefile("rb") as stream:
+            for _ in range(2):
+                _, length = struct.unpack("!BI", stream.read(5))
+                stream.read(length)
+
+    thread = threading.Thread(target=disconnect, daemon=True)
+    thread.start()
+    args = CLIArgs(
+        input_path=path, strategy="distributed", workers=0,
+        listen=("127.0.0.1", port), remote_workers=1,
+    )
+    assert run(args) == 1
+    assert "エラー: 分散探索に失敗しました" in capsys.readouterr().err
+    thread.join(timeout=5)
+
+
+def test_build_parser_ida_and_memo():
+    parser = build_parser()
+    args = parser.parse_args(["--input", "p.yaml", "--strategy", "ida", "--memo", "memo.json"])
+    assert args.strategy == "ida"
+    assert args.memo == "memo.json"
+
+
+def test_run_ida_solve_saves_memo(tmp_path, capsys):
+    path = write_puzzle_yaml(_CAPACITY4_SOLVABLE_BOTTLES)
+    memo_path = str(tmp_path / "memo.json")
+    args = CLIArgs(input_path=path, strategy="ida", memo_path=memo_path)
+    assert run(args) == 0
+    assert "合計" in capsys.readouterr().out
+    # 保存したメモ表を読み込んで再度解ける
+    assert run(args) == 0
+    assert len(MemoTable.load(memo_path)) > 0
+
+
+def test_run_invalid_memo_file(tmp_path, capsys):
+    path = write_puzzle_yaml(_CAPACITY4_SOLVABLE_BOTTLES)
+    memo_path = tmp_path / "memo.json"
+    memo_path.write_text("{not json", encoding="utf-8")
+    assert run(CLIArgs(input_path=path, memo_path=str(memo_path))) == 1
+    assert "メモ表" in capsys.readouterr().err
+
+
+def test_build_parser_checkpoint_options():
+    parser = build_parser()
+    args = parser.parse_args(
+        ["--input", "p.yaml", "--checkpoint", "search.ckpt", "--checkpoint-interval", "5", "--resume"]
+    )
+    assert args.checkpoint == "search.ckpt"
+    assert args.checkpoint_interval == 5.0
+    assert args.resume is True
+
+
+def test_run_resume_from_checkpoint(tmp_path, capsys):
+    path = write_puzzle_yaml(_CAPACITY4_SOLVABLE_BOTTLES)
+    checkpoint_path = str(tmp_path / "search.ckpt")
+    args = CLIArgs(input_path=path, checkpoint_path=checkpoint_path, resume=True)
+    # ファイルがなければ最初から探索する
+    assert run(args) == 0
+    assert "合計" in capsys.readouterr().out
+
+
+def test_run_checkpoint_rejects_portfolio(tmp_path, capsys):
+    path = write_puzzle_yaml(_CAPACITY4_SOLVABLE_BOTTLES)
+    args = CLIArgs(
+        input_path=path, strategy="portfolio", checkpoint_path=str(tmp_path / "search.ckpt")
+    )
+    assert run(args) == 1
+    assert "チェックポイント" in capsys.readouterr().err
+
+
+def test_run_invalid_checkpoint_file(tmp_path, capsys):
+    path = write_puzzle_yaml(_CAPACITY4_SOLVABLE_BOTTLES)
+    checkpoint_path = tmp_path / "search.ckpt"
+    checkpoint_path.write_bytes(b"broken")
+    args = CLIArgs(input_path=path, checkpoint_path=str(checkpoint_path), resume=True)
+    assert run(args) == 1
+    assert "チェックポイント" in capsys.readouterr().err
+
+
+def test_run_checkpoint_write_failure(tmp_path, capsys):
+    path = write_puzzle_yaml(_CAPACITY4_SOLVABLE_BOTTLES)
+    args = CLIArgs(
+        input_path=path,
+        checkpoint_path=str(tmp_path / "missing" / "search.ckpt"),
+        checkpoint_interval=0.0,
+    )
+    assert run(args) == 1
+    assert "チェックポイントファイルの読み書きに失敗しました" in capsys.readouterr().err
+
+
+def test_run_other_io_error_is_not_reported_as_checkpoint(monkeypatch, capsys):
+    path = write_puzzle_yaml(_CAPACITY4_SOLVABLE_BOTTLES)
+
+    def fail(**kwargs):
+        raise OSError(24, "Too many open files")
+
+    monkeypatch.setattr(main_module, "solve_portfolio", fail)
+    assert run(CLIArgs(input_path=path, strategy="portfolio")) == 1
+    err = capsys.readouterr().err
+    assert "探索中に入出力エラーが発生しました" in err
+    assert "チェックポイント" not in err
+
+
+def test_run_all_solutions_streams_each_solution(capsys):
+    path = write_puzzle_yaml(_CAPACITY4_SOLVABLE_BOTTLES)
+    assert run(CLIArgs(input_path=path, all_solutions=0)) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) > 1
+    assert all(line.startswith("解法 ") for line in lines)
+
+
+def test_run_all_solutions_with_limit(capsys):
+    path = write_puzzle_yaml(_CAPACITY4_SOLVABLE_BOTTLES)
+    assert run(CLIArgs(input_path=path, all_solutions=1, output_format="json")) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 1
+    assert json.loads(lines[0])["solution"] == 1
+
+
+def test_run_count_solutions(capsys):
+    path = write_puzzle_yaml(_CAPACITY4_SOLVABLE_BOTTLES)
+    assert run(CLIArgs(input_path=path, count_solutions=True)) == 0
+    assert "通り" in capsys.readouterr().out
+
+
+def test_build_parser_all_solutions():
+    parser = build_parser()
+    assert parser.parse_args(["--input", "p.yaml", "--all-solutions"]).all_solutions == 0
+    assert parser.parse_args(["--input", "p.yaml", "--all-solutions", "3"]).all_solutions == 3
+    assert parser.parse_args(["--input", "p.yaml"]).all_solutions is None
+
+
+def test_run_analyze(tmp_path, capsys):
+    path = write_puzzle_yaml(_CAPACITY4_SOLVABLE_BOTTLES)
+    graph_path = str(tmp_path / "graph.wsg")
+    args = CLIArgs(
+        input_path=path, analyze=True, output_format="json", graph_output_path=graph_path
+    )
+    assert run(args) == 0
+    stats = json.loads(capsys.readouterr().out)
+    assert stats["states"] > 0
+    assert os.path.getsize(graph_path) > 0
+
+
+def test_run_analyze_already_solved(capsys):
+    path = write_puzzle_yaml([["red"] * 4, ["blue"] * 4, [], []])
+    assert run(CLIArgs(input_path=path, analyze=True)) == 0
+    assert "到達可能な状態数" in capsys.readouterr().out
+
+
+def test_run_hint_with_table(tmp_path, capsys):
+    path = write_puzzle_yaml(_CAPACITY4_SOLVABLE_BOTTLES)
+    table_path = str(tmp_path / "level.wht")
+    assert run(CLIArgs(input_path=path, hint_table_build_path=table_path)) == 0
+    assert "状態数" in capsys.readouterr().out
+    assert run(CLIArgs(input_path=path, hint=True, hint_table_path=table_path)) == 0
+    assert "ヒント表" in capsys.readouterr().out
+    assert run(CLIArgs(input_path=path, hint=True)) == 0
+    assert "次の一手: ボトル" in capsys.readouterr().out
+
+
+def test_run_hint_mid_game_state(tmp_path, capsys):
+    level = write_puzzle_yaml(_CAPACITY4_SOLVABLE_BOTTLES)
+    table_path = str(tmp_path / "level.wht")
+    assert run(CLIArgs(input_path=level, hint_table_build_path=table_path)) == 0
+    capsys.readouterr()
+    # ボトル 1 の上の blue をボトル 3 に注いだ後の途中局面
+    path = write_puzzle_yaml(
+        [["red", "blue", "red"], ["blue", "red", "blue", "red"], ["blue"], []]
+    )
+    assert run(CLIArgs(input_path=path, hint=True, hint_table_path=table_path)) == 1
+    assert "容量" in capsys.readouterr().err
+    args = CLIArgs(input_path=path, hint=True, hint_table_path=table_path, capacity=4)
+    assert run(args) == 0
+    assert "ヒント表" in capsys.readouterr().out
+    args = CLIArgs(input_path=path, hint=True, hint_table_path=table_path, capacity=5)
+    assert run(args) == 1
+
+
+def test_run_hint_rejects_bad_table(capsys):
+    path = write_puzzle_yaml(_CAPACITY4_SOLVABLE_BOTTLES)
+    assert run(CLIArgs(input_path=path, hint=True, hint_table_path=path)) == 1
+    assert "ヒント表ファイル" in capsys.readouterr().err
+
+
+def test_run_auto_strategy(tmp_path, capsys):
+    path = write_puzzle_yaml(_CAPACITY4_SOLVABLE_BOTTLES)
+    assert run(CLIArgs(input_path=path, strategy="auto", debug=True)) == 0
+    captured = capsys.readouterr()
+    assert "合計" in captured.out
+    assert "[DEBUG] AUTO:" in captured.err
+    model_path = tmp_path / "selector.json"
+    model_path.write_text('{"version": 1, "rules": [{"when": [], "choice": "dfs"}]}')
+    args = CLIArgs(input_path=path, strategy="auto", selector_model_path=str(model_path), debug=True)
+    assert run(args) == 0
+    assert "-> dfs\n" in capsys.readouterr().err
+
+
+def test_train_selector(tmp_path, monkeypatch, capsys):
+    records_path = str(tmp_path / "runs.jsonl")
+    model_path = str(tmp_path / "selector.json")
+    state, _ = main_module.parse_file(write_puzzle_yaml(_CAPACITY4_SOLVABLE_BOTTLES))
+    write_records(run_benchmark("p", state, [StrategyChoice("bfs")], timeout=5.0), records_path)
+    monkeypatch.setattr(
+        sys, "argv", ["main.py", "--train-selector", records_path, "--selector-model", model_path]
+    )
+    with pytest.raises(SystemExit) as exc_info:
+        main_module.main()
+    assert exc_info.value.code == 0
+    assert "常に: bfs+prune" in capsys.readouterr().out
+    assert StrategySelector.load(model_path).rules[0].choice == StrategyChoice("bfs")
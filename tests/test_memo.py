@@ -0,0 +1,93 @@
+"""src/memo.py のテスト"""
+import json
+
+import pytest
+from src.memo import LRUTable, MemoTable
+from src.models import Move, PuzzleState
+
+
+def make_state() -> PuzzleState:
+    return (
+        ("red", "blue", "red", "blue"),
+        ("blue", "red", "blue", "red"),
+        (),
+        (),
+    )
+
+
+def test_lru_table_evicts_least_recently_used():
+    table: LRUTable[str, int] = LRUTable(2)
+    table.put("a", 1)
+    table.put("b", 2)
+    assert table.get("a") == 1
+    table.put("c", 3)
+    assert "b" not in table
+    assert "a" in table and "c" in table
+    assert table.evictions == 1
+
+
+def test_lru_table_rejects_negative_size():
+    with pytest.raises(ValueError):
+        LRUTable(-1)
+
+
+def test_memo_dead_ignores_bottle_order():
+    memo = MemoTable()
+    state = make_state()
+    memo.mark_dead(state, 4)
+    assert memo.is_dead(tuple(reversed(state)), 4)
+    # 容量が異なれば別のパズル
+    assert not memo.is_dead(state, 5)
+
+
+def test_memo_bounds_keep_tightest_values():
+    memo = MemoTable()
+    state = make_state()
+    assert memo.lower_bound(state, 4) == 0
+    assert memo.upper_bound(state, 4) is None
+    memo.record_lower_bound(state, 4, 5)
+    memo.record_lower_bound(state, 4, 3)
+    memo.record_upper_bound(state, 4, 9)
+    memo.record_upper_bound(state, 4, 12)
+    assert memo.lower_bound(state, 4) == 5
+    assert memo.upper_bound(state, 4) == 9
+
+
+def test_memo_record_solution():
+    memo = MemoTable()
+    state: PuzzleState = (("red", "red", "red", "red"), ("blue", "blue", "blue"), ("blue",), ())
+    moves = [Move(2, 1)]
+    memo.record_solution(state, moves, 4, optimal=True)
+    assert memo.lower_bound(state, 4) == 1
+    assert memo.upper_bound(state, 4) == 1
+    other = MemoTable()
+    other.record_solution(state, moves, 4, optimal=False)
+    assert other.lower_bound(state, 4) == 0
+    assert other.upper_bound(state, 4) == 1
+
+
+def test_memo_save_and_load(tmp_path):
+    memo = MemoTable()
+    state = make_state()
+    memo.mark_dead(state, 4)
+    memo.record_lower_bound(state, 3, 2)
+    path = str(tmp_path / "memo.json")
+    memo.save(path)
+    loaded = MemoTable.load(path)
+    assert loaded.is_dead(state, 4)
+    assert loaded.lower_bound(state, 3) == 2
+    assert len(loaded) == 2
+
+
+def test_memo_load_rejects_unknown_version(tmp_path):
+    path = tmp_path / "memo.json"
+    path.write_text(json.dumps({"version": 99, "dead": [], "bounds": []}), encoding="utf-8")
+    with pytest.raises(ValueError):
+        MemoTable.load(str(path))
+
+
+def test_memo_load_rejects_malformed_file(tmp_path):
+    path = tmp_path / "memo.json"
+    path.write_text("{not json", encoding="utf-8")
+    with pytest.raises(ValueError):
+        MemoTable.load(str(path))
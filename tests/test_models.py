@@ -145,3 +145,19 @@ def test_apply_move_result_is_hashable():
     # set に格納できる（hashable）
     visited = {state, new_state}
     assert len(visited) == 2
+
+
+def test_apply_move_block_limited_by_available_space():
+    state: PuzzleState = (("green", "red", "red", "red"), ("blue", "blue", "red"), ())
+    new_state = apply_move(state, Move(0, 1))
+    assert new_state[0] == ("green", "red", "red")
+    assert new_state[1] == ("blue", "blue", "red", "red")
+
+
+def test_apply_move_shares_unchanged_bottles():
+    state: PuzzleState = (("red", "blue", "blue"), ("green",), (), ("yellow", "yellow"))
+    new_state = apply_move(state, Move(0, 2))
+    assert new_state[0] == ("red",)
+    assert new_state[2] == ("blue", "blue")
+    assert new_state[1] is state[1]
+    assert new_state[3] is state[3]
@@ -1,4 +1,5 @@
 """src/parser.py の単体テスト"""
+import io
 import json
 import os
 import tempfile
@@ -6,8 +7,9 @@ import tempfile
 import pytest
 import yaml
 
+from src.binary_format import BinaryRecordWriter
 from src.models import BOTTLE_CAPACITY, ParseError
-from src.parser import parse_file
+from src.parser import _iter_json_values, iter_puzzles, parse_file
 
 
 # --- テスト用ヘルパー ---
@@ -160,6 +162,17 @@ def test_parse_error_mismatched_capacity():
     assert "容量" in str(exc_info.value) or "セグメント" in str(exc_info.value) or "一致" in str(exc_info.value)
 
 
+def test_parse_partial_bottles_with_capacity():
+    # 途中局面: 容量を指定すると長さの揃わないボトルを受け付ける
+    data = {"bottles": [["red", "blue", "red"], ["blue", "red", "blue", "red"], ["blue"], []]}
+    path = write_temp(yaml.dump(data), ".yaml")
+    state, capacity = parse_file(path, capacity=4)
+    assert capacity == 4
+    assert state[2] == ("blue",)
+    with pytest.raises(ParseError):
+        parse_file(path, capacity=3)
+
+
 def test_parse_returns_tuple_of_tuples():
     data = {"bottles": [["red", "blue"], ["blue", "red"], ["red", "blue"], ["blue", "red"]]}
     path = write_temp(yaml.dump(data), ".yaml")
@@ -167,3 +180,162 @@ def test_parse_returns_tuple_of_tuples():
     assert isinstance(state, tuple)
     for b in state:
         assert isinstance(b, tuple)
+
+
+# --- 複数パズルの一括読み込み ---
+
+def test_iter_puzzles_yaml_multi_document():
+    docs = [{"bottles": _STANDARD_BOTTLES}, {"bottles": [["a", "b"], ["b", "a"], [], []]}]
+    path = write_temp(yaml.dump_all(docs), ".yaml")
+    puzzles = list(iter_puzzles(path))
+    assert len(puzzles) == 2
+    assert puzzles[0][0][0] == ("red", "blue", "green", "red")
+    assert puzzles[0][1] == 4
+    assert puzzles[1][1] == 2
+
+
+def test_iter_puzzles_yaml_ignores_empty_document():
+    content = yaml.dump({"bottles": _STANDARD_BOTTLES}) + "---\n"
+    path = write_temp(content, ".yaml")
+    assert len(list(iter_puzzles(path))) == 1
+
+
+def test_iter_puzzles_json_array():
+    data = [{"bottles": _STANDARD_BOTTLES}] * 3
+    path = write_temp(json.dumps(data), ".json")
+    puzzles = list(iter_puzzles(path))
+    assert len(puzzles) == 3
+    assert all(capacity == 4 for _, capacity in puzzles)
+
+
+def test_iter_puzzles_json_array_streams_across_chunks(monkeypatch):
+    # 読み込み単位より大きな要素・単位の境界をまたぐ数値を含む配列
+    monkeypatch.setattr("src.parser._JSON_CHUNK_SIZE", 7)
+    data = [{"bottles": _STANDARD_BOTTLES, "id": 1234567}] * 4
+    path = write_temp(json.dumps(data, indent=2), ".json")
+    puzzles = list(iter_puzzles(path))
+    assert len(puzzles) == 4
+    assert puzzles[0][0][3] == ()
+
+
+def test_iter_puzzles_json_array_yields_before_bad_record():
+    records = [json.dumps({"bottles": _STANDARD_BOTTLES})] * 2
+    path = write_temp("[" + ",".join(records) + " {broken", ".json")
+    puzzles = iter_puzzles(path)
+    assert len(next(puzzles)[0]) == 4
+    assert len(next(puzzles)[0]) == 4
+    with pytest.raises(ParseError):
+        next(puzzles)
+
+
+def test_iter_json_raises_syntax_error_without_reading_rest(monkeypatch):
+    monkeypatch.setattr("src.parser._JSON_CHUNK_SIZE", 64)
+    record = json.dumps({"bottles": _STANDARD_BOTTLES})
+    text = "[" + record + ', {"bottles": [[red]]}, ' + ", ".join([record] * 1000) + "]"
+    f = io.StringIO(text)
+    values = _iter_json_values(f, "pack.json")
+    assert next(values)["bottles"] == _STANDARD_BOTTLES
+    with pytest.raises(ParseError):
+        next(values)
+    assert f.tell() < 1000
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 7])
+def test_iter_json_values_split_at_any_boundary(monkeypatch, chunk_size):
+    # リテラル・エスケープ・数値が読み込みの境界で切れても正しくデコードする
+    monkeypatch.setattr("src.parser._JSON_CHUNK_SIZE", chunk_size)
+    data = [{"a": True, "b": None, "c": "\U0001f600\u00e9", "d": -12.5e3, "e": False}] * 3
+    values = list(_iter_json_values(io.StringIO(json.dumps(data)), "values.json"))
+    assert values == data
+
+
+def test_iter_puzzles_json_empty_array():
+    assert list(iter_puzzles(write_temp(" [ ] \n", ".json"))) == []
+
+
+@pytest.mark.parametrize("content", ["[] []", "", "[{\"bottles\": []}", "[1 2]"])
+def test_iter_puzzles_json_rejects_malformed(content):
+    path = write_temp(content, ".json")
+    with pytest.raises(ParseError):
+        list(iter_puzzles(path))
+
+
+def test_iter_puzzles_json_single_object():
+    path = write_temp(json.dumps({"bottles": _STANDARD_BOTTLES}), ".json")
+    assert len(list(iter_puzzles(path))) == 1
+
+
+def test_iter_puzzles_jsonl():
+    lines = [json.dumps({"bottles": _STANDARD_BOTTLES}) for _ in range(5)]
+    path = write_temp("\n".join(lines) + "\n\n", ".jsonl")
+    puzzles = list(iter_puzzles(path))
+    assert len(puzzles) == 5
+    assert puzzles[4][0][3] == ()
+
+
+def test_iter_puzzles_is_lazy():
+    # 2 件目が不正でも 1 件目は取得できる（エラーはレコード到達時に送出）
+    lines = [json.dumps({"bottles": _STANDARD_BOTTLES}), "{broken"]
+    path = write_temp("\n".join(lines), ".jsonl")
+    puzzles = iter_puzzles(path)
+    state, capacity = next(puzzles)
+    assert capacity == 4
+    with pytest.raises(ParseError) as exc_info:
+        next(puzzles)
+    assert "2 行目" in str(exc_info.value)
+
+
+def test_iter_puzzles_reports_document_index():
+    docs = [{"bottles": _STANDARD_BOTTLES}, {"wrong_key": []}]
+    path = write_temp(yaml.dump_all(docs), ".yaml")
+    with pytest.raises(ParseError) as exc_info:
+        list(iter_puzzles(path))
+    assert "ドキュメント 2" in str(exc_info.value)
+
+
+def test_iter_puzzles_file_not_found():
+    with pytest.raises(FileNotFoundError):
+        next(iter_puzzles("/nonexistent/path/puzzles.jsonl"))
+
+
+def test_parse_file_jsonl_single_record():
+    path = write_temp(json.dumps({"bottles": _STANDARD_BOTTLES}) + "\n", ".jsonl")
+    state, capacity = parse_file(path)
+    assert capacity == 4
+
+
+def test_parse_file_jsonl_rejects_multiple_records():
+    lines = [json.dumps({"bottles": _STANDARD_BOTTLES})] * 2
+    path = write_temp("\n".join(lines), ".jsonl")
+    with pytest.raises(ParseError):
+        parse_file(path)
+
+
+# --- バイナリ形式 ---
+
+def write_binary(count: int) -> str:
+    fd, path = tempfile.mkstemp(suffix=".wsb")
+    os.close(fd)
+    state = tuple(tuple(b) for b in _STANDARD_BOTTLES)
+    with BinaryRecordWriter(path) as writer:
+        for _ in range(count):
+            writer.append(state, 4)
+    return path
+
+
+def test_parse_binary_single_record():
+    state, capacity = parse_file(write_binary(1))
+    assert capacity == 4
+    assert state[0] == ("red", "blue", "green", "red")
+    assert state[3] == ()
+
+
+def test_parse_binary_rejects_multiple_records():
+    with pytest.raises(ParseError):
+        parse_file(write_binary(2))
+
+
+def test_iter_puzzles_binary():
+    puzzles = list(iter_puzzles(write_binary(3)))
+    assert len(puzzles) == 3
+    assert puzzles[2][0][1] == ("blue", "green", "red", "blue")
@@ -0,0 +1,49 @@
+"""src/portfolio.py のテスト"""
+import pytest
+from src.models import PuzzleState, PuzzleTimeoutError
+from src.portfolio import solve_portfolio
+from src.solver import solve
+from tests.puzzles import assert_solves, make_capacity4_solvable, make_eight_color_puzzle
+
+
+def test_solve_portfolio_returns_valid_solution():
+    state = make_eight_color_puzzle()
+    result = solve_portfolio(state, timeout=10.0)
+    assert result.solved is True
+    assert_solves(state, result.moves)
+
+
+def test_solve_portfolio_deadline_prefers_shortest_solution():
+    state = make_capacity4_solvable()
+    best = solve(state, strategy="bfs", timeout=10.0)
+    result = solve_portfolio(state, strategies=("dfs", "bfs"), timeout=10.0, deadline=10.0)
+    assert len(result.moves) == len(best.moves)
+
+
+def test_solve_portfolio_already_solved():
+    state: PuzzleState = (("red", "red", "red", "red"), ())
+    result = solve_portfolio(state)
+    assert result.solved is True
+    assert result.moves == []
+
+
+def test_solve_portfolio_unsolvable_returns_false():
+    state: PuzzleState = (
+        ("red", "blue", "green", "yellow"),
+        ("yellow", "green", "blue", "red"),
+        ("blue", "red", "yellow", "green"),
+        ("green", "yellow", "red", "blue"),
+    )
+    result = solve_portfolio(state, timeout=5.0)
+    assert result.solved is False
+
+
+def test_solve_portfolio_all_timeouts_raises():
+    state = make_eight_color_puzzle()
+    with pytest.raises(PuzzleTimeoutError):
+        solve_portfolio(state, strategies=("bfs",), timeout=0.01)
+
+
+def test_solve_portfolio_debug_reports_winner(capsys):
+    solve_portfolio(make_capacity4_solvable(), strategies=("greedy",), debug=True)
+    assert "[DEBUG] PORTFOLIO: selected greedy" in capsys.readouterr().err
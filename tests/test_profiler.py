@@ -0,0 +1,69 @@
+"""src/profiler.py の単体テスト"""
+import json
+import os
+import tempfile
+
+from src.models import SearchProfile
+from src.profiler import SearchProfiler, format_profile_summary, profile_to_dict, write_trace
+
+
+def make_profile() -> SearchProfile:
+    profiler = SearchProfiler()
+    profiler.record_expansion(0, generated=4, duplicates=0)
+    profiler.record_expansion(1, generated=3, duplicates=1)
+    profiler.record_expansion(1, generated=5, duplicates=3)
+    return profiler.finish()
+
+
+def test_wrap_accumulates_phase_time_and_returns_value():
+    profiler = SearchProfiler()
+    double = profiler.wrap("apply_move", lambda x: x * 2)
+    assert double(21) == 42
+    profile = profiler.finish()
+    assert profile.apply_move_time > 0.0
+    assert profile.move_generation_time == 0.0
+
+
+def test_record_expansion_aggregates_per_depth():
+    profile = make_profile()
+    assert profile.expanded == 3
+    assert profile.generated == 12
+    assert profile.duplicate_hits == 4
+    assert profile.states_per_depth == [1, 4, 4]
+    assert profile.branching_per_depth == [4.0, 4.0]
+
+
+def test_duplicate_ratio():
+    profile = make_profile()
+    assert profile.duplicate_ratio == 4 / 12
+
+
+def test_peak_memory_measured_between_start_and_finish():
+    profiler = SearchProfiler()
+    profiler.start()
+    data = [bytes(1024) for _ in range(100)]
+    profile = profiler.finish()
+    assert profile.peak_memory >= 100 * 1024
+    del data
+
+
+def test_profile_to_dict_is_json_serializable():
+    data = profile_to_dict(make_profile())
+    assert set(data["phase_times"]) == {"move_generation", "apply_move", "hashing", "is_solved"}
+    assert json.loads(json.dumps(data))["states_per_depth"] == [1, 4, 4]
+
+
+def test_write_trace():
+    fd, path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    write_trace(make_profile(), path, metadata={"strategy": "bfs"})
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    assert data["metadata"]["strategy"] == "bfs"
+    assert data["profile"]["generated"] == 12
+
+
+def test_format_profile_summary():
+    summary = format_profile_summary(make_profile())
+    assert "move_generation" in summary
+    assert "[PROFILE]" in summary
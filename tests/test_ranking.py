@@ -0,0 +1,92 @@
+"""src/ranking.py のテスト"""
+import random
+from itertools import permutations, product
+
+import pytest
+from src.generator import generate_puzzle
+from src.models import PuzzleState
+from src.ranking import PackedArray, StateRanker
+
+
+def test_rank_unrank_roundtrip_on_whole_space():
+    ranker = StateRanker({"red": 2, "blue": 2}, 3, 2)
+    normal_forms: set[PuzzleState] = set()
+    for rank in range(ranker.size):
+        state = ranker.unrank(rank)
+        assert state == StateRanker.normalize(state)
+        assert ranker.rank(state) == rank
+        normal_forms.add(state)
+    # ランクは密で、総当たりで作った全状態の正規形とちょうど一致する
+    expected = {
+        StateRanker.normalize(state)
+        for state in _all_states(("red", "red", "blue", "blue"), 3, 2)
+    }
+    assert normal_forms == expected
+    assert ranker.size == len(expected)
+
+
+def test_size_counts_distinct_states():
+    # 同じ長さのボトルの並べ替えに別のランクを振らない
+    ranker = StateRanker({"red": 4, "blue": 4, "green": 4}, 5, 4)
+    assert ranker.size == 105_342
+    assert ranker.upper_bound == 381_150
+    assert ranker.upper_bound // 120 <= ranker.size <= ranker.upper_bound
+
+
+def _all_states(segments: tuple[str, ...], n_bottles: int, capacity: int) -> set[PuzzleState]:
+    """segments を n_bottles 本に容量以下で配る状態をすべて作る（総当たり）"""
+    states: set[PuzzleState] = set()
+    for order in set(permutations(segments)):
+        for lengths in product(range(capacity + 1), repeat=n_bottles):
+            if sum(lengths) != len(segments):
+                continue
+            bottles, start = [], 0
+            for length in lengths:
+                bottles.append(tuple(order[start:start + length]))
+                start += length
+            states.add(tuple(bottles))
+    return states
+
+
+def test_rank_ignores_bottle_order():
+    state = generate_puzzle(4, rng=random.Random(1)).state
+    ranker = StateRanker.for_state(state, 4)
+    shuffled = list(state)
+    random.Random(2).shuffle(shuffled)
+    assert ranker.rank(tuple(shuffled)) == ranker.rank(state)
+    assert 0 <= ranker.rank(state) < ranker.size
+    assert ranker.unrank(ranker.rank(state)) == StateRanker.normalize(state)
+
+
+def test_rank_rejects_other_state_space():
+    ranker = StateRanker({"red": 2, "blue": 2}, 3, 2)
+    with pytest.raises(ValueError):
+        ranker.rank((("red", "red"), ("green", "green"), ()))
+    with pytest.raises(ValueError):
+        ranker.rank((("red", "red"), ("blue", "blue")))
+    with pytest.raises(ValueError):
+        ranker.unrank(ranker.size)
+
+
+@pytest.mark.parametrize("bits", [1, 2, 4, 8])
+def test_packed_array_stores_values(bits):
+    with PackedArray(1000, bits) as table:
+        assert len(table) == 1000
+        assert table.nbytes == -(-1000 * bits // 8)
+        for index in range(0, 1000, 3):
+            table[index] = index % (1 << bits)
+        for index in range(1000):
+            assert table[index] == (index % (1 << bits) if index % 3 == 0 else 0)
+
+
+def test_packed_array_maps_file(tmp_path):
+    path = tmp_path / "visited.bin"
+    with PackedArray(100, 1, str(path)) as table:
+        table[42] = 1
+        assert table[42] == 1 and table[41] == 0
+    assert path.stat().st_size == 13
+
+
+def test_packed_array_rejects_bad_bits():
+    with pytest.raises(ValueError):
+        PackedArray(10, 3)
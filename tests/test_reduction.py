@@ -0,0 +1,65 @@
+"""src/reduction.py のテスト"""
+from src.models import Move, PuzzleState
+from src.reduction import reduce_puzzle
+from src.solver import solve
+from tests.puzzles import assert_solves
+
+
+def make_state() -> PuzzleState:
+    return (
+        ("red", "red", "red", "red"),
+        ("blue", "green", "blue", "green"),
+        (),
+        ("green", "blue", "green", "blue"),
+        ("yellow", "yellow", "yellow", "yellow"),
+    )
+
+
+def test_reduce_removes_completed_bottles():
+    reduction = reduce_puzzle(make_state(), 4)
+    assert reduction.removed == 2
+    assert reduction.bottles == (1, 2, 3)
+    assert reduction.state == (
+        ("blue", "green", "blue", "green"),
+        (),
+        ("green", "blue", "green", "blue"),
+    )
+
+
+def test_reduce_keeps_completed_bottle_of_repeated_color():
+    # 同じ色がもう 1 本分あるので、完成済みのボトルも注ぎ合いに使われうる
+    state: PuzzleState = (
+        ("red", "red", "red", "red"),
+        ("blue", "red", "red", "red"),
+        ("red", "blue", "blue", "blue"),
+        (),
+    )
+    assert reduce_puzzle(state, 4).removed == 0
+
+
+def test_expand_moves_maps_back_to_original_bottles():
+    reduction = reduce_puzzle(make_state(), 4)
+    assert reduction.expand_moves([Move(0, 1), Move(2, 0)]) == [Move(1, 2), Move(3, 1)]
+
+
+def test_reduce_removes_surplus_empty_bottles():
+    # セグメントは 4 つなので、空でない 3 本とあわせて空ボトルは 1 本あれば足りる
+    state: PuzzleState = ((), ("red", "blue"), (), ("blue",), (), ("red",))
+    reduction = reduce_puzzle(state, 2)
+    assert reduction.removed == 2
+    assert reduction.bottles == (0, 1, 3, 5)
+    assert reduction.state == ((), ("red", "blue"), ("blue",), ("red",))
+
+
+def test_reduce_keeps_usable_empty_bottles():
+    state: PuzzleState = (("red", "blue", "red", "blue"), ("blue", "red", "blue", "red"), (), ())
+    assert reduce_puzzle(state, 4).removed == 0
+
+
+def test_solve_with_surplus_empty_bottles_keeps_shortest_length():
+    state: PuzzleState = (("red", "blue", "red"), ("blue", "red", "blue")) + ((),) * 6
+    reduction = reduce_puzzle(state, 3)
+    assert reduction.removed == 2
+    result = solve(state, bottle_capacity=3)
+    assert len(result.moves) == 5  # 空ボトルを取り除かずに探索した場合の最短手数
+    assert_solves(state, result.moves, 3)
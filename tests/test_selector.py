@@ -0,0 +1,98 @@
+"""src/selector.py のテスト"""
+import pytest
+from src.estimator import PuzzleFeatures
+from src.models import PuzzleState
+from src.selector import (
+    DEFAULT_SELECTOR,
+    BenchmarkRecord,
+    SelectorRule,
+    StrategyChoice,
+    StrategySelector,
+    read_records,
+    run_benchmark,
+    select_strategy,
+    train_selector,
+    write_records,
+)
+
+BFS = StrategyChoice("bfs")
+DFS = StrategyChoice("dfs")
+
+
+def make_puzzle() -> PuzzleState:
+    return (
+        ("red", "blue", "red", "blue"),
+        ("blue", "red", "blue", "red"),
+        (),
+        (),
+    )
+
+
+def features(colors: int) -> PuzzleFeatures:
+    return PuzzleFeatures(colors + 2, colors, 4, 2, 2 * colors, colors, 10)
+
+
+def record(puzzle: str, colors: int, choice: StrategyChoice, elapsed: float,
+           moves: int | None) -> BenchmarkRecord:
+    outcome = "timeout" if moves is None else "solved"
+    return BenchmarkRecord(puzzle, features(colors), choice, outcome, elapsed, moves, 2.0)
+
+
+def test_choice_labels_roundtrip():
+    for choice in (BFS, StrategyChoice("dfs", prune=False), StrategyChoice("beam", True, 1024)):
+        assert StrategyChoice.parse(choice.label) == choice
+    for label in ("astar", "bfs+fast", "dfs:8", "beam:0+prune"):
+        with pytest.raises(ValueError):
+            StrategyChoice.parse(label)
+
+
+def test_train_splits_on_cost():
+    records = []
+    for colors in range(3, 11):
+        small = colors <= 6
+        # 小さいパズルは BFS が速く最短、大きいパズルは BFS がタイムアウトし DFS が遠回りで解く
+        records.append(record(f"p{colors}", colors, BFS, 0.1 if small else 2.0, 20 if small else None))
+        records.append(record(f"p{colors}", colors, DFS, 0.01, 40 if small else 30))
+    selector = train_selector(records, min_samples=2)
+    assert selector.select(features(4)) == BFS
+    assert selector.select(features(9)) == DFS
+    assert len(selector.rules) == 2
+    # 遠回りの重みを 0 にすると常に速い DFS を選び、分割しない
+    assert train_selector(records, move_cost=0.0).rules == (SelectorRule((), DFS),)
+    with pytest.raises(ValueError):
+        train_selector([])
+
+
+def test_selector_save_and_load(tmp_path):
+    path = str(tmp_path / "selector.json")
+    selector = StrategySelector([
+        SelectorRule((("colors", "<=", 6),), BFS),
+        SelectorRule((("colors", ">", 6),), StrategyChoice("beam", True, 64)),
+    ])
+    selector.save(path)
+    assert StrategySelector.load(path).rules == selector.rules
+    (tmp_path / "bad.json").write_text('{"version": 1, "rules": [{"when": []}]}')
+    with pytest.raises(ValueError):
+        StrategySelector.load(str(tmp_path / "bad.json"))
+    with pytest.raises(ValueError):
+        StrategySelector([SelectorRule((("unknown", "<=", 1),), BFS)])
+
+
+def test_benchmark_records_roundtrip(tmp_path):
+    path = str(tmp_path / "runs.jsonl")
+    records = run_benchmark("p", make_puzzle(), [BFS, DFS], timeout=5.0)
+    assert [r.outcome for r in records] == ["solved", "solved"]
+    write_records(records, path)
+    write_records(records[:1], path)
+    loaded = read_records(path)
+    assert len(loaded) == 3
+    assert loaded[0]._replace(elapsed=0.0) == records[0]._replace(elapsed=0.0)
+    (tmp_path / "bad.jsonl").write_text('{"puzzle": "p"}\n')
+    with pytest.raises(ValueError):
+        read_records(str(tmp_path / "bad.jsonl"))
+
+
+def test_select_strategy_uses_default_rules():
+    choice, puzzle_features = select_strategy(make_puzzle())
+    assert puzzle_features.colors == 2
+    assert choice == DEFAULT_SELECTOR.select(puzzle_features)
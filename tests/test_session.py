@@ -0,0 +1,122 @@
+"""src/session.py のテスト"""
+import pytest
+from src.models import PuzzleState, apply_move
+from src.session import SolverSession
+from src.solver import solve
+from tests.puzzles import (
+    assert_solves,
+    make_capacity4_solvable,
+    make_three_color_puzzle,
+    make_unsolvable,
+)
+
+
+@pytest.mark.parametrize("strategy", ["bfs", "dfs"])
+def test_session_solves_puzzle(strategy):
+    state = make_three_color_puzzle()
+    result = SolverSession().solve(state, strategy=strategy)
+    assert result.solved is True
+    assert_solves(state, result.moves)
+
+
+def test_session_bfs_is_optimal():
+    state = make_three_color_puzzle()
+    result = SolverSession().solve(state)
+    assert len(result.moves) == len(solve(state, strategy="bfs").moves)
+
+
+def test_session_reuses_solution_for_permuted_puzzle():
+    session = SolverSession()
+    state = make_three_color_puzzle()
+    first = session.solve(state)
+    permuted = (state[3], state[2], state[0], state[4], state[1])
+    second = session.solve(permuted)
+    assert second.states_visited == 0
+    assert len(second.moves) == len(first.moves)
+    assert_solves(permuted, second.moves)
+    assert session.known_distance(permuted) == len(first.moves)
+
+
+def test_session_edited_puzzle_stays_optimal():
+    session = SolverSession()
+    state = make_three_color_puzzle()
+    session.solve(state)
+    # 最初の 1 手を指した状態は前回の経路上にある
+    edited = apply_move(state, session.solve(state).moves[0])
+    result = session.solve(edited)
+    assert len(result.moves) == len(solve(edited, strategy="bfs").moves)
+    assert_solves(edited, result.moves)
+
+
+def test_session_remembers_dead_states():
+    session = SolverSession()
+    state = make_unsolvable()
+    assert session.solve(state).solved is False
+    assert session.is_known_dead(state)
+    result = session.solve(tuple(reversed(state)))
+    assert result.solved is False
+    assert result.states_visited == 0
+
+
+def test_session_dfs_result_is_not_used_as_exact_distance():
+    session = SolverSession()
+    state = make_three_color_puzzle()
+    session.solve(state, strategy="dfs")
+    assert session.known_distance(state) is None
+    result = session.solve(state, strategy="bfs")
+    assert len(result.moves) == len(solve(state, strategy="bfs").moves)
+
+
+def test_session_evicts_least_recently_used_entries():
+    session = SolverSession(max_solvable_entries=3)
+    session.solve(make_three_color_puzzle())
+    stats = session.stats
+    assert stats.solvable_entries == 3
+    assert stats.evictions > 0
+
+
+def test_session_clear():
+    session = SolverSession()
+    session.solve(make_capacity4_solvable())
+    session.clear()
+    assert session.stats.solvable_entries == 0
+
+
+def test_session_reuses_solution_for_color_permuted_puzzle():
+    session = SolverSession()
+    state = make_three_color_puzzle()
+    first = session.solve(state)
+    renamed = {"red": "green", "green": "blue", "blue": "red"}
+    permuted: PuzzleState = tuple(
+        tuple(renamed.get(color, color) for color in bottle) for bottle in reversed(state)
+    )
+    second = session.solve(permuted)
+    assert second.solved is True
+    assert second.states_visited == 0
+    assert len(second.moves) == len(first.moves)
+    assert_solves(permuted, second.moves)
+    assert session.stats.puzzle_entries == 1
+
+
+def test_session_keys_include_capacity():
+    session = SolverSession()
+    state: PuzzleState = (("red", "blue", "red"), ("blue", "red", "blue"), (), ())
+    assert session.solve(state, bottle_capacity=3).solved is True
+    # 同じ並びでも容量が異なれば別のパズル（容量 4 では解がない）
+    assert session.solve(state, bottle_capacity=4).solved is False
+    assert session.known_distance(state, bottle_capacity=4) is None
+    assert session.is_known_dead(state, bottle_capacity=4)
+    assert not session.is_known_dead(state, bottle_capacity=3)
+
+
+@pytest.mark.parametrize("prune", [False, True])
+def test_session_ignores_completed_bottles(prune):
+    session = SolverSession()
+    state = make_three_color_puzzle()
+    first = session.solve(state, prune=prune)
+    # 完成済みボトルを足しただけのパズルは表の結果を使い、手の番号は元のボトルに戻す
+    extended: PuzzleState = (("yellow",) * 4,) + state
+    second = session.solve(extended, prune=prune)
+    assert second.states_visited == 0
+    assert len(second.moves) == len(first.moves)
+    assert_solves(extended, second.moves)
@@ -1,8 +1,16 @@
 """src/solver.py の単体テスト"""
 import pytest
+from src.checkpoint import Checkpointer
+from src.memo import MemoTable
 from src.models import Move, PuzzleState, PuzzleTimeoutError, SolverResult, apply_move
-from src.solver import get_legal_moves, solve
+from src.solver import get_legal_moves, get_pruned_moves, solve
 from src.validator import is_solved
+from tests.puzzles import (
+    assert_solves,
+    make_capacity4_solvable,
+    make_eight_color_puzzle,
+    make_three_color_puzzle,
+)
 
 
 # --- テスト用パズル定義 ---
@@ -229,3 +237,415 @@ def test_solve_unsolvable_returns_false():
     result = solve(state, strategy="bfs", timeout=5.0)
     assert result.solved is False
     assert result.moves == []
+
+
+# --- 計測（profile）テスト ---
+
+@pytest.mark.parametrize("strategy", ["bfs", "dfs"])
+def test_solve_profile_collects_statistics(strategy):
+    state = make_capacity4_solvable()
+    result = solve(state, strategy=strategy, timeout=10.0, profile=True)
+    assert result.solved is True
+    profile = result.profile
+    assert profile is not None
+    assert profile.expanded > 0
+    assert profile.generated >= profile.duplicate_hits
+    assert 0.0 <= profile.duplicate_ratio <= 1.0
+    assert profile.move_generation_time > 0.0
+    assert profile.apply_move_time > 0.0
+    assert profile.peak_memory > 0
+    # 深さごとの新規状態数の合計は訪問済み状態数に一致する
+    assert sum(profile.states_per_depth) == result.states_visited
+
+
+def test_solve_bfs_profile_frontier_matches_solution_depth():
+    state = make_capacity4_solvable()
+    result = solve(state, strategy="bfs", timeout=10.0, profile=True)
+    assert result.profile is not None
+    # 終盤の状態から先は仕上げ手順で補うため、探索した深さは解の手数以下になる
+    assert 1 < len(result.profile.states_per_depth) <= len(result.moves) + 1
+
+
+def test_solve_profile_does_not_change_result():
+    state = make_capacity4_solvable()
+    plain = solve(state, strategy="bfs", timeout=10.0)
+    profiled = solve(state, strategy="bfs", timeout=10.0, profile=True)
+    assert plain.moves == profiled.moves
+    assert plain.states_visited == profiled.states_visited
+    assert plain.profile is None
+
+
+# --- 容量の引き回しテスト ---
+
+def test_get_legal_moves_uses_given_capacity():
+    # 満杯のボトルがない途中状態でも、指定容量で空き判定する
+    state: PuzzleState = (
+        ("red", "red", "red"),
+        ("blue", "red"),
+        ("blue", "blue", "blue"),
+    )
+    assert Move(1, 0) not in get_legal_moves(state)  # 推定容量 3 では満杯扱い
+    assert Move(1, 0) in get_legal_moves(state, bottle_capacity=4)
+
+
+def test_solve_uses_capacity_for_partially_filled_states():
+    # 探索途中で全ボトルが満杯でなくなるパズルでも最短手数を見つける
+    state: PuzzleState = (
+        ("c0", "c0", "c0", "c1"),
+        ("c1", "c0", "c1", "c1"),
+        (),
+    )
+    result = solve(state, strategy="bfs", timeout=10.0, bottle_capacity=4)
+    assert result.solved is True
+    assert len(result.moves) == 4
+
+
+# --- 冗長な手の除外（prune）テスト ---
+
+def test_get_pruned_moves_skips_reverse_of_last_move():
+    state: PuzzleState = (
+        ("red", "blue"),
+        ("green", "blue"),
+        ("red", "green"),
+        (),
+    )
+    moves, pruned = get_pruned_moves(state, last_move=Move(0, 1), bottle_capacity=4)
+    assert Move(1, 0) not in moves
+    assert Move(1, 0) in get_legal_moves(state, bottle_capacity=4)
+    assert pruned >= 1
+
+
+def test_get_pruned_moves_only_first_empty_bottle():
+    state: PuzzleState = (
+        ("red", "blue"),
+        (),
+        ("blue", "red"),
+        (),
+    )
+    moves, _ = get_pruned_moves(state, bottle_capacity=4)
+    assert Move(0, 1) in moves
+    assert Move(0, 3) not in moves
+    assert Move(2, 3) not in moves
+
+
+def test_get_pruned_moves_skips_single_color_bottle_into_empty():
+    state: PuzzleState = (
+        ("red", "red"),
+        ("blue", "red"),
+        (),
+        ("blue",),
+    )
+    moves, _ = get_pruned_moves(state, bottle_capacity=4)
+    assert Move(0, 2) not in moves  # 単色ボトルの丸ごと移動（並べ替えにすぎない）
+    assert Move(1, 2) in moves
+
+
+def test_get_pruned_moves_commute_orders_independent_moves():
+    prev_state: PuzzleState = (
+        ("red", "blue"),
+        ("green", "blue"),
+        ("yellow", "red"),
+        ("green", "red"),
+    )
+    last_move = Move(2, 3)
+    state: PuzzleState = (
+        ("red", "blue"),
+        ("green", "blue"),
+        ("yellow",),
+        ("green", "red", "red"),
+    )
+    # (0, 1) は直前の手 (2, 3) と独立で辞書順が前 → (0, 1), (2, 3) の順で既に生成済み
+    moves, _ = get_pruned_moves(state, last_move, prev_state, commute=True, bottle_capacity=4)
+    assert Move(0, 1) not in moves
+    moves, _ = get_pruned_moves(state, last_move, prev_state, commute=False, bottle_capacity=4)
+    assert Move(0, 1) in moves
+
+
+@pytest.mark.parametrize("strategy", ["bfs", "dfs"])
+def test_solve_prune_reports_saved_generations(strategy):
+    state = make_capacity4_solvable()
+    plain = solve(state, strategy=strategy, timeout=10.0)
+    pruned = solve(state, strategy=strategy, timeout=10.0, prune=True)
+    assert pruned.solved is True
+    assert pruned.moves_pruned > 0
+    assert plain.moves_pruned == 0
+    assert pruned.states_visited < plain.states_visited
+    assert_solves(state, pruned.moves)
+
+
+def test_solve_bfs_prune_keeps_optimal_length():
+    states: list[PuzzleState] = [
+        make_capacity4_solvable(),
+        (("c0", "c0", "c0", "c1"), ("c1", "c0", "c1", "c1"), ()),
+        (
+            ("c1", "c0", "c1", "c0"),
+            ("c0", "c2", "c2", "c2"),
+            ("c1", "c1", "c2", "c0"),
+            (),
+            (),
+        ),
+    ]
+    for state in states:
+        plain = solve(state, strategy="bfs", timeout=10.0, bottle_capacity=4)
+        pruned = solve(state, strategy="bfs", timeout=10.0, prune=True, bottle_capacity=4)
+        assert len(pruned.moves) == len(plain.moves)
+
+
+# --- 貪欲 DFS（greedy）テスト ---
+
+def test_solve_greedy_simple():
+    state = make_capacity4_solvable()
+    result = solve(state, strategy="greedy", timeout=10.0)
+    assert result.solved is True
+    assert_solves(state, result.moves)
+
+
+def test_solve_greedy_finds_shorter_solution_than_dfs():
+    state = make_eight_color_puzzle()
+    greedy = solve(state, strategy="greedy", timeout=10.0)
+    dfs = solve(state, strategy="dfs", timeout=10.0)
+    assert greedy.solved is True
+    assert len(greedy.moves) < len(dfs.moves)
+    assert_solves(state, greedy.moves)
+
+
+def test_solve_greedy_with_prune():
+    state = make_eight_color_puzzle()
+    result = solve(state, strategy="greedy", timeout=10.0, prune=True)
+    assert result.solved is True
+    assert result.moves_pruned > 0
+
+
+# --- ビームサーチ（beam）テスト ---
+
+def test_solve_beam_simple():
+    state = make_eight_color_puzzle()
+    result = solve(state, strategy="beam", timeout=10.0)
+    assert result.solved is True
+    assert_solves(state, result.moves)
+
+
+def test_solve_beam_restarts_with_wider_beam(capsys):
+    # 幅 1 では行き詰まるが、幅を広げれば解けるパズル
+    state: PuzzleState = (
+        ("red", "red", "blue"),
+        ("green", "blue", "green"),
+        ("red", "blue", "green"),
+        (),
+    )
+    result = solve(state, strategy="beam", timeout=10.0, debug=True, bottle_capacity=3, beam_width=1)
+    assert result.solved is True
+    assert "restarting with width 2" in capsys.readouterr().err
+    assert_solves(state, result.moves, 3)
+
+
+def test_solve_beam_unsolvable_returns_false():
+    # 状態を切り捨てずにビームが途絶えた場合は解なしと判定する
+    state: PuzzleState = (
+        ("red", "blue", "green", "yellow"),
+        ("yellow", "green", "blue", "red"),
+        ("blue", "red", "yellow", "green"),
+        ("green", "yellow", "red", "blue"),
+    )
+    result = solve(state, strategy="beam", timeout=5.0, beam_width=1)
+    assert result.solved is False
+    assert result.moves == []
+
+
+# --- IDA* (ida)・メモ表テスト ---
+
+@pytest.mark.parametrize("prune", [False, True])
+def test_solve_ida_finds_shortest_solution(prune):
+    state = make_three_color_puzzle()
+    bfs = solve(state, strategy="bfs", timeout=10.0)
+    result = solve(state, strategy="ida", timeout=10.0, prune=prune)
+    assert result.solved is True
+    assert len(result.moves) == len(bfs.moves)
+    assert_solves(state, result.moves)
+
+
+def test_solve_ida_unsolvable_returns_false():
+    result = solve(make_unsolvable(), strategy="ida", timeout=5.0)
+    assert result.solved is False
+    assert result.moves == []
+
+
+def test_solve_with_memo_records_dead_states():
+    memo = MemoTable()
+    first = solve(make_unsolvable(), strategy="dfs", timeout=5.0, memo=memo)
+    assert first.solved is False
+    assert memo.is_dead(make_unsolvable(), 4)
+    # 記録済みの解なしは探索せずに返す
+    second = solve(make_unsolvable(), strategy="bfs", timeout=5.0, memo=memo)
+    assert second.solved is False
+    assert second.states_visited == 0
+
+
+def test_solve_with_memo_records_solution_bounds():
+    state = make_three_color_puzzle()
+    memo = MemoTable()
+    bfs = solve(state, strategy="bfs", timeout=10.0, memo=memo)
+    assert memo.lower_bound(state, 4) == len(bfs.moves)
+    assert memo.upper_bound(state, 4) == len(bfs.moves)
+
+
+def test_solve_ida_reuses_memo_across_runs():
+    state = make_three_color_puzzle()
+    memo = MemoTable()
+    first = solve(state, strategy="ida", timeout=10.0, memo=memo)
+    second = solve(state, strategy="ida", timeout=10.0, memo=memo)
+    assert len(second.moves) == len(first.moves)
+    assert second.states_visited < first.states_visited
+
+
+def test_solve_ida_uses_memo_upper_bound():
+    state = make_three_color_puzzle()
+    bfs = solve(state, strategy="bfs", timeout=10.0)
+    memo = MemoTable()
+    dfs = solve(state, strategy="dfs", timeout=10.0, memo=memo)
+    assert memo.upper_bound(state, 4) == len(dfs.moves)
+    # 上界があれば貪欲 DFS を省いて閾値を上界まで上げ、最短手順を見つける
+    result = solve(state, strategy="ida", timeout=10.0, memo=memo)
+    assert len(result.moves) == len(bfs.moves)
+    assert_solves(state, result.moves)
+
+
+def test_solve_ida_ignores_inconsistent_upper_bound():
+    state = make_three_color_puzzle()
+    bfs = solve(state, strategy="bfs", timeout=10.0)
+    memo = MemoTable()
+    memo.record_upper_bound(state, 4, 1)
+    result = solve(state, strategy="ida", timeout=10.0, memo=memo)
+    assert len(result.moves) == len(bfs.moves)
+
+
+@pytest.mark.parametrize("strategy", ["bfs", "dfs", "greedy", "beam"])
+@pytest.mark.parametrize("prune", [False, True])
+def test_solve_reconstructs_partial_block_pours(strategy, prune):
+    # 注ぎ先の空きが足りずブロックの一部だけを移す手を含む（手順は注ぎを巻き戻して復元する）
+    state: PuzzleState = (
+        ("red", "red", "green", "blue"),
+        (),
+        ("blue", "green", "green", "blue"),
+        ("red", "red", "green", "blue"),
+    )
+    result = solve(state, strategy=strategy, timeout=10.0, prune=prune, bottle_capacity=4)
+    assert result.solved is True
+    assert_solves(state, result.moves)
+
+
+def test_solve_ranked_bfs_finds_shortest_solution(tmp_path):
+    state = make_three_color_puzzle()
+    bfs = solve(state, strategy="bfs", timeout=10.0)
+    for path in (None, str(tmp_path / "depths.bin")):
+        result = solve(state, strategy="bfs", timeout=10.0, ranked=True, ranked_path=path)
+        assert result.solved is True
+        assert len(result.moves) == len(bfs.moves)
+        assert_solves(state, result.moves)
+
+
+def test_solve_ranked_bfs_unsolvable_returns_false():
+    result = solve(make_unsolvable(), strategy="bfs", timeout=5.0, ranked=True)
+    assert result.solved is False
+    assert result.moves == []
+
+
+def test_solve_ranked_requires_bfs():
+    with pytest.raises(ValueError):
+        solve(make_three_color_puzzle(), strategy="dfs", ranked=True)
+
+
+def test_solve_ranked_rejects_huge_state_space():
+    with pytest.raises(ValueError):
+        solve(make_eight_color_puzzle(), strategy="bfs", ranked=True)
+
+
+@pytest.mark.parametrize("strategy", ["bfs", "dfs", "greedy", "beam", "ida"])
+def test_solve_ignores_completed_bottles(strategy):
+    base = make_three_color_puzzle()
+    # 完成済みのボトルを間に挟んでも同じ手数で解け、手は元のボトル番号で返る
+    state: PuzzleState = (("yellow",) * 4,) + base[:2] + (("purple",) * 4,) + base[2:]
+    expected = solve(base, strategy=strategy, timeout=10.0)
+    result = solve(state, strategy=strategy, timeout=10.0)
+    assert result.solved is True
+    assert len(result.moves) == len(expected.moves)
+    current = state
+    for move in result.moves:
+        assert move.from_bottle not in (0, 3) and move.to_bottle not in (0, 3)
+        current = apply_move(current, move, 4)
+    assert is_solved(current, 4)
+
+
+class _Preempted(Exception):
+    pass
+
+
+class _PreemptingCheckpointer(Checkpointer):
+    """展開のたびに書き出し、saves 回書き出した直後に探索を中断させる"""
+
+    def __init__(self, path: str, saves: int) -> None:
+        super().__init__(path)
+        self.limit = saves
+
+    def due(self) -> bool:
+        return True
+
+    def save(self, checkpoint) -> None:
+        super().save(checkpoint)
+        if self.saves >= self.limit:
+            raise _Preempted
+
+
+@pytest.mark.parametrize("strategy", ["bfs", "dfs", "greedy"])
+@pytest.mark.parametrize("prune", [False, True])
+def test_solve_resumes_from_checkpoint(tmp_path, strategy, prune):
+    state = make_three_color_puzzle()
+    expected = solve(state, strategy=strategy, timeout=10.0, prune=prune)
+    path = str(tmp_path / "search.ckpt")
+    with pytest.raises(_Preempted):
+        solve(
+            state, strategy=strategy, timeout=10.0, prune=prune,
+            checkpointer=_PreemptingCheckpointer(path, 5),
+        )
+    # 中断した探索を続けると、中断しなかった場合と同じ結果になる
+    result = solve(
+        state, strategy=strategy, timeout=10.0, prune=prune,
+        checkpointer=Checkpointer(path), resume=True,
+    )
+    assert result.moves == expected.moves
+    assert result.states_visited == expected.states_visited
+    assert result.moves_pruned == expected.moves_pruned
+
+
+def test_solve_saves_checkpoint_on_timeout(tmp_path):
+    path = str(tmp_path / "search.ckpt")
+    checkpointer = Checkpointer(path)
+    with pytest.raises(PuzzleTimeoutError):
+        solve(make_eight_color_puzzle(), strategy="bfs", timeout=0.2, checkpointer=checkpointer)
+    assert checkpointer.saves == 1
+    assert len(checkpointer.load().parent) > 1
+
+
+def test_solve_resume_rejects_other_puzzle(tmp_path):
+    path = str(tmp_path / "search.ckpt")
+    with pytest.raises(_Preempted):
+        solve(
+            make_three_color_puzzle(), strategy="bfs", timeout=10.0,
+            checkpointer=_PreemptingCheckpointer(path, 1),
+        )
+    with pytest.raises(ValueError):
+        solve(
+            make_three_color_puzzle(), strategy="dfs", timeout=10.0,
+            checkpointer=Checkpointer(path), resume=True,
+        )
+
+
+def test_solve_checkpoint_requires_supported_strategy(tmp_path):
+    checkpointer = Checkpointer(str(tmp_path / "search.ckpt"))
+    with pytest.raises(ValueError):
+        solve(make_three_color_puzzle(), strategy="ida", checkpointer=checkpointer)
+
+
+def test_solve_finisher_rejects_unsupported_strategy():
+    with pytest.raises(ValueError):
+        solve(make_three_color_puzzle(), strategy="ida", finisher=lambda state: None)